@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import pickle
+import hashlib
+
+
+class AnalysisCache:
+    """
+    Persistent on-disk cache for pre-analyzed tracks.
+
+    Entries are content-addressed: the key is a hash of the audio file's bytes plus
+    the analyzer version and parameters, so renaming/moving a file still hits and any
+    parameter change misses. Total size is capped with LRU eviction (entry mtime is
+    bumped on every hit).
+
+    Writes go through '<name>.<pid>.tmp' files. A writer killed mid-write leaves
+    its temp file behind: opening the cache removes the ones too old to belong to
+    a write still in progress, and remove_temp_files(pid) drops a known-dead
+    process's right away.
+    """
+    ENTRY_EXT = ".pkl"
+    INDEX_NAME = "index.json"
+    TEMP_EXT = ".tmp"
+    STALE_TEMP_SEC = 3600.0  # No write takes this long (other processes may be writing now)
+
+    def __init__(self, cache_dir: str, max_bytes: int = 1024 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self.index_path = os.path.join(cache_dir, self.INDEX_NAME)
+        self._index = None
+        self.remove_temp_files(older_than=self.STALE_TEMP_SEC)
+
+    @staticmethod
+    def default_dir() -> str:
+        return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "..", "cache", "analysis")
+
+    # --- Keys ---
+
+    def file_digest(self, filepath: str) -> str:
+        """
+        Hash of the file contents. Remembered per (path, size, mtime) so an
+        unchanged file is not re-read on every lookup.
+        """
+        path = os.path.abspath(filepath)
+        st = os.stat(path)
+        stamp = [st.st_size, st.st_mtime_ns]
+
+        index = self._load_index()
+        known = index.get(path)
+        if known and known[:2] == stamp:
+            return known[2]
+
+        h = hashlib.blake2b(digest_size=20)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                h.update(block)
+        digest = h.hexdigest()
+
+        index[path] = stamp + [digest]
+        self._save_index()
+        return digest
+
+    def make_key(self, filepath: str, params: dict) -> str:
+        """Combines the content digest with the analyzer params (version, fps, model...)."""
+        blob = json.dumps(params, sort_keys=True, default=str).encode()
+        params_digest = hashlib.blake2b(blob, digest_size=10).hexdigest()
+        return f"{self.file_digest(filepath)}_{params_digest}"
+
+    # --- Entries ---
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + self.ENTRY_EXT)
+
+    def contains(self, key: str) -> bool:
+        return os.path.exists(self._entry_path(key))
+
+    def get(self, key: str):
+        path = self._entry_path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"AnalysisCache: dropping unreadable entry {key}: {e}")
+            self._remove(path)
+            return None
+
+        # LRU: a hit makes this the most recently used entry
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key: str, value) -> None:
+        path = self._entry_path(key)
+        # Write to a temp file and rename so an interrupted write never leaves a corrupt entry
+        tmp_path = f"{path}.{os.getpid()}{self.TEMP_EXT}"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(self.ENTRY_EXT):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        # Oldest (least recently used) first
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def remove_temp_files(self, pid: int = None, older_than: float = None) -> int:
+        """
+        Removes temp files left by interrupted writes: those of process 'pid'
+        and/or those untouched for 'older_than' seconds. Returns how many were removed.
+        """
+        suffix = f".{pid}{self.TEMP_EXT}" if pid is not None else self.TEMP_EXT
+        now = time.time()
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(suffix):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            if older_than is not None:
+                try:
+                    if now - os.stat(path).st_mtime < older_than:
+                        continue
+                except OSError:
+                    continue
+            self._remove(path)
+            removed += 1
+        return removed
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    # --- Digest Index ---
+
+    def _load_index(self) -> dict:
+        if self._index is None:
+            try:
+                with open(self.index_path, 'r') as f:
+                    self._index = json.load(f)
+            except Exception:
+                self._index = {}
+        return self._index
+
+    def _save_index(self) -> None:
+        # Merge with what other processes (e.g. library pre-analysis workers) wrote meanwhile
+        try:
+            with open(self.index_path, 'r') as f:
+                on_disk = json.load(f)
+            on_disk.update(self._index)
+            self._index = on_disk
+        except Exception:
+            pass
+
+        tmp_path = f"{self.index_path}.{os.getpid()}{self.TEMP_EXT}"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self._index, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"AnalysisCache: could not save digest index: {e}")
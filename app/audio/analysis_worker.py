@@ -0,0 +1,160 @@
+import time
+import threading
+import traceback
+from dataclasses import dataclass
+from enum import Enum
+from typing import Callable
+
+import numpy as np
+
+from app.audio.ring_buffer import AudioRingBuffer
+
+
+class OverloadPolicy(Enum):
+    DROP_OLDEST = "drop_oldest"   # Skip the backlog, analyze only the newest frame
+    COALESCE = "coalesce"         # Analyze the whole backlog in one step (its newest frame for per-frame stages)
+    SKIP_HEAVY = "skip_heavy"     # Analyze every frame, but without the heavy stages (HPSS)
+
+
+@dataclass
+class WorkerStats:
+    frames_analyzed: int = 0
+    frames_dropped: int = 0     # Never analyzed (drop-oldest, or overwritten in the ring)
+    frames_coalesced: int = 0   # Merged into a later analysis step
+    frames_light: int = 0       # Analyzed with heavy stages skipped
+    frames_late: int = 0        # Analysis took longer than one frame period
+    max_backlog: int = 0        # Largest number of whole frames waiting at once
+    errors: int = 0             # Analysis steps that raised (the frame is skipped, the worker goes on)
+
+    def report(self) -> str:
+        return (
+            f"analyzed={self.frames_analyzed} dropped={self.frames_dropped} "
+            f"coalesced={self.frames_coalesced} light={self.frames_light} "
+            f"late={self.frames_late} max_backlog={self.max_backlog} errors={self.errors}"
+        )
+
+
+# analyze(frame, window_end, light, n_frames, skipped):
+#   frame       samples to analyze (a view into the ring, valid for the call);
+#               n_frames whole frames long
+#   window_end  absolute ring position right after 'frame', for history windows
+#   light       True when heavy stages should be skipped
+#   n_frames    capture frames this step stands for (>1 when coalesced)
+#   skipped     samples dropped right before 'frame' (drop-oldest, ring overrun):
+#               the stream has a gap there, so stream histories must not span it
+AnalyzeFn = Callable[[np.ndarray, int, bool, int, int], None]
+
+
+class LiveAnalysisWorker:
+    """
+    Runs live analysis on its own thread, decoupled from the audio callback.
+
+    The callback only writes into the ring buffer and calls notify(). The
+    ring acts as the bounded queue: this worker reads whole frames from its
+    own cursor and, when more than 'max_backlog_frames' are waiting, applies
+    the overload policy instead of falling further behind.
+    """
+    def __init__(
+        self,
+        ring: AudioRingBuffer,
+        chunk_size: int,
+        fps: float,
+        analyze: AnalyzeFn,
+        policy: OverloadPolicy = OverloadPolicy.DROP_OLDEST,
+        max_backlog_frames: int = 2,
+    ):
+        self.ring = ring
+        self.reader = ring.reader()
+        self.chunk_size = chunk_size
+        self.frame_period = 1.0 / fps
+        self.analyze = analyze
+        self.policy = policy
+        self.max_backlog_frames = max(1, max_backlog_frames)
+        self.stats = WorkerStats()
+
+        self._wake = threading.Event()
+        self._idle = threading.Event()
+        self._running = False
+        self._busy = False
+        self._thread = None
+
+    def start(self):
+        if self._running: return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="live-analysis", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def notify(self):
+        """Called from the audio callback after writing new samples."""
+        self._wake.set()
+
+    def _run(self):
+        while self._running:
+            self._wake.wait(timeout=0.1)
+            self._wake.clear()
+            self.process_pending()
+            self._idle.set()
+
+    def wait_idle(self, timeout: float = 5.0) -> bool:
+        """Blocks until every whole frame written so far was analyzed (for faster-than-real-time feeders)."""
+        deadline = time.perf_counter() + timeout
+        while self.reader.pending >= self.chunk_size or self._busy:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or not self._running:
+                return False
+            self._idle.clear()
+            self._wake.set()
+            self._idle.wait(min(remaining, 0.05))
+        return True
+
+    def process_pending(self):
+        """Analyzes every whole frame that is waiting (applying the overload policy)."""
+        chunk = self.chunk_size
+        while self.reader.pending >= chunk:
+            backlog = self.reader.pending // chunk
+            self.stats.max_backlog = max(self.stats.max_backlog, backlog)
+
+            n_frames = 1
+            light = False
+            skipped = 0
+            if backlog > self.max_backlog_frames:
+                if self.policy == OverloadPolicy.DROP_OLDEST:
+                    skipped = (backlog - 1) * chunk
+                    self.reader.skip(skipped)
+                    self.stats.frames_dropped += backlog - 1
+                elif self.policy == OverloadPolicy.COALESCE:
+                    n_frames = backlog
+                    self.stats.frames_coalesced += backlog - 1
+                else:
+                    light = True
+
+            self._busy = True
+            overrun_before = self.reader.overrun_samples
+            frame = self.reader.read(n_frames * chunk)
+            overrun = self.reader.overrun_samples - overrun_before
+            self.stats.frames_dropped += overrun // chunk
+            skipped += overrun
+
+            t0 = time.perf_counter()
+            try:
+                self.analyze(frame, self.reader.cursor, light, n_frames, skipped)
+            except Exception:
+                # One bad frame must not kill the thread (the lights would freeze)
+                self.stats.errors += 1
+                if self.stats.errors == 1:
+                    traceback.print_exc()
+                self._busy = False
+                continue
+            if time.perf_counter() - t0 > self.frame_period:
+                self.stats.frames_late += 1
+            self.stats.frames_analyzed += 1
+            if light:
+                self.stats.frames_light += 1
+            self._busy = False
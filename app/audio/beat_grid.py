@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.audio.tempo import ioi_density
+
+
+def fourier_tempogram(novelty: np.ndarray, fps: float, bpms: np.ndarray, win_sec: float = 8.0, hop_sec: float = 1.0):
+    """
+    Local Fourier tempogram: the magnitude of every sliding window of the onset curve
+    at each candidate tempo, all windows in one matrix product. Unlike an autocorrelation
+    it is not tied to whole-frame lags (at 20 fps 128 BPM is a 9.375 frame period).
+    Returns (tempogram, centers): tempogram[w, b] is normalized so a pulse train exactly
+    at bpms[b] scores ~1.0, centers[w] is the frame index at the middle of window w.
+    """
+    win = max(4, int(round(win_sec * fps)))
+    hop = max(1, int(round(hop_sec * fps)))
+    x = np.asarray(novelty, dtype=np.float64)
+    if len(x) < win:
+        x = np.pad(x, (0, win - len(x)))
+
+    window = np.hanning(win)
+    frames = np.lib.stride_tricks.sliding_window_view(x, win)[::hop] * window
+    weight = frames.sum(axis=1, keepdims=True)
+    frames = frames - weight * window / window.sum() # Remove the DC term, keep the window shape
+
+    basis = np.exp(-2j * np.pi * np.outer(np.arange(win) / fps, np.asarray(bpms) / 60.0))
+    # Near-silent windows are measured against the track's average onset mass, so they don't look periodic
+    tempogram = np.abs(frames @ basis) / np.maximum(weight, max(0.5 * weight.mean(), 1e-12))
+
+    centers = np.arange(len(frames)) * hop + win // 2
+    return tempogram, centers
+
+
+def estimate_tempo(novelty: np.ndarray, tempogram: np.ndarray, bpms: np.ndarray, fps: float,
+                   prior_bpm: float = 120.0, prior_octaves: float = 1.0) -> float:
+    """
+    Global tempo: the peak of the mean tempogram weighted by a log-normal prior
+    (like librosa's), then refined by a full-track DFT within 3% of that peak.
+    """
+    if not np.any(tempogram):
+        return prior_bpm
+    prior = np.exp(-0.5 * (np.log2(bpms / prior_bpm) / prior_octaves) ** 2)
+    coarse = float(bpms[int(np.argmax(tempogram.mean(axis=0) * prior))])
+
+    fine = np.linspace(max(0.97 * coarse, bpms[0]), min(1.03 * coarse, bpms[-1]), 121)
+    x = novelty - novelty.mean()
+    basis = np.exp(-2j * np.pi * np.outer(np.arange(len(x)) / fps, fine / 60.0))
+    return float(fine[int(np.argmax(np.abs(x @ basis)))])
+
+
+def dp_beats(novelty: np.ndarray, fps: float, bpm: float, tightness: float = 100.0) -> np.ndarray:
+    """
+    Dynamic-programming beat tracker (Ellis 2007). Every frame's score is its onset
+    strength plus the best predecessor score, penalized by how far the interval strays
+    from the beat period (log-squared). Returns beat frame indices.
+    """
+    n = len(novelty)
+    std = novelty.std() if n else 0.0
+    if std == 0:
+        return np.zeros(0, dtype=int) # Silence (or a flat curve) has no beats
+    local = novelty / std
+
+    period = 60.0 * fps / bpm
+    offsets = np.arange(-int(round(2 * period)), -int(round(period / 2)) + 1)
+    penalty = -tightness * np.log(-offsets / period) ** 2
+
+    cumscore = np.zeros(n)
+    backlink = np.full(n, -1)
+    first = -offsets[-1]
+    cumscore[:first] = local[:first]
+    for i in range(first, n):
+        prev = i + offsets
+        valid = prev >= 0
+        scores = cumscore[prev[valid]] + penalty[valid]
+        best = int(np.argmax(scores))
+        cumscore[i] = local[i] + scores[best]
+        backlink[i] = prev[valid][best]
+
+    # Start the backtrace from the last strong local maximum of the cumulative score
+    peaks = np.flatnonzero((cumscore[1:-1] > cumscore[:-2]) & (cumscore[1:-1] >= cumscore[2:])) + 1
+    if len(peaks) == 0:
+        return np.zeros(0, dtype=int)
+    strong = peaks[cumscore[peaks] >= 0.5 * np.median(cumscore[peaks])]
+
+    beats = [int(strong[-1])]
+    while backlink[beats[-1]] >= 0:
+        beats.append(int(backlink[beats[-1]]))
+    beats = np.array(beats[::-1])
+
+    # Trim beats in the silent head/tail (smoothed onset below half its RMS)
+    win = np.hanning(max(3, int(round(period))))
+    smooth = np.convolve(local, win / win.sum(), mode="same")
+    threshold = 0.5 * np.sqrt(np.mean(smooth[beats] ** 2))
+    strong_beats = np.flatnonzero(smooth[beats] >= threshold)
+    if len(strong_beats):
+        beats = beats[strong_beats[0]:strong_beats[-1] + 1]
+    return beats
+
+
+def refine_beat_times(beat_frames: np.ndarray, fps: float, radius: int = 4, tolerance: float = 0.2):
+    """
+    Beat times and local beat periods below the frame resolution, from a straight-line
+    fit over the +/-'radius' beats around each beat, wherever those intervals agree
+    within 'tolerance'. Irregular stretches keep frame times and the raw interval.
+    Returns (times, periods), one entry per beat.
+    """
+    times = beat_frames / fps
+    n = len(times)
+    periods = np.diff(times, append=times[-1:] * 2 - times[-2:-1]) if n >= 2 else np.full(n, np.nan)
+    if n < 2 * radius + 1:
+        return times, periods
+
+    # Centred least-squares line: the intercept is the window mean, the slope a weighted sum
+    offsets = np.arange(-radius, radius + 1)
+    windows = np.lib.stride_tricks.sliding_window_view(times, 2 * radius + 1)
+    centre = windows.mean(axis=1)
+    slope = windows @ offsets / np.sum(offsets * offsets)
+
+    ibi = np.lib.stride_tricks.sliding_window_view(np.diff(times), 2 * radius)
+    steady = (ibi.max(axis=1) - ibi.min(axis=1)) <= tolerance * np.median(ibi, axis=1)
+
+    inner = slice(radius, n - radius)
+    times = times.copy()
+    times[inner] = np.where(steady, centre, times[inner])
+    periods[inner] = np.where(steady, slope, periods[inner])
+    # The first/last 'radius' beats follow the nearest fitted line
+    if steady[0]:
+        times[:radius] = centre[0] + offsets[:radius] * slope[0]
+        periods[:radius] = slope[0]
+    if steady[-1]:
+        times[n - radius:] = centre[-1] + offsets[radius + 1:] * slope[-1]
+        periods[n - radius:] = slope[-1]
+    return times, periods
+
+
+def choose_downbeats(beat_frames: np.ndarray, accent: np.ndarray, beats_per_bar: int = 4) -> np.ndarray:
+    """Picks the bar phase whose beats carry the most accent; returns indices into beat_frames."""
+    if len(beat_frames) == 0:
+        return np.zeros(0, dtype=int)
+    beat_accent = accent[beat_frames]
+    scores = [beat_accent[phase::beats_per_bar].mean() for phase in range(min(beats_per_bar, len(beat_frames)))]
+    return np.arange(int(np.argmax(scores)), len(beat_frames), beats_per_bar)
+
+
+@dataclass
+class BeatGrid:
+    """
+    Offline tempo result for a whole track: the beat/downbeat grid plus the
+    per-frame tempo tracks FrameMapper uses instead of ResonatorBPM/PulseTracker.
+    """
+    fps: float
+    bpm: float                    # global tempo
+    beat_times: np.ndarray        # seconds (sub-frame where the tempo is steady)
+    downbeat_times: np.ndarray
+    frame_bpm: np.ndarray         # per frame: local tempo from the surrounding beat interval
+    frame_confidence: np.ndarray  # per frame: tempogram salience at the beat period (0..1)
+    frame_pulse: np.ndarray       # per frame: 1.0 on a beat, decaying like PulseTracker
+    frame_density: np.ndarray     # per frame: IOI density, as ResonatorBPM reports it
+
+    def __len__(self) -> int:
+        return len(self.frame_bpm)
+
+
+def track_beats(onset: np.ndarray, fps: float, accent: np.ndarray = None, beats_per_bar: int = 4,
+                min_bpm: float = 60, max_bpm: float = 180, bpm_step: float = 0.5, decay_s: float = 0.18) -> BeatGrid:
+    """
+    Offline tempo stage over a whole onset curve: Fourier tempogram -> global tempo ->
+    DP beat tracking -> downbeats, and the per-frame bpm/confidence/pulse/density tracks.
+    'accent' (defaults to onset) decides which beat of the bar is the downbeat.
+    """
+    onset = np.asarray(onset, dtype=np.float64)
+    n = len(onset)
+
+    bpms = np.arange(min_bpm, max_bpm + 0.5 * bpm_step, bpm_step)
+    tempogram, centers = fourier_tempogram(onset, fps, bpms)
+    bpm = estimate_tempo(onset, tempogram, bpms, fps)
+    beat_frames = dp_beats(onset, fps, bpm)
+    beat_times, beat_periods = refine_beat_times(beat_frames, fps)
+    downbeats = choose_downbeats(beat_frames, onset if accent is None else np.asarray(accent), beats_per_bar)
+
+    frame_times = np.arange(n) / fps
+
+    # Local tempo of the beat each frame follows, global tempo outside the grid
+    frame_bpm = np.full(n, bpm)
+    if len(beat_times) >= 2:
+        k = np.searchsorted(beat_times, frame_times, side="right") - 1
+        inside = (k >= 0) & (k < len(beat_times) - 1)
+        frame_bpm[inside] = 60.0 / beat_periods[k[inside]]
+
+    # Tempogram salience at the beat tempo, interpolated from window centres to frames
+    salience = tempogram[:, int(np.argmin(np.abs(bpms - bpm)))]
+    frame_confidence = np.clip(np.interp(np.arange(n), centers, salience) * 2.0, 0.0, 1.0)
+
+    # Pulse: full on each beat frame, then the PulseTracker decay curve
+    frame_pulse = np.zeros(n)
+    if len(beat_frames):
+        decay_frames = max(1, int(decay_s * fps))
+        last = np.searchsorted(beat_frames, np.arange(n), side="right") - 1
+        since = np.maximum(np.arange(n) - beat_frames[np.maximum(last, 0)], 0) # Frames before the first beat are masked below
+        frame_pulse = np.where(last >= 0, (1.0 - 1.0 / decay_frames) ** since, 0.0)
+        frame_pulse[frame_pulse < 0.001] = 0.0
+
+    return BeatGrid(
+        fps=fps,
+        bpm=bpm,
+        beat_times=beat_times,
+        downbeat_times=beat_times[downbeats],
+        frame_bpm=frame_bpm,
+        frame_confidence=frame_confidence,
+        frame_pulse=frame_pulse,
+        frame_density=ioi_density(onset, fps),
+    )
@@ -0,0 +1,170 @@
+import time
+import threading
+from typing import Callable
+
+import numpy as np
+import soundfile as sf
+
+# PortAudio callback return code (pyaudio.paContinue), so sources don't need pyaudio to agree on it
+PA_CONTINUE = 0
+
+# callback(in_data: bytes, frame_count, time_info: dict, status) -> (out_data, flag)
+AudioCallback = Callable[[bytes, int, dict, int], tuple]
+
+
+class CaptureSource:
+    """
+    Where LiveAnalyzer's audio comes from. A source opens at its own
+    sample rate/channel count and delivers interleaved float32 chunks of
+    'chunk_size' frames to a PortAudio-style callback.
+    """
+    sample_rate: int = 44100
+    channels: int = 1
+
+    def open(self, chunk_size_for: Callable[[int], int], callback: AudioCallback, drain: Callable[[], None] = None):
+        """
+        Starts delivering audio. 'chunk_size_for(sample_rate)' gives the chunk size
+        once the rate is known. 'drain' (optional) is called by sources that run
+        faster than real time, to wait until the consumer caught up.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        raise NotImplementedError
+
+    def is_active(self) -> bool:
+        raise NotImplementedError
+
+    def get_time(self) -> float:
+        """Stream clock, in the same timebase as time_info['input_buffer_adc_time']."""
+        raise NotImplementedError
+
+
+class WasapiLoopbackSource(CaptureSource):
+    """System audio ('What U Hear') via PyAudioWPatch's WASAPI loopback (Windows only)."""
+    def __init__(self):
+        import pyaudiowpatch as pyaudio
+        self._pyaudio = pyaudio
+        self.p_audio = pyaudio.PyAudio()
+        self.stream = None
+        self.device = None
+
+    def get_default_wasapi_device(self):
+        """Finds the default WASAPI loopback device for capturing 'What U Hear'."""
+        try:
+            wasapi_info = self.p_audio.get_host_api_info_by_type(self._pyaudio.paWASAPI)
+        except OSError:
+            print("Looks like WASAPI is not available on the system. Exiting...")
+            return None
+
+        default_speakers = self.p_audio.get_device_info_by_index(wasapi_info["defaultOutputDevice"])
+
+        if not default_speakers["isLoopbackDevice"]:
+            for loopback in self.p_audio.get_loopback_device_info_generator():
+                if default_speakers["name"] in loopback["name"]:
+                    print(f"Found loopback device: {loopback['name']}")
+                    return loopback
+
+        print(f"Default loopback found: {default_speakers['name']}")
+        return default_speakers
+
+    def open(self, chunk_size_for, callback, drain=None):
+        self.device = self.get_default_wasapi_device()
+        if not self.device:
+            raise Exception("No WASAPI Loopback device found. Ensure audio is playing through speakers.")
+
+        self.sample_rate = int(self.device["defaultSampleRate"])
+        self.channels = self.device["maxInputChannels"]
+        self.stream = self.p_audio.open(
+            format=self._pyaudio.paFloat32,
+            channels=self.channels,
+            rate=self.sample_rate,
+            input=True,
+            frames_per_buffer=chunk_size_for(self.sample_rate),
+            input_device_index=self.device["index"],
+            stream_callback=callback
+        )
+
+    def close(self):
+        if self.stream is not None and self.stream.is_active():
+            self.stream.stop_stream()
+            self.stream.close()
+
+    def is_active(self) -> bool:
+        return self.stream is not None and self.stream.is_active()
+
+    def get_time(self) -> float:
+        return self.stream.get_time()
+
+
+class FileReplaySource(CaptureSource):
+    """
+    Replays an audio file through the live callback path, from a thread that
+    stands in for the audio driver.
+
+    realtime=True paces chunks at the file's sample rate (latency tests);
+    realtime=False delivers them as fast as the consumer drains them
+    (throughput tests, no frames dropped).
+    """
+    def __init__(self, path: str, realtime: bool = True):
+        self.path = path
+        self.realtime = realtime
+        info = sf.info(path)
+        self.sample_rate = info.samplerate
+        self.channels = info.channels
+        self.finished = threading.Event()
+        self.chunks_delivered = 0
+        self._running = False
+        self._thread = None
+        self._t0 = 0.0
+
+    def open(self, chunk_size_for, callback, drain=None):
+        chunk = chunk_size_for(self.sample_rate)
+        self._running = True
+        self.finished.clear()
+        self._t0 = time.perf_counter()
+        self._thread = threading.Thread(
+            target=self._run, args=(chunk, callback, drain), name="file-replay", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, chunk: int, callback: AudioCallback, drain):
+        try:
+            with sf.SoundFile(self.path) as f:
+                pos = 0
+                while self._running:
+                    data = f.read(chunk, dtype="float32", always_2d=True)
+                    if len(data) < chunk:
+                        break  # Drivers only deliver whole buffers
+                    if self.realtime:
+                        due = self._t0 + (pos + chunk) / self.sample_rate
+                        delay = due - time.perf_counter()
+                        if delay > 0:
+                            time.sleep(delay)
+                    time_info = {
+                        "input_buffer_adc_time": self._t0 + pos / self.sample_rate,
+                        "current_time": time.perf_counter(),
+                    }
+                    callback(np.ascontiguousarray(data).tobytes(), chunk, time_info, 0)
+                    pos += chunk
+                    self.chunks_delivered += 1
+                    if drain is not None and not self.realtime:
+                        drain()
+        finally:
+            self._running = False
+            self.finished.set()
+
+    def close(self):
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2.0)
+
+    def is_active(self) -> bool:
+        return self._running
+
+    def get_time(self) -> float:
+        return time.perf_counter()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Blocks until the whole file was delivered."""
+        return self.finished.wait(timeout)
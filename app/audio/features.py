@@ -1 +1,115 @@
-# audio features will be implemented here
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from app.audio.loudness import rms_loudness_frames, spectral_flux_frames
+from app.audio.onset import onset_strength_frames, normalize_onset_frames
+from app.audio.pitch_register import PitchRegister, spectral_energy_bands_frames
+
+
+@dataclass
+class FrameFeatures:
+    """
+    Per-frame features for a whole track, one array entry per lighting frame.
+    Everything here is stateless, so it is computed up front with array ops;
+    only the recursive engines (gate, dynamics, tempo, mood, color) stay per-frame.
+    """
+    rms: np.ndarray        # RMS of the DC-removed frame
+    flux: np.ndarray       # NoiseFilter spectral flux
+    onset: np.ndarray      # normalized onset strength (0..1) from the percussive part
+    band_low: np.ndarray
+    band_mid: np.ndarray
+    band_high: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.rms)
+
+    def __getitem__(self, idx: slice) -> "FrameFeatures":
+        """Frames 'idx' (a slice) of every feature, as views."""
+        return FrameFeatures(**{name: getattr(self, name)[idx] for name in FrameFeatures.__dataclass_fields__})
+
+    @staticmethod
+    def concatenate(parts: list) -> "FrameFeatures":
+        return FrameFeatures(**{
+            name: np.concatenate([getattr(p, name) for p in parts])
+            for name in FrameFeatures.__dataclass_fields__
+        })
+
+
+def frame_view(x: np.ndarray, frame_size: int, hop: int | None = None) -> np.ndarray:
+    """
+    Returns a strided (n_frames, frame_size) view of a 1-D signal without copying.
+    Trailing samples that do not fill a whole frame are dropped.
+    """
+    hop = hop or frame_size
+    if len(x) < frame_size:
+        return np.empty((0, frame_size), dtype=x.dtype)
+    return np.lib.stride_tricks.sliding_window_view(x, frame_size)[::hop]
+
+
+class FrameFeatureExtractor:
+    """
+    Computes RMS, DC removal, onset strength, LOW/MID/HIGH band energies and
+    spectral flux for every frame of a signal.
+
+    Matches the per-frame pipeline: loudness, flux and bands use the DC-removed mix
+    (mid from the harmonic part), onset uses the raw percussive part.
+    Frames are processed in blocks so the FFT scratch memory stays bounded, and
+    consecutive process() calls continue the same track (flux is carried over).
+    """
+    def __init__(self, sample_rate: int, fps: float, block_frames: int = 512):
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate / fps)
+        self.block_frames = block_frames
+        self._prev_spectrum = None
+
+    def process(self, y: np.ndarray, y_harmonic: np.ndarray, y_percussive: np.ndarray) -> FrameFeatures:
+        frames = frame_view(y, self.frame_size)
+        frames_h = frame_view(y_harmonic, self.frame_size)
+        frames_p = frame_view(y_percussive, self.frame_size)
+        total_frames = len(frames)
+
+        rms = np.zeros(total_frames)
+        flux = np.zeros(total_frames)
+        onset = np.zeros(total_frames)
+        band_low = np.zeros(total_frames)
+        band_mid = np.zeros(total_frames)
+        band_high = np.zeros(total_frames)
+
+        for start in range(0, total_frames, self.block_frames):
+            end = min(start + self.block_frames, total_frames)
+
+            block = frames[start:end]
+            block = block - block.mean(axis=1, keepdims=True)  # DC offset
+
+            rms[start:end] = rms_loudness_frames(block)
+            flux[start:end], self._prev_spectrum = spectral_flux_frames(block, self._prev_spectrum)
+            onset[start:end] = normalize_onset_frames(onset_strength_frames(frames_p[start:end]))
+
+            bands = spectral_energy_bands_frames(block, self.sample_rate, frames_h[start:end])
+            band_low[start:end] = bands[PitchRegister.LOW]
+            band_mid[start:end] = bands[PitchRegister.MID]
+            band_high[start:end] = bands[PitchRegister.HIGH]
+
+        return FrameFeatures(
+            rms=rms,
+            flux=flux,
+            onset=onset,
+            band_low=band_low,
+            band_mid=band_mid,
+            band_high=band_high,
+        )
+
+
+def extract_frame_features(
+    y: np.ndarray,
+    y_harmonic: np.ndarray,
+    y_percussive: np.ndarray,
+    sample_rate: int,
+    fps: float,
+    block_frames: int = 512,
+) -> FrameFeatures:
+    """Whole-track convenience wrapper around FrameFeatureExtractor."""
+    return FrameFeatureExtractor(sample_rate, fps, block_frames).process(y, y_harmonic, y_percussive)
@@ -1,48 +1,328 @@
 from __future__ import annotations
 
+import os
+import struct
 from dataclasses import dataclass
-from typing import Iterator, Tuple
+from typing import Iterator, Optional, Tuple
 
 import numpy as np
 import soundfile as sf
 
+from app.audio.resample import StreamingResampler
+
+# Samples decoded per read (per channel). Memory stays bounded by this, not the track length.
+DECODE_BLOCK = 65536
+
 
 @dataclass(frozen=True)
 class AudioStreamInfo:
     sample_rate: int
     channels: int
+    n_samples: Optional[int] = None  # Per channel at sample_rate; estimated from the header, None if unknown
+
+
+@dataclass(frozen=True)
+class _PcmLayout:
+    sample_rate: int
+    channels: int
+    dtype: str
+    scale: float
+    data_offset: int
+    n_samples: int   # Per channel
+
+
+# WAVE_FORMAT_PCM / WAVE_FORMAT_IEEE_FLOAT sample types that map 1:1 onto NumPy dtypes
+_PCM_DTYPES = {
+    (1, 16): ("<i2", 1.0 / 32768.0),
+    (1, 32): ("<i4", 1.0 / 2147483648.0),
+    (3, 32): ("<f4", 1.0),
+    (3, 64): ("<f8", 1.0),
+}
+
+
+def _pcm_wav_layout(path: str) -> Optional[_PcmLayout]:
+    """
+    Parses a RIFF/RF64 WAVE header. Returns the sample layout if the data chunk
+    can be memory-mapped as-is (16/32-bit int or float PCM), else None.
+    """
+    try:
+        file_size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+            if riff not in (b"RIFF", b"RF64") or wave != b"WAVE":
+                return None
+
+            fmt = None
+            ds64_data_size = None
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    return None
+                chunk_id, size = struct.unpack("<4sI", header)
+                body_start = f.tell()
+
+                if chunk_id == b"ds64":
+                    _, ds64_data_size = struct.unpack("<QQ", f.read(16))
+                elif chunk_id == b"fmt ":
+                    tag, ch, sr, _, _, bits = struct.unpack("<HHIIHH", f.read(16))
+                    if tag == 0xFFFE and size >= 40:
+                        # WAVE_FORMAT_EXTENSIBLE: the real format tag leads the SubFormat GUID
+                        f.seek(body_start + 24)
+                        tag = struct.unpack("<H", f.read(2))[0]
+                    fmt = (tag, ch, sr, bits)
+                elif chunk_id == b"data":
+                    if fmt is None or (fmt[0], fmt[3]) not in _PCM_DTYPES:
+                        return None
+                    tag, ch, sr, bits = fmt
+                    if riff == b"RF64" and size == 0xFFFFFFFF and ds64_data_size is not None:
+                        size = ds64_data_size
+                    size = min(size, file_size - body_start)
+                    dtype, scale = _PCM_DTYPES[(tag, bits)]
+                    return _PcmLayout(sr, ch, dtype, scale, body_start, size // (ch * bits // 8))
+
+                f.seek(body_start + size + (size & 1))
+    except (OSError, struct.error):
+        return None
+
+
+def _memmap_frames(path: str, layout: _PcmLayout, frame_size: int) -> Iterator[np.ndarray]:
+    """
+    Zero-copy frame source over a memory-mapped PCM data chunk.
+
+    Mono float32 frames are yielded as read-only views of the map. Anything
+    else is down-mixed in place into one preallocated buffer that is reused
+    for every frame, so consumers must copy a frame they want to keep.
+    """
+    if layout.n_samples == 0:
+        return
+    data = np.memmap(
+        path, dtype=layout.dtype, mode="r", offset=layout.data_offset,
+        shape=(layout.n_samples, layout.channels),
+    )
+    zero_copy = layout.channels == 1 and layout.dtype == "<f4"
+    out = np.empty(frame_size, dtype=np.float32)
+    scale = np.float32(layout.scale)
+
+    for start in range(0, layout.n_samples, frame_size):
+        view = data[start:start + frame_size]
+        if zero_copy:
+            yield view[:, 0]
+            continue
+        buf = out[:len(view)]
+        np.mean(view, axis=1, dtype=np.float32, out=buf)
+        if scale != 1.0:
+            buf *= scale
+        yield buf
+
+
+def _open_soundfile(path: str):
+    f = sf.SoundFile(path)
+
+    def blocks() -> Iterator[np.ndarray]:
+        with f:
+            while True:
+                data = f.read(DECODE_BLOCK, dtype="float32", always_2d=True)
+                if len(data) == 0:
+                    break
+                yield data.mean(axis=1, dtype=np.float32)
+
+    return f.samplerate, f.channels, f.frames, blocks()
+
+
+def _open_audioread(path: str):
+    """Streaming decoder for formats libsndfile can't read (MP3/AAC via ffmpeg/GStreamer/CoreAudio)."""
+    import audioread
+
+    f = audioread.audio_open(path)
+    ch = f.channels
+
+    def blocks() -> Iterator[np.ndarray]:
+        carry = b""
+        with f:
+            for buf in f:
+                buf = carry + bytes(buf)
+                usable = len(buf) - len(buf) % (2 * ch)
+                carry = buf[usable:]
+                pcm = np.frombuffer(buf[:usable], dtype="<i2").reshape(-1, ch)
+                yield pcm.mean(axis=1, dtype=np.float32) * np.float32(1.0 / 32768.0)
+
+    n_samples = int(f.duration * f.samplerate) if f.duration else None
+    return f.samplerate, ch, n_samples, blocks()
 
 
 def frames_from_file(
     path: str,
     fps: float = 20.0,
     target_sr: int | None = 44100,
+    frame_size: int | None = None,
+    memmap: bool = True,
 ) -> Tuple[AudioStreamInfo, Iterator[np.ndarray]]:
     """
     Yields mono float32 frames from an audio file.
 
-    - Minimal v1: expects WAV/FLAC/OGG readable by soundfile.
-    - If sample rate differs from target_sr, we do NOT resample yet (we'll enforce later).
+    - WAV/FLAC/OGG (and MP3 on newer libsndfile) are decoded by soundfile,
+      anything else (MP3/AAC) by audioread. Both stream in blocks.
+    - If the sample rate differs from target_sr, blocks go through a streaming
+      polyphase resampler. target_sr=None keeps the file's native rate.
+    - PCM WAV/RF64 at the target rate is memory-mapped instead (no per-frame
+      reads or allocations). Its frames are views or a reused buffer, valid
+      until the next frame is pulled.
+    - Frames are int(sr / fps) samples unless 'frame_size' is given
+      (e.g. large blocks for offline analysis).
+    - memmap=False always decodes: mapped pages stay resident (counted in the
+      process's memory) for as long as the map is open, i.e. the whole file.
     """
+    layout = _pcm_wav_layout(path) if memmap else None
+    if layout is not None and target_sr in (None, layout.sample_rate):
+        frame_size = frame_size or int(layout.sample_rate / fps)
+        info = AudioStreamInfo(sample_rate=layout.sample_rate, channels=layout.channels, n_samples=layout.n_samples)
+        return info, _memmap_frames(path, layout, frame_size)
 
-    f = sf.SoundFile(path)
-    sr = f.samplerate
-    ch = f.channels
+    try:
+        sr, ch, n_samples, blocks = _open_soundfile(path)
+    except sf.LibsndfileError:
+        sr, ch, n_samples, blocks = _open_audioread(path)
 
+    resampler = None
     if target_sr is not None and sr != target_sr:
-        raise ValueError(
-            f"Expected sample_rate={target_sr}, got {sr}. "
-            "For v1, please use a 44.1kHz WAV. (We will add resampling later.)"
-        )
+        resampler = StreamingResampler(sr, target_sr)
+        n_samples = -(-n_samples * resampler.up // resampler.down) if n_samples is not None else None
+        sr = target_sr
 
-    frame_size = int(sr / fps)
+    frame_size = frame_size or int(sr / fps)
 
     def gen() -> Iterator[np.ndarray]:
-        while True:
-            data = f.read(frame_size, dtype="float32", always_2d=True)
+        pending = np.zeros(0, dtype=np.float32)
+        for block in blocks:
+            if resampler is not None:
+                block = resampler.process(block)
+            pending = np.concatenate([pending, block])
+            n_full = len(pending) // frame_size
+            for i in range(n_full):
+                yield pending[i * frame_size:(i + 1) * frame_size]
+            pending = pending[n_full * frame_size:]
+
+        if resampler is not None:
+            pending = np.concatenate([pending, resampler.flush()])
+        for start in range(0, len(pending), frame_size):
+            yield pending[start:start + frame_size]
+
+    return AudioStreamInfo(sample_rate=sr, channels=ch, n_samples=n_samples), gen()
+
+
+class SampleWindow:
+    """
+    Sliding window over a forward-only stream of sample blocks (absolute sample indices).
+
+    fill() reads until a sample index is covered (or the stream ends), get() copies
+    any range inside the window, release() drops everything before an index.
+    Memory is the span between the release point and the furthest fill,
+    however long the stream is.
+    """
+    def __init__(self, blocks):
+        """'blocks': an iterator of sample blocks, or a whole signal (already in memory)."""
+        if isinstance(blocks, np.ndarray):
+            self._blocks = iter(())
+            self._buf = blocks
+        else:
+            self._blocks = iter(blocks)
+            self._buf = np.zeros(0, dtype=np.float32)
+        self.start = 0          # Absolute index of _buf[0]
+        self.exhausted = False
+
+    @property
+    def end(self) -> int:
+        """Absolute index just past the last sample read."""
+        return self.start + len(self._buf)
+
+    def fill(self, until: int):
+        pending = [self._buf]
+        n = self.end
+        while n < until and not self.exhausted:
+            block = next(self._blocks, None)
+            if block is None:
+                self.exhausted = True
+            else:
+                pending.append(np.array(block, dtype=np.float32))  # Sources may reuse their buffer
+                n += len(block)
+        if len(pending) > 1:
+            self._buf = np.concatenate(pending)
+
+    def get(self, start: int, stop: int) -> np.ndarray:
+        """Samples [start, stop), cut short at the end of what has been read."""
+        if start < self.start:
+            raise ValueError(f"sample {start} was already released (window starts at {self.start})")
+        return self._buf[start - self.start:max(start, stop) - self.start]
+
+    def release(self, before: int):
+        drop = max(0, min(before - self.start, len(self._buf)))
+        if drop:
+            self._buf = self._buf[drop:].copy()
+            self.start += drop
+
+
+def seekable_length(path: str, target_sr: int = 44100) -> Optional[int]:
+    """
+    Length in samples at target_sr (as frames_from_file streams it) of a file that
+    read_range() can seek in, or None (audioread formats, unseekable streams).
+    """
+    try:
+        with sf.SoundFile(path) as f:
+            if not f.seekable():
+                return None
+            n_samples, sr = f.frames, f.samplerate
+    except sf.LibsndfileError:
+        return None
+    if sr != target_sr:
+        resampler = StreamingResampler(sr, target_sr)
+        n_samples = -(-n_samples * resampler.up // resampler.down)
+    return n_samples
+
+
+def read_range(path: str, start: int, stop: int, target_sr: int = 44100, seek: bool = True) -> np.ndarray:
+    """
+    Mono float32 samples [start, stop) of a file at target_sr: the same samples
+    frames_from_file streams, without decoding everything before 'start' when
+    soundfile can seek in the file.
+
+    A resampled range starts the polyphase filter a few taps early, on a multiple
+    of the ratio's input step, so its first sample has no filter start-up transient.
+    Files soundfile can't seek in, or seek=False, are decoded from the start.
+    """
+    stop = max(start, stop)
+    try:
+        f = sf.SoundFile(path)
+    except sf.LibsndfileError:
+        f = None
+    if f is None or not seek or not f.seekable():
+        if f is not None:
+            f.close()
+        _, blocks = frames_from_file(path, target_sr=target_sr, frame_size=DECODE_BLOCK, memmap=False)
+        window = SampleWindow(blocks)
+        while window.end < stop and not window.exhausted:
+            window.release(start)
+            window.fill(window.end + DECODE_BLOCK)
+        return window.get(start, stop)
+
+    with f:
+        if f.samplerate == target_sr:
+            f.seek(min(start, f.frames))
+            return f.read(stop - start, dtype="float32", always_2d=True).mean(axis=1, dtype=np.float32)
+
+        resampler = StreamingResampler(f.samplerate, target_sr)
+        up, down = resampler.up, resampler.down
+        # Input start whose filter history is all real input by output 'start'
+        first_in = max(0, (start * down // up - resampler.taps - down) // down * down)
+        skip = start - first_in * up // down
+        f.seek(min(first_in, f.frames))
+
+        out = [np.zeros(0, dtype=np.float32)]
+        n = 0
+        while n < skip + stop - start:
+            data = f.read(DECODE_BLOCK, dtype="float32", always_2d=True)
             if len(data) == 0:
+                out.append(resampler.flush())
                 break
-            mono = data.mean(axis=1).astype(np.float32)
-            yield mono
-
-    return AudioStreamInfo(sample_rate=sr, channels=ch), gen()
+            out.append(resampler.process(data.mean(axis=1, dtype=np.float32)))
+            n += len(out[-1])
+        return np.concatenate(out)[skip:skip + stop - start]
@@ -0,0 +1,110 @@
+from functools import lru_cache
+
+import librosa
+import numpy as np
+from scipy import sparse
+
+from app.utils.smoothing import decay_factor
+
+# Krumhansl-Schmuckler key profiles
+MAJOR_PROFILE = [6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88]
+MINOR_PROFILE = [6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17]
+PITCH_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+
+# All 24 keys, in the order the correlation loop used to try them (ties go to the first)
+KEY_NAMES = [f"{name} {mode}" for name in PITCH_NAMES for mode in ("Maj", "Min")]
+
+
+def _key_profile_matrix() -> np.ndarray:
+    """24 x 12 rotated profiles, centred and unit-norm: a dot product with a centred,
+    unit-norm chroma vector is their Pearson correlation."""
+    rows = []
+    for i in range(12):
+        rows.append(np.roll(MAJOR_PROFILE, i))
+        rows.append(np.roll(MINOR_PROFILE, i))
+    profiles = np.array(rows, dtype=np.float64)
+    profiles -= profiles.mean(axis=1, keepdims=True)
+    return profiles / np.linalg.norm(profiles, axis=1, keepdims=True)
+
+
+KEY_PROFILES = _key_profile_matrix()
+
+
+def key_correlations(chroma: np.ndarray) -> np.ndarray:
+    """Pearson correlation of a 12-bin chroma vector with every key (KEY_NAMES order); NaN if it is flat."""
+    c = np.asarray(chroma, dtype=np.float64) - np.mean(chroma)
+    norm = np.linalg.norm(c)
+    if norm == 0.0:
+        return np.full(len(KEY_NAMES), np.nan)
+    return KEY_PROFILES @ (c / norm)
+
+
+def estimate_key(chroma_sum: np.ndarray) -> str:
+    """
+    Global Key Detection (Krumhansl-Schmuckler).
+    Correlates a 12-bin pitch class profile against all 24 rotated key profiles,
+    e.g. "C Maj" or "F# Min" ("Unknown" if nothing correlates).
+    """
+    corr = key_correlations(chroma_sum)
+    if not np.any(corr > -1):
+        return "Unknown"
+    return KEY_NAMES[int(np.nanargmax(corr))]
+
+
+@lru_cache(maxsize=8)
+def chroma_filterbank(n_fft: int, sample_rate: int, threshold: float = 0.01) -> sparse.csr_matrix:
+    """
+    Sparse 12 x (n_fft // 2 + 1) matrix folding an STFT magnitude column into
+    pitch classes (C first): librosa's chroma filter shapes, with weights under
+    'threshold' of the largest dropped, so a column costs a few hundred multiplies.
+    """
+    weights = librosa.filters.chroma(sr=sample_rate, n_fft=n_fft)
+    weights[weights < threshold * weights.max()] = 0.0
+    return sparse.csr_matrix(weights)
+
+
+class StreamingKeyEstimator:
+    """
+    Rolling key detection for the live path.
+
+    update() folds STFT magnitude columns into a 12-bin chroma vector through
+    the sparse chroma filterbank and adds it to an exponentially decaying sum
+    ('memory_s' time constant), so the key follows the last stretch of music.
+    estimate() correlates that sum with all 24 key profiles in one matrix
+    product; it is cheap, but only needs to run a few times per second.
+
+    A new key replaces the current one only when it correlates better by
+    'switch_margin', so the colour tint doesn't flicker between related keys.
+    """
+    def __init__(self, sample_rate: int, n_fft: int = 2048, hop: int = 512,
+                 memory_s: float = 20.0, switch_margin: float = 0.05, default_key: str = "C Maj"):
+        self.filterbank = chroma_filterbank(n_fft, sample_rate)
+        self.decay = decay_factor(memory_s, sample_rate / hop)  # Per column
+        self.switch_margin = switch_margin
+        self.default_key = default_key
+        self.reset()
+
+    def reset(self):
+        self.chroma = np.zeros(12)
+        self.key = self.default_key
+        self.correlation = 0.0
+
+    def update(self, columns) -> None:
+        """Adds magnitude columns (n_columns x n_bins, oldest first)."""
+        if len(columns) == 0:
+            return
+        columns = np.asarray(columns)
+        chroma = self.filterbank @ columns.T  # 12 x n_columns, magnitude per pitch class
+        weights = self.decay ** np.arange(len(columns) - 1, -1, -1)
+        self.chroma = self.chroma * self.decay ** len(columns) + chroma @ weights
+
+    def estimate(self) -> str:
+        corr = key_correlations(self.chroma)
+        if not np.any(corr > -1):
+            return self.key
+        best = int(np.nanargmax(corr))
+        current = KEY_NAMES.index(self.key) if self.key in KEY_NAMES else None
+        if current is None or corr[best] > corr[current] + self.switch_margin:
+            self.key = KEY_NAMES[best]
+        self.correlation = float(corr[KEY_NAMES.index(self.key)])
+        return self.key
@@ -0,0 +1,213 @@
+import os
+import time
+import multiprocessing as mp
+from multiprocessing.connection import wait
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+from app.audio.analysis_cache import AnalysisCache
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".ogg", ".mp3", ".m4a", ".aac", ".aif", ".aiff")
+
+
+@dataclass
+class TrackJobResult:
+    path: str
+    status: str             # "analyzed" | "remapped" | "cached" | "failed" | "timeout"
+    wall_sec: float = 0.0
+    audio_sec: float = 0.0
+    error: str = ""
+
+
+@dataclass
+class LibrarySummary:
+    results: List[TrackJobResult] = field(default_factory=list)
+    wall_sec: float = 0.0
+
+    def count(self, status: str) -> int:
+        return sum(1 for r in self.results if r.status == status)
+
+    @property
+    def analyzed_audio_sec(self) -> float:
+        return sum(r.audio_sec for r in self.results if r.status == "analyzed")
+
+    @property
+    def tracks_per_min(self) -> float:
+        return self.count("analyzed") / max(self.wall_sec / 60.0, 1e-9)
+
+    @property
+    def realtime_factor(self) -> float:
+        """Seconds of audio analyzed per wall-clock second (all workers combined)."""
+        return self.analyzed_audio_sec / max(self.wall_sec, 1e-9)
+
+    def report(self) -> str:
+        return (
+            f"Analyzed: {self.count('analyzed')} | Re-mapped: {self.count('remapped')} | Cached (skipped): {self.count('cached')} | "
+            f"Failed: {self.count('failed')} | Timed out: {self.count('timeout')}\n"
+            f"Wall time: {self.wall_sec:.1f}s | Throughput: {self.tracks_per_min:.1f} tracks/min | "
+            f"Real-time factor: {self.realtime_factor:.1f}x"
+        )
+
+
+def find_audio_files(root: str) -> List[str]:
+    """Recursively collects audio files under 'root', sorted for a stable order."""
+    found = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            if name.lower().endswith(AUDIO_EXTENSIONS):
+                found.append(os.path.join(dirpath, name))
+    return sorted(found)
+
+
+def _worker_main(inbox, results, fps: float, target_sr: int, cache_dir: str, cache_max_bytes: int, streaming: bool):
+    """
+    Worker process loop. Each finished track is written to the shared on-disk cache,
+    so an interrupted run resumes by simply skipping cache hits. Results go back on
+    this worker's own pipe ('results').
+    """
+    from app.audio.player_backend import TrackAnalyzer
+
+    cache = AnalysisCache(cache_dir, max_bytes=cache_max_bytes)
+    analyzer = TrackAnalyzer(fps=fps, target_sr=target_sr, cache=cache, streaming=streaming)
+    global_baselines = analyzer.load_global_baselines()
+
+    while True:
+        path = inbox.get()
+        if path is None:
+            break
+        t0 = time.perf_counter()
+        try:
+            if analyzer.is_cached(path, global_baselines):
+                results.send(TrackJobResult(path, "cached", time.perf_counter() - t0))
+                continue
+            # Cached features: only the mapping changed, the engines re-run without decoding
+            status = "remapped" if analyzer.has_cached_features(path) else "analyzed"
+            frames, _ = analyzer.analyze_timeline(path)
+            results.send(TrackJobResult(path, status, time.perf_counter() - t0, len(frames) / fps))
+        except Exception as e:
+            results.send(TrackJobResult(path, "failed", time.perf_counter() - t0, error=str(e)))
+
+
+class _Worker:
+    """
+    One worker process with its own inbox and result pipe. Nothing is shared with
+    the other workers, so killing this one (e.g. mid-write of a result) can't lock
+    or corrupt their channels; its pipe is simply discarded with it.
+    """
+    def __init__(self, ctx, args):
+        self.inbox = ctx.Queue()
+        self.results, sender = ctx.Pipe(duplex=False)
+        self.process = ctx.Process(target=_worker_main, args=(self.inbox, sender) + args, daemon=True)
+        self.process.start()
+        sender.close()  # The worker holds the only write end: EOF here once it exits
+        self.path = None
+        self.started = 0.0
+
+    def assign(self, path: str):
+        self.path = path
+        self.started = time.perf_counter()
+        self.inbox.put(path)
+
+    def receive(self) -> Optional[TrackJobResult]:
+        """The worker's result, or None if it exited without sending one."""
+        try:
+            return self.results.recv()
+        except (EOFError, OSError):
+            return None
+
+    def close(self):
+        self.results.close()
+        self.inbox.close()
+
+
+class LibraryAnalyzer:
+    """
+    Pre-analyzes many tracks across all cores and stores them in the AnalysisCache.
+
+    Each worker owns one task at a time and its own channels, so a track that
+    exceeds the per-file timeout can be killed on its own (its worker is replaced)
+    without losing the rest of the pool.
+    """
+    def __init__(
+        self,
+        cache_dir: str,
+        fps: float = 20.0,
+        target_sr: int = 44100,
+        workers: Optional[int] = None,
+        timeout_s: float = 600.0,
+        cache_max_bytes: int = 4 * 1024 * 1024 * 1024,
+        streaming: bool = False,
+    ):
+        self.cache_dir = cache_dir
+        self.fps = fps
+        self.target_sr = target_sr
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout_s = timeout_s
+        self.cache_max_bytes = cache_max_bytes
+        self.streaming = streaming  # Bounded-memory decoding (TrackAnalyzer streaming mode)
+
+    def run(self, paths: List[str], on_result: Callable[[TrackJobResult, int, int], None] = None) -> LibrarySummary:
+        # Spawn (the Windows default) everywhere, so behavior matches the show laptops
+        ctx = mp.get_context("spawn")
+        args = (self.fps, self.target_sr, self.cache_dir, self.cache_max_bytes, self.streaming)
+
+        # Opening the cache clears temp files left by earlier, interrupted runs
+        cache = AnalysisCache(self.cache_dir, max_bytes=self.cache_max_bytes)
+        summary = LibrarySummary()
+        pending = list(reversed(paths))
+        pool = [_Worker(ctx, args) for _ in range(min(self.workers, len(paths)))]
+        t_start = time.perf_counter()
+
+        def finish(res: TrackJobResult):
+            summary.results.append(res)
+            if on_result:
+                on_result(res, len(summary.results), len(paths))
+
+        try:
+            while len(summary.results) < len(paths):
+                for w in pool:
+                    if w.path is None and pending:
+                        w.assign(pending.pop())
+
+                busy = [w for w in pool if w.path is not None]
+                ready = wait([w.results for w in busy], timeout=0.5) if busy else []
+                for w in busy:
+                    if w.results in ready:
+                        res = w.receive()
+                        if res is not None:
+                            w.path = None
+                            finish(res)
+                        else:
+                            # EOF: it exited without a result. Reap it now so it is reported
+                            # below; until then wait() would return its pipe on every pass.
+                            w.process.join(timeout=5.0)
+                            if w.process.is_alive():
+                                w.process.kill()
+                                w.process.join()
+
+                now = time.perf_counter()
+                for i, w in enumerate(pool):
+                    if w.path is not None and now - w.started > self.timeout_s:
+                        w.process.kill()
+                        w.process.join()
+                        w.close()
+                        cache.remove_temp_files(pid=w.process.pid)
+                        finish(TrackJobResult(w.path, "timeout", now - w.started, error=f"exceeded {self.timeout_s:.0f}s"))
+                        pool[i] = _Worker(ctx, args)
+                    elif w.path is not None and not w.process.is_alive():
+                        w.close()
+                        cache.remove_temp_files(pid=w.process.pid)
+                        finish(TrackJobResult(w.path, "failed", now - w.started, error=f"worker died (exit code {w.process.exitcode})"))
+                        pool[i] = _Worker(ctx, args)
+        finally:
+            for w in pool:
+                if w.process.is_alive():
+                    w.inbox.put(None)
+            for w in pool:
+                w.process.join(timeout=2.0)
+                if w.process.is_alive():
+                    w.process.kill()
+                w.close()
+
+        summary.wall_sec = time.perf_counter() - t_start
+        return summary
@@ -1,38 +1,76 @@
 import os
 import time
-import threading
 import numpy as np
-import pyaudiowpatch as pyaudio
-import librosa
-from collections import deque
-from app.audio.player_backend import FrameAnalysis
+from app.audio.timeline import FrameAnalysis
 from app.audio.onset import onset_strength, normalize_onset
-from app.audio.pitch_register import spectral_energy_bands
+from app.audio.pitch_register import PitchRegister, spectral_energy_bands
 from app.audio.loudness import rms_loudness, AdaptiveNormalizer
+from app.audio.ring_buffer import AudioRingBuffer
+from app.audio.capture import CaptureSource, WasapiLoopbackSource, PA_CONTINUE
+from app.audio.streaming_hpss import StreamingHPSS
+from app.audio.onset_detector import SpectralFluxOnsetDetector
+from app.audio.key_detection import StreamingKeyEstimator
+from app.audio.spectrum import FrameSpectrum
+from app.audio.analysis_worker import LiveAnalysisWorker, OverloadPolicy
 from app.lighting.dynamics import DynamicsController, DynamicsParams
 from app.lighting.pulse import PulseTracker
+from app.lighting.strobe import BeatPrediction
 from app.mapping.emotion import MoodEngine
 from app.mapping.color import ColorEngine
 from app.audio.tempo import ResonatorBPM
 from app.utils.time_window import TimeWindow
+from app.utils.smoothing import frames_for
+from app.utils.profiling import StageProfiler
+from app.utils.stage_scheduler import StageScheduler
 
 class LiveAnalyzer:
-    def __init__(self, fps: float = 30.0):
+    def __init__(
+        self,
+        fps: float = 30.0,
+        overload_policy: OverloadPolicy = OverloadPolicy.DROP_OLDEST,
+        profile: bool = False,
+        source: CaptureSource = None,
+    ):
+        """'source' defaults to WASAPI loopback; pass a FileReplaySource to run without capture hardware."""
         self.fps = fps
-        self.p_audio = pyaudio.PyAudio()
+        self.source = source
+        self.overload_policy = overload_policy
+        
+        # Per-stage timings (no-op unless enabled); query get_profile() or dump_profile()
+        self.profiler = StageProfiler(fps, enabled=profile)
+        # (ring position of the last captured block, its capture time, clock to compare against)
+        self._capture_mark = (0, 0.0, None)
+        # (latest FrameAnalysis, capture time of its newest sample, clock), for mark_presented()
+        self._latest_capture = (None, 0.0, None)
+        self._presented = None
         self.is_running = False
         
         # We need a large buffer for MIR algorithms to see 'history' (at least 2 seconds)
         # But we only feed 'new' chunks in periodically to maintain low latency.
         self.sample_rate = 44100
         self.chunk_size = 2048 # ~46ms at 44.1kHz
-        self.audio_buffer = np.zeros(self.sample_rate * 3) # 3 seconds of rolling audio
+        self.history_sec = 3
+        self.audio_ring = AudioRingBuffer(self.sample_rate * self.history_sec) # 3 seconds of rolling audio
+        self._mono_scratch = np.zeros(self.chunk_size, dtype=np.float32)
         
         self.latest_analysis = None
-        self.process_thread = None
+        self.latest_beat = None  # BeatPrediction of the next beat (perf_counter clock), once the beat clock runs
+        self.on_frame = None  # Optional hook, called with every FrameAnalysis (on the worker thread)
+        self.worker = None
+        
+        # Multi-rate stages: loudness, onset, bands, dynamics and the beat clock run every frame;
+        # slowly changing outputs are recomputed less often and held in between
+        self.scheduler = StageScheduler(self.fps)
+        mood_every = self.scheduler.add("mood_color", rate_hz=self.fps / 2)  # Every other frame
+        self.scheduler.add("tempo_estimate", rate_hz=2.0)
+        self.scheduler.add("key", rate_hz=2.0)
+        # Band energies (low, mid, high) summed since the last mood update, and the frame count
+        self._band_sum = np.zeros(3)
+        self._band_frames = 0
+        self._mood = None  # Held (MoodState, rgb) between mood updates
         
         # Setup Engines (like in player_backend)
-        params = DynamicsParams(enter_hold_frames=int(3 * self.fps), drop_boost_frames=int(0.5 * self.fps))
+        params = DynamicsParams.for_fps(self.fps)
         
         # Load Memory for ML Baselines
         from app.audio.memory_bank import SongMemoryBank
@@ -42,144 +80,234 @@ class LiveAnalyzer:
         
         self.dyn = DynamicsController(params)
         self.pulse = PulseTracker(fps=self.fps, onset_peak_th=0.60, refractory_s=0.10, decay_s=0.18)
-        self.mood_engine = MoodEngine(global_baselines=global_baselines)
-        self.color_engine = ColorEngine(fps=self.fps)
-        self.normalizer = AdaptiveNormalizer()
+        # Mood and color run at the mood stage's rate, so their time constants are converted for it
+        self.mood_engine = MoodEngine(global_baselines=global_baselines, fps=self.fps / mood_every)
+        self.color_engine = ColorEngine(fps=self.fps / mood_every)
+        self.normalizer = AdaptiveNormalizer(fps=self.fps)
         self.tempo_est = ResonatorBPM(fps=self.fps)
         
+        # Harmonic/percussive split carried across frames (one new STFT column per hop)
+        self.hpss = StreamingHPSS()
+        # Sub-frame onsets from the same STFT columns, for the beat clock
+        self.onset_detector = SpectralFluxOnsetDetector(self.sample_rate, n_fft=self.hpss.n_fft, hop=self.hpss.hop)
+        self.latest_onsets = []  # OnsetEvents confirmed by the last analyzed frame (ring positions)
+        # Rolling key from the same columns (chroma accumulated every frame, key re-estimated at 2 Hz)
+        self.key_est = StreamingKeyEstimator(self.sample_rate, n_fft=self.hpss.n_fft, hop=self.hpss.hop)
+        
         self.instant_b = TimeWindow(1)
-        self.short_b = TimeWindow(10)
+        self.short_b = TimeWindow(frames_for(0.5, self.fps))
         
         self.frame_count = 0
-        self.song_key = "C Maj" # Default
-
-    def get_default_wasapi_device(self):
-        """Finds the default WASAPI loopback device for capturing 'What U Hear'."""
-        try:
-            wasapi_info = self.p_audio.get_host_api_info_by_type(pyaudio.paWASAPI)
-        except OSError:
-            print("Looks like WASAPI is not available on the system. Exiting...")
-            return None
-            
-        default_speakers = self.p_audio.get_device_info_by_index(wasapi_info["defaultOutputDevice"])
-        
-        if not default_speakers["isLoopbackDevice"]:
-            for loopback in self.p_audio.get_loopback_device_info_generator():
-                if default_speakers["name"] in loopback["name"]:
-                    print(f"Found loopback device: {loopback['name']}")
-                    return loopback
-        
-        print(f"Default loopback found: {default_speakers['name']}")
-        return default_speakers
+        self._skipped_samples = 0  # Dropped audio not yet counted as whole elapsed frames
+        self.song_key = self.key_est.key # "C Maj" until the first estimate
 
     def start(self):
         if self.is_running: return
         
-        self.device = self.get_default_wasapi_device()
-        if not self.device:
-            raise Exception("No WASAPI Loopback device found. Ensure audio is playing through speakers.")
+        if self.source is None:
+            self.source = WasapiLoopbackSource()
             
-        self.sample_rate = int(self.device["defaultSampleRate"])
-        self.chunk_size = int(self.sample_rate / self.fps) # Match chunk size perfectly to desired FPS
-
         try:
-            self.stream = self.p_audio.open(
-                format=pyaudio.paFloat32,
-                channels=self.device["maxInputChannels"],
-                rate=self.sample_rate,
-                input=True,
-                frames_per_buffer=self.chunk_size,
-                input_device_index=self.device["index"],
-                stream_callback=self._audio_callback
-            )
+            self.source.open(self._prepare, self._audio_callback, drain=self._drain)
             self.is_running = True
             print("Live Audio Tracking Started...")
         except Exception as e:
             print(f"Failed to open audio stream: {e}")
+            if self.worker is not None:
+                self.worker.stop()
+            raise
+
+    def _prepare(self, sample_rate: int) -> int:
+        """Called by the source once its sample rate is known; returns the chunk size."""
+        self.sample_rate = int(sample_rate)
+        self.chunk_size = int(self.sample_rate / self.fps) # Match chunk size perfectly to desired FPS
+        
+        # Preallocate everything the callback touches (history at the device rate, down-mix scratch)
+        self.audio_ring = AudioRingBuffer(self.sample_rate * self.history_sec)
+        self._mono_scratch = np.zeros(self.chunk_size, dtype=np.float32)
+        self.hpss.reset()
+        self.onset_detector = SpectralFluxOnsetDetector(self.sample_rate, n_fft=self.hpss.n_fft, hop=self.hpss.hop)
+        self.key_est = StreamingKeyEstimator(self.sample_rate, n_fft=self.hpss.n_fft, hop=self.hpss.hop)
+        
+        # Analysis runs on its own thread; the callback only feeds the ring
+        self.worker = LiveAnalysisWorker(
+            self.audio_ring, self.chunk_size, self.fps, self._analyze_chunk, policy=self.overload_policy
+        )
+        self.worker.start()
+        return self.chunk_size
+
+    def _drain(self):
+        """Lets faster-than-real-time sources wait for the analysis worker."""
+        self.worker.wait_idle()
 
     def stop(self):
         self.is_running = False
-        if hasattr(self, 'stream') and self.stream.is_active():
-            self.stream.stop_stream()
-            self.stream.close()
+        if self.source is not None:
+            self.source.close()
+        if self.worker is not None:
+            self.worker.stop()
+            print(f"Live analysis stats: {self.worker.stats.report()}")
+        if self.profiler.enabled:
+            print(self.profiler.report())
 
     def _audio_callback(self, in_data, frame_count, time_info, status):
         """Called by PyAudioWPatch when a new chunk is ready."""
         # Convert bytes to numpy float array
         audio_data = np.frombuffer(in_data, dtype=np.float32)
         
-        # If stereo, average out to mono for Librosa analysis speed
-        if self.device["maxInputChannels"] > 1:
-            audio_data = np.mean(audio_data.reshape(-1, self.device["maxInputChannels"]), axis=1)
+        # If stereo, average out to mono for Librosa analysis speed (into the preallocated scratch)
+        channels = self.source.channels
+        if channels > 1:
+            if frame_count > len(self._mono_scratch):
+                self._mono_scratch = np.zeros(frame_count, dtype=np.float32)
+            mono = self._mono_scratch[:frame_count]
+            np.mean(audio_data.reshape(-1, channels), axis=1, out=mono)
+            audio_data = mono
+            
+        # Remember when this block was captured (capture-to-output latency, beat prediction timestamps)
+        adc_time = time_info.get("input_buffer_adc_time", 0.0) if time_info else 0.0
+        if adc_time > 0.0:
+            self._capture_mark = (self.audio_ring.total_written, adc_time, self.source.get_time)
+        else:
+            # Host API without stream timestamps: fall back to the callback arrival time
+            arrival = time.perf_counter() - frame_count / self.sample_rate
+            self._capture_mark = (self.audio_ring.total_written, arrival, time.perf_counter)
             
-        # Shift old data out, put new data in
-        self.audio_buffer = np.roll(self.audio_buffer, -len(audio_data))
-        self.audio_buffer[-len(audio_data):] = audio_data
+        # Append to the rolling history (no allocation, unlike np.roll)
+        self.audio_ring.write(audio_data)
         
-        # Analyze the latest frame chunk!
-        self._analyze_chunk(audio_data)
+        # Hand off to the analysis worker; never analyze on the driver's thread
+        self.worker.notify()
         
-        return (in_data, pyaudio.paContinue)
+        return (in_data, PA_CONTINUE)
         
-    def _analyze_chunk(self, frame: np.ndarray):
-        """Runs the MIR math on a single frame chunk."""
-        self.frame_count += 1
+    def get_stats(self):
+        """Dropped/late frame counters of the analysis worker (None before start)."""
+        return self.worker.stats if self.worker is not None else None
         
+    def get_profile(self) -> dict:
+        """Per-stage p50/p95/p99, budget overruns and capture-to-output latency (see mark_presented) so far."""
+        return self.profiler.snapshot()
+        
+    def dump_profile(self, path: str):
+        self.profiler.dump(path)
+        
+    def _analyze_chunk(self, frame: np.ndarray, window_end: int, light: bool = False, n_frames: int = 1, skipped: int = 0):
+        """
+        Runs the MIR math on a single frame chunk (on the worker thread).
+        'light' skips HPSS under overload; 'n_frames' > 1 when a backlog was coalesced
+        (then 'frame' holds all of it);
+        'skipped' samples were dropped right before this frame (see AnalyzeFn).
+        """
+        prof = self.profiler
+        sched = self.scheduler
+        frame_start = prof.start_frame()
+        # Frames of real time since the last step: this step's plus any dropped before it,
+        # so the frame clock, the scheduler and the beat clock don't fall behind after a drop
+        self._skipped_samples += skipped
+        elapsed = n_frames + self._skipped_samples // self.chunk_size
+        self._skipped_samples %= self.chunk_size
+        self.frame_count += elapsed
+        sched.tick(elapsed)
+        
+        # A coalesced backlog streams through HPSS, onsets and key whole (their histories stay
+        # continuous); the per-frame engines keep their frame size and see only its newest frame
+        raw = frame
+        frame = raw[-self.chunk_size:]
         frame = frame - np.mean(frame) # Remove DC offset
         
-        # FIX: Librosa HPSS requires > 2048 samples. We process a slightly 
-        # larger window from the buffer and take the latest frame length
-        analysis_window = 4096
-        window = self.audio_buffer[-analysis_window:]
-        window = window - np.mean(window)
-        window_h, window_p = librosa.effects.hpss(window)
-        
-        # Extract just the current frame's portion of the separated audio
-        frame_h = window_h[-len(frame):]
-        frame_p = window_p[-len(frame):]
-        
-        # Loudness
-        rms = rms_loudness(frame)
-        b = self.normalizer.normalize(rms, frame=frame)
-        self.instant_b.push(b)
-        self.short_b.push(b)
-        ib = self.instant_b.latest()
-        sb = self.short_b.average()
-        
-        # Onset
-        o = normalize_onset(onset_strength(frame_p))
-        
-        # Bands
-        bands = spectral_energy_bands(frame, self.sample_rate, frame_h, frame_p)
-        
-        # Dynamics Engine
-        st = self.dyn.update(instant_brightness=ib, short_brightness=sb, onset=o)
-        if st.minimal_mode:
-            final = 0.90 * sb + 0.10 * ib
-        else:
-            final = 0.70 * sb + 0.30 * ib
-        if st.drop_boost_frames_left > 0:
-            final = max(final, ib)
-        final = max(0.0, min(1.0, final))
+        # Streaming HPSS: output lags the input by hpss.latency samples (~46 ms)
+        with prof.stage("hpss"):
+            if light or skipped:
+                # Skipped or dropped audio leaves a gap in the STFT history and the flux reference
+                self.hpss.reset()
+                self.onset_detector.skip()
+            if light:
+                frame_h = frame_p = frame
+                self.latest_onsets = []
+            else:
+                # The STFT runs on the continuous signal: per-frame DC steps would show up as onsets
+                frame_h, frame_p = self.hpss.process(raw)
+                frame_h = frame_h[-len(frame):] - np.mean(frame_h[-len(frame):])
+                frame_p = frame_p[-len(frame):] - np.mean(frame_p[-len(frame):])
+        
+        # Onset events at STFT-hop resolution, from the columns HPSS just computed
+        with prof.stage("onsets"):
+            if not light:
+                ends = (window_end - len(raw)) + np.asarray(self.hpss.column_ends)
+                self.latest_onsets = self.onset_detector.process_columns(self.hpss.columns, ends)
+            # The beat clock follows the kick band (hats would pull it onto the off-beats)
+            events = [((e.position - window_end) / self.sample_rate, e.bands[0]) for e in self.latest_onsets]
+        
+        with prof.stage("key"):
+            if not light:
+                self.key_est.update(self.hpss.columns)
+            if sched.due("key"):
+                self.song_key = self.key_est.estimate()
+        
+        with prof.stage("features"):
+            # One shared spectrum per frame (FFTs computed once, on first use)
+            spectrum = FrameSpectrum(frame, self.sample_rate, frame_harmonic=frame_h)
+            
+            # Loudness
+            rms = rms_loudness(frame)
+            b = self.normalizer.normalize(rms, spectrum=spectrum)
+            self.instant_b.push(b)
+            self.short_b.push(b)
+            ib = self.instant_b.latest()
+            sb = self.short_b.average()
+            
+            # Onset, from the percussive part: it lags the mix (and brightness) by hpss.latency,
+            # ~46 ms (about a frame at 20 fps). The beat clock is unaffected: it uses the onset
+            # events, placed at their exact stream positions.
+            o = normalize_onset(onset_strength(frame_p))
+            
+            # Bands, every frame: they are averaged into the next mood update (below)
+            bands = spectral_energy_bands(frame, self.sample_rate, frame_h, frame_p, spectrum=spectrum)
+        
+        with prof.stage("dynamics"):
+            # Dynamics Engine
+            st = self.dyn.update(instant_brightness=ib, short_brightness=sb, onset=o)
+            if st.minimal_mode:
+                final = 0.90 * sb + 0.10 * ib
+            else:
+                final = 0.70 * sb + 0.30 * ib
+            if st.drop_boost_frames_left > 0:
+                final = max(final, ib)
+            final = max(0.0, min(1.0, final))
         
-        # Pulse & Tempo
-        pstate = self.pulse.update(o)
-        tempo_state = self.tempo_est.update(o)
+        # Tempo & Pulse (the beat clock is phase-locked to the resonator's period, corrected at onset event times)
+        with prof.stage("tempo"):
+            tempo_state = self.tempo_est.update(o, estimate=sched.due("tempo_estimate"))
+            pstate = self.pulse.update(o, period_s=60.0 / tempo_state.bpm, frames=elapsed, events=events)
+            self._predict_beat(pstate, window_end)
         
         base_level = final * 0.80
         punch = o * 0.50
         rhythm = pstate.pulse * 0.15
         final_pulsed = max(0.0, min(1.0, base_level + punch + rhythm))
         
-        # Mood & Color
-        mood = self.mood_engine.update(
-            loudness=b,
-            onset=o,
-            pulse=pstate.pulse,
-            density=tempo_state.density,
-            band_energy=bands
-        )
-        rgb = self.color_engine.map_mood_to_color(mood, song_key=self.song_key, bpm_stability=tempo_state.confidence)
+        # Mood & Color (half rate). The band balance is averaged over the frames since the
+        # last update: computing bands only on mood frames would alias alternating kick/hat
+        # frames (a visible palette shift). Loudness and onset are sampled, since the
+        # mood's onset thresholds expect single-frame values.
+        self._band_sum += (bands[PitchRegister.LOW], bands[PitchRegister.MID], bands[PitchRegister.HIGH])
+        self._band_frames += 1
+        if sched.due("mood_color") or self._mood is None:
+            low, mid, high = self._band_sum / self._band_frames
+            with prof.stage("mood_color"):
+                mood = self.mood_engine.update(
+                    loudness=b,
+                    onset=o,
+                    pulse=pstate.pulse,
+                    density=tempo_state.density,
+                    band_energy={PitchRegister.LOW: low, PitchRegister.MID: mid, PitchRegister.HIGH: high}
+                )
+                rgb = self.color_engine.map_mood_to_color(mood, song_key=self.song_key, bpm_stability=tempo_state.confidence)
+            self._mood = (mood, rgb)
+            self._band_sum[:] = 0.0
+            self._band_frames = 0
+        mood, rgb = self._mood
         
         self.latest_analysis = FrameAnalysis(
             time_sec=self.frame_count / self.fps,
@@ -194,6 +322,50 @@ class LiveAnalyzer:
             key=self.song_key,
             debug_data=mood.debug_data
         )
+        if prof.enabled:
+            # Capture time of the newest analyzed sample, on the stream clock when available
+            block_pos, block_time, clock = self._capture_mark
+            sample_time = block_time + (window_end - 1 - block_pos) / self.sample_rate
+            self._latest_capture = (self.latest_analysis, sample_time, clock)
+        if self.on_frame is not None:
+            self.on_frame(self.latest_analysis)
+        
+        prof.end_frame(frame_start)
+
+    def mark_presented(self, frame: FrameAnalysis):
+        """
+        Call where a frame is actually output (UI paint, light write): records the
+        capture-to-output latency of its newest sample, once per frame, while profiling.
+        A frame already replaced by a newer analysis when it is marked is not counted.
+        """
+        if not self.profiler.enabled or frame is self._presented:
+            return
+        latest, sample_time, clock = self._latest_capture
+        if frame is not latest or clock is None:
+            return
+        self._presented = frame
+        self.profiler.record_latency(clock() - sample_time)
+
+    def _predict_beat(self, pstate, clock_pos: int):
+        """
+        Turns the pulse tracker's next-beat offset into a perf_counter timestamp.
+        'clock_pos' is the ring position the beat clock refers to (the frame end,
+        since onset events are placed at their exact positions).
+        """
+        block_pos, block_time, clock = self._capture_mark
+        if clock is None or pstate.next_beat_in <= 0.0:
+            return
+        clock_time = block_time + (clock_pos - block_pos) / self.sample_rate
+        now = time.perf_counter()
+        self.latest_beat = BeatPrediction(
+            time=now - (clock() - clock_time) + pstate.next_beat_in,
+            period=pstate.beat_period,
+            phase=pstate.beat_phase,
+            confidence=pstate.phase_confidence,
+        )
 
     def get_latest_frame(self) -> FrameAnalysis:
         return self.latest_analysis
+
+    def get_beat_prediction(self) -> BeatPrediction:
+        return self.latest_beat
@@ -1,5 +1,9 @@
 import numpy as np
 
+from app.audio.spectrum import FrameSpectrum, spectrum_plan
+from app.utils.smoothing import REFERENCE_FPS, decay_factor, frames_for, time_constant
+from app.utils.snapshot import Snapshottable
+
 
 def rms_loudness(frame: np.ndarray) -> float:
     """
@@ -10,11 +14,43 @@ def rms_loudness(frame: np.ndarray) -> float:
         x = x.mean(axis=1)
     return float(np.sqrt(np.mean(x * x) + 1e-12))
 
-class NoiseFilter:
+
+def rms_loudness_frames(frames: np.ndarray) -> np.ndarray:
+    """
+    Batch version of rms_loudness() over a 2-D (n_frames, frame_size) view.
+    """
+    return np.sqrt(np.mean(frames * frames, axis=1) + 1e-12)
+
+
+def spectral_flux_frames(frames: np.ndarray, prev_spectrum: np.ndarray = None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Batch version of the NoiseFilter spectral flux over a 2-D (n_frames, frame_size) view.
+    'prev_spectrum' carries the last spectrum across consecutive blocks.
+    Returns (flux per frame, last spectrum).
+    """
+    frame_size = frames.shape[1]
+    spectrum = np.abs(np.fft.rfft(frames * spectrum_plan(frame_size).window, axis=1))
+    n_bins = spectrum.shape[1] // 2
+
+    low = spectrum[:, :n_bins]
+    flux = np.zeros(len(frames))
+    if len(frames) > 1:
+        flux[1:] = np.abs(np.diff(low, axis=0)).sum(axis=1)
+    if len(frames) > 0:
+        if prev_spectrum is not None:
+            flux[0] = np.abs(low[0] - prev_spectrum[:n_bins]).sum()
+        prev_spectrum = spectrum[-1]
+
+    flux /= (frame_size / 512.0)
+    return flux, prev_spectrum
+
+class NoiseFilter(Snapshottable):
     """
     Robust Noise Gate with Spectral Flux Analysis.
     Uses FFT to distinguish 'Quiet Music' (Dynamic) from 'Loud Noise' (Static).
     """
+    # Thresholds included: calibration moves them
+    STATE_FIELDS = ("threshold_on", "threshold_off", "min_music_rms", "prev_spectrum", "is_active", "_hold_counter")
     def __init__(self, threshold_on: float = 0.005, threshold_off: float = 0.003, hold_frames: int = 5):
         self.threshold_on = threshold_on   # High RMS Threshold (Loud Music)
         self.threshold_off = threshold_off # RMS Threshold for closing
@@ -65,20 +101,23 @@ class NoiseFilter:
         
         print(f"  -> New Thresholds: ON={self.threshold_on:.4f}, OFF={self.threshold_off:.4f}")
 
-    def update(self, rms: float, frame: np.ndarray = None) -> float:
+    def update(self, rms: float, frame: np.ndarray = None, flux: float = None, spectrum: FrameSpectrum = None) -> float:
         """
         Returns filtered RMS. 
-        Requires 'frame' for Spectral Analysis!
+        Requires 'frame' (or its shared FrameSpectrum) for Spectral Analysis,
+        or a precomputed 'flux' (see spectral_flux_frames) from the batch pipeline.
         """
         
         # 1. Spectral Flux Calculation (Detect Dynamic Change)
         current_flux = 0.0
-        if frame is not None and frame.size > 0:
-            # Normalize frame for FFT
-            # Hanning window to reduce leakage
-            windowed = frame * np.hanning(len(frame))
-            # Real FFT
-            spectrum = np.abs(np.fft.rfft(windowed))
+        if flux is None and spectrum is None and frame is not None and frame.size > 0:
+            spectrum = FrameSpectrum(frame)
+        if flux is not None:
+            current_flux = flux
+        elif spectrum is not None:
+            # Hanning-windowed magnitude spectrum (reduces leakage)
+            frame_size = spectrum.plan.frame_size
+            spectrum = spectrum.windowed_magnitude
             
             if self.prev_spectrum is not None:
                 # Euclidean distance between spectra (Spectral Flux)
@@ -90,7 +129,7 @@ class NoiseFilter:
                 current_flux = np.sum(np.abs(diff))
                 
                 # Normalize flux by frame size roughly to keep it consistent
-                current_flux /= (len(frame) / 512.0)
+                current_flux /= (frame_size / 512.0)
                 
             self.prev_spectrum = spectrum
 
@@ -131,14 +170,27 @@ class NoiseFilter:
 
 
 
-class AdaptiveNormalizer:
-    def __init__(self, decay_rate: float = 0.01):
+class AdaptiveNormalizer(Snapshottable):
+    """
+    Gated, self-scaling loudness -> brightness (0..1). Time constants are in seconds and
+    converted for 'fps': the peak ceiling decays with 'ceiling_tau_s', the output falls
+    by 'release_per_s' per second, and the gate holds open for 'hold_s' after the signal drops.
+    """
+    STATE_FIELDS = ("filter", "max_rms", "current_value")
+
+    def __init__(
+        self,
+        fps: float = REFERENCE_FPS,
+        ceiling_tau_s: float = time_constant(0.001),
+        release_per_s: float = 0.24,
+        hold_s: float = 2.0,
+    ):
         # We now use the NoiseFilter for gating.
         # DYNAMIC CONTRAST TUNING:
         # 1. Intro Sensitivity: Lowered Gate ON to 0.060 to catch soft piano.
         #    Lowered Flux Floor to 0.056 to trust Spectrum Analysis more.
         # 2. Drop Headroom: Removed static boost to prevent "flooding".
-        self.filter = NoiseFilter(threshold_on=0.060, threshold_off=0.058, hold_frames=40)
+        self.filter = NoiseFilter(threshold_on=0.060, threshold_off=0.058, hold_frames=frames_for(hold_s, fps))
         # Update quiet music detection inside filter manually if needed, 
         # but better to instantiate it correctly.
         self.filter.min_music_rms = 0.056
@@ -146,7 +198,10 @@ class AdaptiveNormalizer:
         # Normalization floor
         self.min_rms = 0.058
         self.max_rms = 0.15  
-        self.decay_rate = decay_rate
+        self.ceiling_decay = decay_factor(ceiling_tau_s, fps)
+        # Slow Release (Decay) for smooth fade out. User requested 15-20% faster fade:
+        # 0.01 -> 0.012 per frame at 20 fps
+        self.release_per_frame = release_per_s / fps
         
         # Output Smoothing State
         self.current_value = 0.0
@@ -158,10 +213,10 @@ class AdaptiveNormalizer:
     def calibrate(self, frames: list[np.ndarray]):
         self.filter.calibrate_from_frames(frames)
 
-    def normalize(self, rms: float, frame: np.ndarray = None) -> float:
+    def normalize(self, rms: float, frame: np.ndarray = None, flux: float = None, spectrum: FrameSpectrum = None) -> float:
         # 1. Apply Noise Filter (Hysteresis Gate)
         # Now filtering requires the FRAME to check for Spectral Flux (Music) vs Static (Noise)
-        filtered_rms = self.filter.update(rms, frame)
+        filtered_rms = self.filter.update(rms, frame, flux=flux, spectrum=spectrum)
         
         target_val = 0.0
         
@@ -171,7 +226,7 @@ class AdaptiveNormalizer:
             if filtered_rms > self.max_rms:
                 self.max_rms = filtered_rms
             else:
-                self.max_rms -= self.max_rms * self.decay_rate * 0.1
+                self.max_rms *= self.ceiling_decay
                 
             self.max_rms = max(self.max_rms, self.min_max_rms)
             
@@ -194,9 +249,7 @@ class AdaptiveNormalizer:
             self.current_value = target_val
         else:
             # Slow Release (Decay) for smooth fade out
-            # User requested 15-20% faster fade.
-            # 0.01 -> 0.012
-            self.current_value -= 0.012
+            self.current_value -= self.release_per_frame
             
         self.current_value = max(0.0, min(1.0, self.current_value))
         
@@ -49,67 +49,71 @@ class SongMemoryBank:
         print(f"Memory Bank: Digesting {os.path.basename(csv_filepath)} before deletion...")
         
         try:
-            bass_exertions = []
-            mid_exertions = []
-            high_exertions = []
-            arousals = []
-            valences = []
-            dominance = []
+            columns = {"Exert_L": [], "Exert_M": [], "Exert_H": [], "Arousal": [], "Valence": [], "Dominance": []}
+            defaults = {"Exert_L": 1.0, "Exert_M": 1.0, "Exert_H": 1.0, "Arousal": 0.5, "Valence": 0.5, "Dominance": 0.66}
             
             with open(csv_filepath, 'r') as f:
                 reader = csv.DictReader(f)
                 for row in reader:
-                    bass_exertions.append(float(row.get('Exert_L', 1.0)))
-                    mid_exertions.append(float(row.get('Exert_M', 1.0)))
-                    high_exertions.append(float(row.get('Exert_H', 1.0)))
-                    arousals.append(float(row.get('Arousal', 0.5)))
-                    valences.append(float(row.get('Valence', 0.5)))
-                    dominance.append(float(row.get('Dominance', 0.66)))
-                    
-            if not bass_exertions: return
-            
-            # Compute song averages
-            # We ignore silent frames where exertion is 0.0 to find true song energy
-            song_avg_bass = np.mean([x for x in bass_exertions if x > 0.01]) if max(bass_exertions) > 0.01 else 1.0
-            song_avg_mid = np.mean([x for x in mid_exertions if x > 0.01]) if max(mid_exertions) > 0.01 else 1.0
-            song_avg_high = np.mean([x for x in high_exertions if x > 0.01]) if max(high_exertions) > 0.01 else 1.0
-            song_avg_arousal = np.mean(arousals)
-            song_avg_valence = np.mean(valences)
-            
-            # Machine Learning Optimizer: Evaluate Variance and Dominance Center
-            song_avg_dominance = np.mean([x for x in dominance if x > 0.0]) if len(dominance) > 0 else 0.66
-            valence_std = np.std(valences) if len(valences) > 0 else 0.35
-            
-            # If standard deviation is too low (colors not changing enough), we bump the multiplier
-            # Target std for valence is around ~0.35 for a very dynamic show
-            target_std = 0.35
-            if valence_std > 0.01:
-                 # Calculate ratio needed to hit target, bounded for safety
-                 ideal_spread = (target_std / valence_std) * self.model.get("valence_spread_multiplier", 1.5)
-                 ideal_spread = max(1.0, min(3.0, ideal_spread))  # Keep it sane
-            else:
-                 ideal_spread = 1.5
-            
-            # Update global model using momentum
-            lr = self.model["learning_rate"]
-            
-            # Smoothly transition the global expectations
-            self.model["global_avg_bass_exertion"] += (song_avg_bass - self.model["global_avg_bass_exertion"]) * lr
-            self.model["global_avg_mid_exertion"] += (song_avg_mid - self.model["global_avg_mid_exertion"]) * lr
-            self.model["global_avg_high_exertion"] += (song_avg_high - self.model["global_avg_high_exertion"]) * lr
-            
-            self.model["typical_arousal"] += (song_avg_arousal - self.model["typical_arousal"]) * lr
-            self.model["typical_valence"] += (song_avg_valence - self.model["typical_valence"]) * lr
-            
-            # Update physical algorithms
-            self.model["global_dominance_anchor"] = self.model.get("global_dominance_anchor", 0.66) + (song_avg_dominance - self.model.get("global_dominance_anchor", 0.66)) * lr
-            self.model["valence_spread_multiplier"] = self.model.get("valence_spread_multiplier", 1.5) + (ideal_spread - self.model.get("valence_spread_multiplier", 1.5)) * lr
-            
-            self.model["total_songs_digested"] += 1
-            
-            self._save_model()
-            print(f"Memory Bank: Digestion complete. Updating global baseline expectations.")
-            print(f"   -> New Anchor: {self.model['global_dominance_anchor']:.3f} | New Spread: {self.model['valence_spread_multiplier']:.3f}x")
-            
+                    for name, values in columns.items():
+                        values.append(float(row.get(name, defaults[name])))
+                        
+            self.digest_columns({name: np.asarray(values) for name, values in columns.items()})
         except Exception as e:
             print(f"MemoryBank failed to digest log: {e}")
+
+    def digest_columns(self, columns: dict):
+        """
+        Updates the global model from whole per-frame columns of one song
+        ('Exert_L', 'Exert_M', 'Exert_H', 'Arousal', 'Valence', 'Dominance' arrays).
+        """
+        bass_exertions = columns["Exert_L"]
+        mid_exertions = columns["Exert_M"]
+        high_exertions = columns["Exert_H"]
+        valences = columns["Valence"]
+        dominance = columns["Dominance"]
+        
+        if len(bass_exertions) == 0: return
+        
+        # Compute song averages
+        # We ignore silent frames where exertion is 0.0 to find true song energy
+        song_avg_bass = np.mean(bass_exertions[bass_exertions > 0.01]) if bass_exertions.max() > 0.01 else 1.0
+        song_avg_mid = np.mean(mid_exertions[mid_exertions > 0.01]) if mid_exertions.max() > 0.01 else 1.0
+        song_avg_high = np.mean(high_exertions[high_exertions > 0.01]) if high_exertions.max() > 0.01 else 1.0
+        song_avg_arousal = np.mean(columns["Arousal"])
+        song_avg_valence = np.mean(valences)
+        
+        # Machine Learning Optimizer: Evaluate Variance and Dominance Center
+        song_avg_dominance = np.mean(dominance[dominance > 0.0]) if dominance.max() > 0.0 else 0.66
+        valence_std = np.std(valences)
+        
+        # If standard deviation is too low (colors not changing enough), we bump the multiplier
+        # Target std for valence is around ~0.35 for a very dynamic show
+        target_std = 0.35
+        if valence_std > 0.01:
+             # Calculate ratio needed to hit target, bounded for safety
+             ideal_spread = (target_std / valence_std) * self.model.get("valence_spread_multiplier", 1.5)
+             ideal_spread = max(1.0, min(3.0, ideal_spread))  # Keep it sane
+        else:
+             ideal_spread = 1.5
+        
+        # Update global model using momentum
+        lr = self.model["learning_rate"]
+        
+        # Smoothly transition the global expectations
+        self.model["global_avg_bass_exertion"] += (song_avg_bass - self.model["global_avg_bass_exertion"]) * lr
+        self.model["global_avg_mid_exertion"] += (song_avg_mid - self.model["global_avg_mid_exertion"]) * lr
+        self.model["global_avg_high_exertion"] += (song_avg_high - self.model["global_avg_high_exertion"]) * lr
+        
+        self.model["typical_arousal"] += (song_avg_arousal - self.model["typical_arousal"]) * lr
+        self.model["typical_valence"] += (song_avg_valence - self.model["typical_valence"]) * lr
+        
+        # Update physical algorithms
+        self.model["global_dominance_anchor"] = self.model.get("global_dominance_anchor", 0.66) + (song_avg_dominance - self.model.get("global_dominance_anchor", 0.66)) * lr
+        self.model["valence_spread_multiplier"] = self.model.get("valence_spread_multiplier", 1.5) + (ideal_spread - self.model.get("valence_spread_multiplier", 1.5)) * lr
+        
+        self.model["total_songs_digested"] += 1
+        
+        self._save_model()
+        print(f"Memory Bank: Digestion complete. Updating global baseline expectations.")
+        print(f"   -> New Anchor: {self.model['global_dominance_anchor']:.3f} | New Spread: {self.model['valence_spread_multiplier']:.3f}x")
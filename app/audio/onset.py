@@ -26,3 +26,17 @@ def normalize_onset(v: float, floor: float = 0.032, ceiling: float = 0.045) -> f
     y = (v - floor) / (ceiling - floor)
     return float(max(0.0, min(1.0, y)))
 
+
+
+def onset_strength_frames(frames: np.ndarray) -> np.ndarray:
+    """
+    Batch version of onset_strength() over a 2-D (n_frames, frame_size) view.
+    """
+    dx = np.diff(frames, axis=1)
+    high_freq_content = np.mean(np.abs(dx), axis=1)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return high_freq_content + (rms * 0.6) + 1e-12
+
+
+def normalize_onset_frames(v: np.ndarray, floor: float = 0.032, ceiling: float = 0.045) -> np.ndarray:
+    return np.clip((v - floor) / (ceiling - floor), 0.0, 1.0)
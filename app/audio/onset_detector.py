@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+from scipy.signal import get_window
+
+# Flux bands (Hz): kick, snare body, snare crack/claps, hats/cymbals
+ONSET_BANDS = ((30.0, 150.0), (150.0, 1000.0), (1000.0, 5000.0), (5000.0, 16000.0))
+
+
+@dataclass(frozen=True)
+class OnsetEvent:
+    position: float  # stream position in samples (sub-hop, fractional)
+    strength: float  # 0..1 flux in its strongest band, relative to that band's recent peak
+    bands: tuple = ()  # 0..1 flux per band (as 'strength'), low to high
+
+
+class SpectralFluxOnsetDetector:
+    """
+    Multi-band spectral-flux onset detector at STFT-hop resolution (512 samples,
+    ~12 ms at 44.1 kHz) instead of one value per lighting frame.
+
+    Per column: log-compressed magnitudes, half-wave rectified difference to the
+    previous column, summed per band and normalized by each band's decaying peak
+    (so a lone kick or a lone hat both register). The mean over bands is the
+    novelty curve. A column is an onset when it is a local maximum above an
+    adaptive threshold (median of the last 'threshold_sec' plus 'delta', so the
+    first 'threshold_sec' after a reset report nothing); its time is refined
+    with a parabolic fit over the neighbouring columns.
+
+    Columns come from a shared STFT (StreamingHPSS.columns) via process_columns(),
+    or from a small built-in STFT via process_audio(). Decisions need one column of
+    look-ahead, so an onset is reported one hop after its peak.
+    """
+    def __init__(
+        self,
+        sample_rate: int,
+        n_fft: int = 2048,
+        hop: int = 512,
+        bands=ONSET_BANDS,
+        compression: float = 100.0,
+        threshold_sec: float = 0.5,
+        threshold_ratio: float = 1.5,
+        delta: float = 0.05,
+        min_gap_sec: float = 0.03,
+        peak_decay_sec: float = 10.0,
+        min_flux_per_bin: float = 0.5,
+    ):
+        self.sample_rate = sample_rate
+        self.n_fft = n_fft
+        self.hop = hop
+        self.compression = compression
+        self.threshold_ratio = threshold_ratio
+        self.delta = delta
+        self.min_gap = min_gap_sec * sample_rate
+
+        freqs = np.fft.rfftfreq(n_fft, d=1.0 / sample_rate)
+        bands = [(lo, hi) for lo, hi in bands if lo < freqs[-1]] # Bands above Nyquist (low sample rates) are dropped
+        edges = [int(np.searchsorted(freqs, lo)) for lo, _ in bands] + [int(np.searchsorted(freqs, bands[-1][1]))]
+        self._band_starts = np.array(edges[:-1])
+        self._band_stop = edges[-1]
+        # Band peaks never drop below this, so background noise is not normalized up to full onsets
+        self._band_floor = min_flux_per_bin * np.maximum(np.diff(edges), 1)
+        self._peak_decay = np.exp(-hop / (peak_decay_sec * sample_rate))
+        self._history_len = max(3, int(round(threshold_sec * sample_rate / hop)))
+        self._window = get_window("hann", n_fft).astype(np.float32)
+        self.reset()
+
+    def reset(self):
+        """Forget the spectral history (after a gap in the audio)."""
+        self._prev_log = None
+        self._band_peak = self._band_floor.astype(np.float64)
+        self._history = np.zeros(self._history_len)
+        self._history_pos = 0
+        self._columns_seen = 0
+        self._recent = []  # Last two (novelty, threshold, column end, band novelty) for the look-ahead
+        self._last_onset = -np.inf
+        # Built-in STFT state (process_audio)
+        self._tail = np.zeros(self.n_fft, dtype=np.float32)
+        self._since_column = 0
+
+    def skip(self):
+        """
+        Audio was skipped: the next column is not compared with the last one seen,
+        and a pending peak is dropped. Thresholds and band peaks are kept.
+        """
+        self._prev_log = None
+        self._recent = []
+
+    def process_audio(self, frame: np.ndarray, frame_end: int) -> list:
+        """Runs the built-in STFT over 'frame' (ending at stream position 'frame_end'); returns new onsets."""
+        frame = np.asarray(frame, dtype=np.float32)
+        first = self.hop - self._since_column
+        ends = np.arange(first, len(frame) + 1, self.hop)
+        x = np.concatenate([self._tail, frame])
+        self._tail = x[-self.n_fft:]
+        self._since_column = len(frame) - ends[-1] if len(ends) else self._since_column + len(frame)
+        if len(ends) == 0:
+            return []
+
+        windows = np.lib.stride_tricks.sliding_window_view(x, self.n_fft)[ends]
+        columns = np.abs(np.fft.rfft(windows * self._window, axis=1))
+        return self.process_columns(columns, frame_end - len(frame) + ends)
+
+    def process_columns(self, columns, column_ends) -> list:
+        """
+        Feeds magnitude columns (n_fft // 2 + 1 bins each) whose windows end at the
+        given stream positions; returns the onsets confirmed by them.
+        """
+        if len(columns) == 0:
+            return []
+        log_mag = np.log1p(self.compression * np.asarray(columns)[:, :self._band_stop])
+        prev = log_mag[:1] if self._prev_log is None else self._prev_log[None, :]
+        flux = np.maximum(np.diff(np.vstack([prev, log_mag]), axis=0), 0.0)
+        band_flux = np.add.reduceat(flux, self._band_starts, axis=1)
+        self._prev_log = log_mag[-1]
+
+        onsets = []
+        for bf, end in zip(band_flux, column_ends):
+            self._band_peak = np.maximum(np.maximum(self._band_peak * self._peak_decay, bf), self._band_floor)
+            band_novelty = bf / self._band_peak
+            novelty = float(np.mean(band_novelty))
+
+            self._history[self._history_pos] = novelty
+            self._history_pos = (self._history_pos + 1) % self._history_len
+            self._columns_seen += 1
+            threshold = self.threshold_ratio * float(np.median(self._history)) + self.delta
+
+            onset = self._pick(novelty)
+            self._recent = (self._recent + [(novelty, threshold, float(end), band_novelty)])[-2:]
+            if onset is not None:
+                onsets.append(onset)
+        return onsets
+
+    def _pick(self, novelty: float):
+        """Decides on the previous column, now that the one after it is known."""
+        if len(self._recent) < 2 or self._columns_seen <= self._history_len:
+            return None # No onsets until the threshold has a full history
+        (before, _, _, _), (peak, threshold, end, band_novelty) = self._recent
+        if not (peak > threshold and peak >= before and peak > novelty):
+            return None
+
+        # Parabolic peak position between the neighbouring columns (in hops)
+        denom = before - 2.0 * peak + novelty
+        offset = 0.5 * (before - novelty) / denom if denom < 0.0 else 0.0
+        # The flux peaks about one hop before the transient reaches the window centre
+        position = end + offset * self.hop - self.n_fft / 2 + self.hop
+        if position - self._last_onset < self.min_gap:
+            return None
+        self._last_onset = position
+        return OnsetEvent(position=position, strength=float(band_novelty.max()), bands=tuple(band_novelty.tolist()))
@@ -0,0 +1,116 @@
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import librosa
+import numpy as np
+
+from app.audio.features import FrameFeatureExtractor, FrameFeatures
+from app.audio.file_source import read_range
+from app.audio.hpss import HPSS_CONTEXT, context_start, hpss_segment
+
+# Segments are at most this long, and at least one per worker when the track allows,
+# so hour-long sets keep every core busy without one worker holding a huge STFT.
+SEGMENT_SEC = 60.0
+MIN_SEGMENT_SEC = 10.0
+
+# Frames before its start that each segment also analyzes (its warm-up lead-in), one more
+# than are compared at the seam: the first lead frame has no previous spectrum for flux.
+SEAM_FRAMES = 4
+
+
+@dataclass
+class SegmentResult:
+    start_frame: int
+    features: FrameFeatures   # Frames [start_frame, end_frame)
+    lead: FrameFeatures       # The SEAM_FRAMES frames before start_frame, as this segment saw them
+    chroma: np.ndarray        # Chroma summed over the segment (without its lead-in)
+    seek: bool = True         # Audio was read by seeking (False: decoded from the file start)
+
+
+def plan_segments(total_frames: int, fps: float, workers: int, segment_sec: float = SEGMENT_SEC) -> List[Tuple[int, int]]:
+    """Splits [0, total_frames) into equal segments: one per worker at least, none longer than segment_sec."""
+    longest = max(1, int(segment_sec * fps))
+    shortest = max(1, int(MIN_SEGMENT_SEC * fps))
+    n = max(workers, -(-total_frames // longest))
+    n = max(1, min(n, total_frames // shortest))
+    bounds = np.linspace(0, total_frames, n + 1).astype(int)
+    return list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+
+
+def analyze_segment(path: str, fps: float, target_sr: int, start_frame: int, end_frame: int, seek: bool = True) -> SegmentResult:
+    """
+    Features of frames [start_frame, end_frame) of a file, from its own audio range:
+    the segment plus its lead-in frames, with HPSS_CONTEXT on each side, so the
+    median filters and flux have the same inputs as in a whole-file pass.
+    Runs in a worker process (module-level, so it pickles under spawn).
+    """
+    frame_size = int(target_sr / fps)
+    lead_frame = max(0, start_frame - SEAM_FRAMES - 1)
+    start, end = lead_frame * frame_size, end_frame * frame_size
+
+    ctx_start = context_start(start)
+    y = read_range(path, ctx_start, end + HPSS_CONTEXT, target_sr, seek=seek)
+    y_harmonic, y_percussive = hpss_segment(y, start - ctx_start, end - ctx_start)
+    features = FrameFeatureExtractor(target_sr, fps).process(y[start - ctx_start:end - ctx_start], y_harmonic, y_percussive)
+
+    own = start_frame - lead_frame
+    chroma = np.sum(librosa.feature.chroma_cqt(y=y[start_frame * frame_size - ctx_start:end - ctx_start], sr=target_sr), axis=1)
+    return SegmentResult(start_frame, features[own:], features[max(0, own - SEAM_FRAMES):own], chroma, seek)
+
+
+def seam_matches(before: SegmentResult, after: SegmentResult, rtol: float = 1e-4, atol: float = 1e-6) -> bool:
+    """Whether the frames 'after' analyzed ahead of its start agree with the end of 'before'."""
+    n = len(after.lead)
+    if len(before.features) < n:
+        return False
+    tail = before.features[len(before.features) - n:]
+    return all(np.allclose(getattr(after.lead, name), getattr(tail, name), rtol=rtol, atol=atol)
+               for name in FrameFeatures.__dataclass_fields__)
+
+
+def analyze_segments(
+    path: str,
+    fps: float,
+    target_sr: int,
+    total_frames: int,
+    workers: int,
+    segment_sec: float = SEGMENT_SEC,
+    progress_callback: Optional[Callable[[float, str], None]] = None,
+) -> Tuple[FrameFeatures, np.ndarray]:
+    """
+    Analyzes a track's segments concurrently in a process pool and stitches them:
+    returns the features of all frames and the chroma summed over the track.
+
+    Every seam is checked: the lead-in frames a segment analyzed must match the end of
+    the previous one. A segment that fails (e.g. a format whose seeks aren't sample
+    exact) is re-read by decoding from the file start, here in the calling process;
+    re-reads, and seams that still differ after one, are reported via 'progress_callback'.
+    """
+    segments = plan_segments(total_frames, fps, workers, segment_sec)
+    results = [None] * len(segments)
+
+    # Spawn (the Windows default) everywhere, so behavior matches the show laptops
+    ctx = mp.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(segments)), mp_context=ctx) as pool:
+        futures = {pool.submit(analyze_segment, path, fps, target_sr, start, end): i
+                   for i, (start, end) in enumerate(segments)}
+        for done, future in enumerate(as_completed(futures), 1):
+            results[futures[future]] = future.result()
+            if progress_callback:
+                progress_callback(0.9 * done / len(segments), f"Analyzed {done} / {len(segments)} segments...")
+
+    for i in range(1, len(results)):
+        if seam_matches(results[i - 1], results[i]):
+            continue
+        start, end = segments[i]
+        if progress_callback:
+            progress_callback(0.9, f"Segment seam at {start / fps:.1f}s did not match; re-reading the segment from the file start")
+        results[i] = analyze_segment(path, fps, target_sr, start, end, seek=False)
+        if not seam_matches(results[i - 1], results[i]) and progress_callback:
+            progress_callback(0.9, f"Warning: seam at {start / fps:.1f}s still differs after re-reading")
+
+    features = FrameFeatures.concatenate([r.features for r in results])
+    chroma_sum = np.sum([r.chroma for r in results], axis=0)
+    return features, chroma_sum
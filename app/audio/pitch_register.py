@@ -1,6 +1,8 @@
 import numpy as np
 from enum import Enum
 
+from app.audio.spectrum import FrameSpectrum, spectrum_plan
+
 
 class PitchRegister(Enum):
     LOW = "low"
@@ -8,41 +10,66 @@ class PitchRegister(Enum):
     HIGH = "high"
 
 
+# Band edges (Hz)
+BAND_EDGES_HZ = {
+    PitchRegister.LOW: (20, 250),
+    PitchRegister.MID: (250, 2000),
+    PitchRegister.HIGH: (2000, 8000),
+}
+
+
 def spectral_energy_bands(
     frame: np.ndarray,
     sample_rate: int,
     frame_harmonic: np.ndarray = None,
     frame_percussive: np.ndarray = None,
+    spectrum: FrameSpectrum = None,
 ) -> dict:
     """
     Returns normalized energy in low / mid / high frequency bands.
     Uses Harmonic/Percussive Source Separation (HPSS) if provided 
     to isolate vocals/chords from beats.
+    Pass the frame's FrameSpectrum to reuse its FFTs.
     """
-    x = frame
-    if x.ndim == 2: x = x.mean(axis=1)
-
-    x_h = frame_harmonic if frame_harmonic is not None else x
-    if x_h.ndim == 2: x_h = x_h.mean(axis=1)
-
-    # FFT
-    spectrum = np.abs(np.fft.rfft(x))
-    spectrum_h = np.abs(np.fft.rfft(x_h))
-    
-    freqs = np.fft.rfftfreq(len(x), d=1.0 / sample_rate)
-
-    # bands (Hz)
-    low_band = (freqs >= 20) & (freqs < 250)
-    mid_band = (freqs >= 250) & (freqs < 2000)
-    high_band = (freqs >= 2000) & (freqs < 8000)
+    if spectrum is None:
+        spectrum = FrameSpectrum(frame, sample_rate, frame_harmonic)
 
     # Advanced Separation:
     # Low: Total energy (Kick + Bass)
     # Mid: Harmonic energy (Vocals + Chords), ignoring percussive snare bleed
     # High: Total energy (Hi-Hats + Air)
-    low_energy = spectrum[low_band].sum()
-    mid_energy = spectrum_h[mid_band].sum()
-    high_energy = spectrum[high_band].sum()
+    low_energy = spectrum.band_energy(*BAND_EDGES_HZ[PitchRegister.LOW])
+    mid_energy = spectrum.band_energy(*BAND_EDGES_HZ[PitchRegister.MID], harmonic=True)
+    high_energy = spectrum.band_energy(*BAND_EDGES_HZ[PitchRegister.HIGH])
+
+    total = low_energy + mid_energy + high_energy + 1e-12
+
+    return {
+        PitchRegister.LOW: low_energy / total,
+        PitchRegister.MID: mid_energy / total,
+        PitchRegister.HIGH: high_energy / total,
+    }
+
+
+def spectral_energy_bands_frames(
+    frames: np.ndarray,
+    sample_rate: int,
+    frames_harmonic: np.ndarray = None,
+) -> dict:
+    """
+    Batch version of spectral_energy_bands() over a 2-D (n_frames, frame_size) view.
+    Returns one normalized energy array per band.
+    """
+    x_h = frames_harmonic if frames_harmonic is not None else frames
+
+    spectrum = np.abs(np.fft.rfft(frames, axis=1))
+    spectrum_h = np.abs(np.fft.rfft(x_h, axis=1))
+
+    plan = spectrum_plan(frames.shape[1], sample_rate)
+
+    low_energy = spectrum[:, plan.band_slice(*BAND_EDGES_HZ[PitchRegister.LOW])].sum(axis=1)
+    mid_energy = spectrum_h[:, plan.band_slice(*BAND_EDGES_HZ[PitchRegister.MID])].sum(axis=1)
+    high_energy = spectrum[:, plan.band_slice(*BAND_EDGES_HZ[PitchRegister.HIGH])].sum(axis=1)
 
     total = low_energy + mid_energy + high_energy + 1e-12
 
@@ -2,131 +2,112 @@ import os
 import time
 import numpy as np
 import librosa
-from typing import List, Tuple
 from dataclasses import dataclass
+from typing import Tuple
 
-from app.audio.onset import onset_strength, normalize_onset
-from app.audio.pitch_register import spectral_energy_bands
-from app.audio.loudness import rms_loudness, AdaptiveNormalizer
+from app.audio.analysis_cache import AnalysisCache
+from app.audio.beat_grid import BeatGrid, track_beats
+from app.audio.features import FrameFeatures, FrameFeatureExtractor
+from app.audio.file_source import DECODE_BLOCK, SampleWindow, frames_from_file, seekable_length
+from app.audio.hpss import HPSS_CONTEXT, context_start, hpss_segment
+from app.audio.key_detection import estimate_key
+from app.audio.parallel_analysis import analyze_segments
+from app.audio.pitch_register import PitchRegister
+from app.audio.loudness import AdaptiveNormalizer
 from app.lighting.dynamics import DynamicsController, DynamicsParams
 from app.lighting.pulse import PulseTracker
 from app.mapping.emotion import MoodEngine
 from app.mapping.color import ColorEngine
 from app.audio.tempo import ResonatorBPM
+from app.audio.timeline import AnalysisTimeline, FrameAnalysis, COLUMNS, DEBUG_COLUMNS
+from app.utils.time_window import TimeWindow
+from app.utils.smoothing import frames_for
+from app.utils.snapshot import Snapshottable, restore_bytes, snapshot_bytes
 
-@dataclass
-class FrameAnalysis:
-    time_sec: float
-    rgb: Tuple[int, int, int]
-    brightness: float
-    bpm: float
-    bpm_confidence: float
-    arousal: float
-    valence: float
-    raw_rms: float
-    onset: float
-    key: str
-    debug_data: dict
+class FrameMapper(Snapshottable):
+    """
+    Runs the recursive engines (gate, dynamics, pulse, tempo, mood, color) over
+    precomputed FrameFeatures. Successive map() calls continue the same track.
 
-class TrackAnalyzer:
-    def __init__(self, fps: float = 20.0, target_sr: int = 44100):
+    map() can record checkpoints (serialized engine snapshots) every N frames;
+    resume() restores one, so mapping can restart mid-track instead of from frame 0.
+    """
+    STATE_FIELDS = ("dyn", "pulse", "mood_engine", "color_engine", "normalizer", "tempo_est",
+                    "instant_b", "short_b", "frame_index")
+
+    def __init__(self, fps: float, global_baselines: dict = None):
         self.fps = fps
-        self.target_sr = target_sr
-        
-    def analyze_file(self, filepath: str, progress_callback=None) -> Tuple[List[FrameAnalysis], str]:
+        params = DynamicsParams.for_fps(fps)
+        self.dyn = DynamicsController(params)
+        self.pulse = PulseTracker(fps=fps, onset_peak_th=0.60, refractory_s=0.10, decay_s=0.18)
+        self.mood_engine = MoodEngine(global_baselines=global_baselines, fps=fps)
+        self.color_engine = ColorEngine(fps=fps)
+        self.normalizer = AdaptiveNormalizer(fps=fps)
+        self.tempo_est = ResonatorBPM(fps=fps)
+        self.instant_b = TimeWindow(1)
+        self.short_b = TimeWindow(frames_for(0.5, fps))
+        self.frame_index = 0
+        self.checkpoints = {}  # frame_index -> snapshot_bytes() taken before that frame
+
+    def resume(self, frame: int) -> int:
         """
-        Loads the entire audio file, runs the MoodEngine over it,
-        and returns a pre-computed list of FrameAnalysis for flawless playback,
-        along with the path to the diagnostic log file.
+        Restores the latest checkpoint at or before 'frame' and returns its frame index;
+        map() then continues from there (pass the features from that frame on).
         """
-        # 1. Load Audio
-        if progress_callback: progress_callback(0.0, "Loading audio file...")
-        y, sr = librosa.load(filepath, sr=self.target_sr, mono=True)
-        
-        # 1a. HPSS (Harmonic-Percussive Source Separation) for Advanced Separation
-        if progress_callback: progress_callback(0.04, "Isolating Instruments (HPSS)...")
-        y_harmonic, y_percussive = librosa.effects.hpss(y)
-        
-        # 1b. Global Key Detection (Krumhansl-Schmuckler)
-        if progress_callback: progress_callback(0.05, "Extracting Musical Key...")
-        chroma = librosa.feature.chroma_cqt(y=y, sr=sr)
-        chroma_sum = np.sum(chroma, axis=1)
-        
-        major_profile = [6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88]
-        minor_profile = [6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17]
-        pitch_names = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
-        
-        best_corr = -1
-        song_key = "Unknown"
-        for i in range(12):
-            maj_p = np.roll(major_profile, i)
-            min_p = np.roll(minor_profile, i)
-            maj_corr = np.corrcoef(chroma_sum, maj_p)[0, 1]
-            if maj_corr > best_corr:
-                best_corr = maj_corr
-                song_key = f"{pitch_names[i]} Maj"
-            min_corr = np.corrcoef(chroma_sum, min_p)[0, 1]
-            if min_corr > best_corr:
-                best_corr = min_corr
-                song_key = f"{pitch_names[i]} Min"
-                
-        # 2. Setup Engines
-        if progress_callback: progress_callback(0.1, "Initializing engines...")
-        params = DynamicsParams(enter_hold_frames=int(3 * self.fps), drop_boost_frames=int(0.5 * self.fps))
-        # 2b. Load Neural Memory 
-        from app.audio.memory_bank import SongMemoryBank
-        log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "..", "logs", "history")
-        memory = SongMemoryBank(log_dir)
-        global_baselines = memory.model
-        
-        dyn = DynamicsController(params)
-        pulse = PulseTracker(fps=self.fps, onset_peak_th=0.60, refractory_s=0.10, decay_s=0.18)
-        mood_engine = MoodEngine(global_baselines=global_baselines)
-        color_engine = ColorEngine(fps=self.fps)
-        normalizer = AdaptiveNormalizer()
-        tempo_est = ResonatorBPM(fps=self.fps)
-        
-        # 3. Chunking
-        frame_size = int(sr / self.fps)
-        total_frames = len(y) // frame_size
-        
-        results = []
+        recorded = [f for f in self.checkpoints if f <= frame]
+        if not recorded:
+            raise ValueError(f"no checkpoint at or before frame {frame}")
+        restore_bytes(self, self.checkpoints[max(recorded)])
+        return self.frame_index
+
+    def map(self, features: FrameFeatures, song_key: str, grid: BeatGrid = None, checkpoint_every: int = 0) -> AnalysisTimeline:
+        """
+        With a BeatGrid (offline tempo stage over the whole track), bpm, confidence,
+        density and pulse come from the grid instead of the causal ResonatorBPM/PulseTracker.
+        With 'checkpoint_every', a checkpoint is recorded whenever frame_index is a multiple of it.
+        """
+        # Plain Python floats are much cheaper than NumPy scalars in the engine loop
+        rms_values = features.rms.tolist()
+        flux_values = features.flux.tolist()
+        onset_values = features.onset.tolist()
+        band_low = features.band_low.tolist()
+        band_mid = features.band_mid.tolist()
+        band_high = features.band_high.tolist()
         
-        # Pre-allocate for DC offset tracking
-        from app.utils.time_window import TimeWindow
-        instant_b = TimeWindow(1)
-        short_b = TimeWindow(10)
+        n = len(features)
+        if grid is not None:
+            s = self.frame_index
+            grid_bpm = grid.frame_bpm[s:s + n].tolist()
+            grid_confidence = grid.frame_confidence[s:s + n].tolist()
+            grid_density = grid.frame_density[s:s + n].tolist()
+            grid_pulse = grid.frame_pulse[s:s + n].tolist()
+        cols = {name: [0.0] * n for name in COLUMNS}
+        rgb_values = [None] * n
         
-        # 4. Process Loop
-        for i in range(total_frames):
-            if progress_callback and i % 50 == 0:
-                progress_callback(0.1 + 0.9 * (i / total_frames), f"Analyzing frame {i}/{total_frames}...")
-                
-            start = i * frame_size
-            end = start + frame_size
-            frame = y[start:end]
-            frame_h = y_harmonic[start:end]
-            frame_p = y_percussive[start:end]
-            
-            # Match live pipeline logic exactly
-            frame = frame - np.mean(frame) # DC offset
+        for i in range(n):
+            if checkpoint_every and self.frame_index % checkpoint_every == 0:
+                self.checkpoints[self.frame_index] = snapshot_bytes(self)
             
             # Loudness
-            rms = rms_loudness(frame)
-            b = normalizer.normalize(rms, frame=frame)
-            instant_b.push(b)
-            short_b.push(b)
-            ib = instant_b.latest()
-            sb = short_b.average()
+            rms = rms_values[i]
+            b = self.normalizer.normalize(rms, flux=flux_values[i])
+            self.instant_b.push(b)
+            self.short_b.push(b)
+            ib = self.instant_b.latest()
+            sb = self.short_b.average()
             
             # Onset (Uses percussive component for strict drum tracking)
-            o = normalize_onset(onset_strength(frame_p))
+            o = onset_values[i]
             
             # Bands (Uses harmonic/percussive split for instrument isolation)
-            bands = spectral_energy_bands(frame, sr, frame_h, frame_p)
+            bands = {
+                PitchRegister.LOW: band_low[i],
+                PitchRegister.MID: band_mid[i],
+                PitchRegister.HIGH: band_high[i],
+            }
             
             # Dynamics
-            st = dyn.update(instant_brightness=ib, short_brightness=sb, onset=o)
+            st = self.dyn.update(instant_brightness=ib, short_brightness=sb, onset=o)
             if st.minimal_mode:
                 final = 0.90 * sb + 0.10 * ib
             else:
@@ -136,52 +117,383 @@ class TrackAnalyzer:
             final = max(0.0, min(1.0, final))
             
             # Pulse & Tempo
-            pstate = pulse.update(o)
-            tempo_state = tempo_est.update(o)
+            if grid is None:
+                pulse = self.pulse.update(o).pulse
+                tempo_state = self.tempo_est.update(o)
+                bpm, bpm_confidence, density = tempo_state.bpm, tempo_state.confidence, tempo_state.density
+            else:
+                pulse = grid_pulse[i]
+                bpm, bpm_confidence, density = grid_bpm[i], grid_confidence[i], grid_density[i]
             
             # Punch Mix (Like live)
             base_level = final * 0.80 
             punch = o * 0.50
-            rhythm = pstate.pulse * 0.15
+            rhythm = pulse * 0.15
             final_pulsed = max(0.0, min(1.0, base_level + punch + rhythm))
             
             # Mood & Color
-            mood = mood_engine.update(
+            mood = self.mood_engine.update(
                 loudness=b,
                 onset=o,
-                pulse=pstate.pulse,
-                density=tempo_state.density,
+                pulse=pulse,
+                density=density,
                 band_energy=bands
             )
-            rgb = color_engine.map_mood_to_color(mood, song_key=song_key, bpm_stability=tempo_state.confidence)
-            
-            results.append(FrameAnalysis(
-                time_sec=i / self.fps,
-                rgb=rgb,
-                brightness=final_pulsed,
-                bpm=tempo_state.bpm,
-                bpm_confidence=tempo_state.confidence,
-                arousal=mood.arousal,
-                valence=mood.valence,
-                raw_rms=rms,
-                onset=o,
-                key=song_key,
-                debug_data=mood.debug_data
-            ))
+            rgb = self.color_engine.map_mood_to_color(mood, song_key=song_key, bpm_stability=bpm_confidence)
             
-        if progress_callback: progress_callback(0.95, "Writing diagnostic log to memory...")
+            rgb_values[i] = rgb
+            cols["time_sec"][i] = self.frame_index / self.fps
+            cols["brightness"][i] = final_pulsed
+            cols["bpm"][i] = bpm
+            cols["bpm_confidence"][i] = bpm_confidence
+            cols["arousal"][i] = mood.arousal
+            cols["valence"][i] = mood.valence
+            cols["raw_rms"][i] = rms
+            cols["onset"][i] = o
+            for name in DEBUG_COLUMNS:
+                cols[name][i] = mood.debug_data[name]
+            self.frame_index += 1
+            
+        return AnalysisTimeline.from_columns(self.fps, song_key, rgb_values, **cols)
+
+# Bump whenever a change alters the analysis output, so stale cache entries miss:
+# FEATURE_VERSION for anything computed from the audio (decoding, HPSS, features,
+# beat grid, key), MAPPING_VERSION for the engines run over it (FrameMapper: gate,
+# dynamics, tempo, mood, color). A mapping bump re-runs only the engines, from the
+# cached features.
+FEATURE_VERSION = 8
+MAPPING_VERSION = 1
+
+# Memory-bank baselines the mapping reads (MoodEngine), and the precision they are
+# keyed at. Every digested song nudges them slightly and bumps the song counter;
+# only a drift that shows at this precision should invalidate cached timelines.
+MODEL_KEY_FIELDS = (
+    "global_avg_bass_exertion", "global_avg_mid_exertion", "global_avg_high_exertion",
+    "typical_valence", "global_dominance_anchor", "valence_spread_multiplier",
+)
+MODEL_KEY_DECIMALS = 2
+
+
+def model_version(global_baselines: dict) -> dict:
+    """Stable cache-key form of the memory-bank model: the baselines used, rounded."""
+    if not global_baselines:
+        return None
+    return {name: round(float(global_baselines[name]), MODEL_KEY_DECIMALS)
+            for name in MODEL_KEY_FIELDS if name in global_baselines}
+
+
+@dataclass
+class TrackFeatures:
+    """Feature layer of a track's analysis: everything the engines need, with no audio work left."""
+    features: FrameFeatures
+    grid: BeatGrid
+    key: str
+
+
+def _history_dir() -> str:
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "..", "logs", "history")
+
+class TrackAnalyzer:
+    # Progressive analysis: a short first block gets the first lights out quickly,
+    # later blocks double in size (up to the max) for throughput.
+    FIRST_BLOCK_SEC = 3.0
+    MAX_BLOCK_SEC = 30.0
+    # Engine checkpoints of the final mapping pass, for remap()
+    CHECKPOINT_SEC = 10.0
+
+    def __init__(self, fps: float = 20.0, target_sr: int = 44100, cache: AnalysisCache = None,
+                 streaming: bool = False, max_block_sec: float = None, segment_workers: int = 1):
+        """
+        streaming: decode and resample the file block by block (file_source) instead of
+        loading it whole, so memory is bounded by 'max_block_sec' (plus the HPSS
+        context and look-ahead) whatever the track length, e.g. for hour-long DJ sets.
+        The timeline is the same either way (bit-exact at target_sr; files that need
+        resampling differ slightly, being resampled by StreamingResampler rather than
+        librosa.load), so both modes share cache entries.
+
+        segment_workers > 1: analyze the track's segments concurrently in that many
+        processes (parallel_analysis) and stitch them, for long tracks on many cores.
+        Gives the same timeline as a streaming run, but only publishes it when done.
+        Files soundfile can't seek in (audioread formats) are analyzed in blocks as usual.
+        """
+        self.fps = fps
+        self.target_sr = target_sr
+        self.cache = cache
+        self.streaming = streaming
+        self.max_block_sec = max_block_sec or self.MAX_BLOCK_SEC
+        self.segment_workers = segment_workers
+        # Last analyzed track (not set on a cache hit): what remap() re-runs the engines over
+        self.features = None
+        self.grid = None
+        self.mapper = None
+        self.key = None
+        self.from_cache = False  # Last timeline was served from the cache as-is
         
+    def analyze_file(self, filepath: str, progress_callback=None, timeline: AnalysisTimeline = None) -> Tuple[AnalysisTimeline, str]:
+        """
+        Loads the entire audio file, runs the MoodEngine over it,
+        and returns a pre-computed AnalysisTimeline for flawless playback,
+        along with the path to the diagnostic log file.
+        Pass an empty AnalysisTimeline to read frames while they are being produced.
+        A cache hit writes no new log (re-logging the same song would feed it to the
+        memory bank again): the song's latest existing log is returned instead, if any.
+        """
+        if timeline is None:
+            timeline = AnalysisTimeline(self.fps)
+        self.analyze_progressive(filepath, timeline, progress_callback=progress_callback)
+        
+        if self.from_cache:
+            log_path = self._latest_log(filepath)
+        else:
+            if progress_callback: progress_callback(0.95, "Writing diagnostic log to memory...")
+            log_path = self._write_diagnostic_log(filepath, timeline)
+            
+        if progress_callback: progress_callback(1.0, "Analysis complete!")
+        return timeline, log_path
+
+    @staticmethod
+    def load_global_baselines() -> dict:
+        from app.audio.memory_bank import SongMemoryBank
+        memory = SongMemoryBank(_history_dir())
+        return memory.model
+
+    def is_cached(self, filepath: str, global_baselines: dict = None) -> bool:
+        if self.cache is None:
+            return False
+        if global_baselines is None:
+            global_baselines = self.load_global_baselines()
+        return self.cache.contains(self.cache_key(filepath, global_baselines))
+
+    def has_cached_features(self, filepath: str) -> bool:
+        """Whether the feature layer is cached, i.e. analyzing this file only re-runs the engines."""
+        return self.cache is not None and self.cache.contains(self.feature_key(filepath))
+
+    def cache_key(self, filepath: str, global_baselines: dict) -> str:
+        """Key of the finished timeline (feature and mapping layers)."""
+        return self.cache.make_key(filepath, {
+            "version": FEATURE_VERSION,
+            "mapping_version": MAPPING_VERSION,
+            "fps": self.fps,
+            "target_sr": self.target_sr,
+            "model": model_version(global_baselines),
+        })
+
+    def feature_key(self, filepath: str) -> str:
+        """Key of the feature layer (TrackFeatures). The memory-bank model only shapes the mapping, so it's left out."""
+        return self.cache.make_key(filepath, {
+            "layer": "features",
+            "version": FEATURE_VERSION,
+            "fps": self.fps,
+            "target_sr": self.target_sr,
+        })
+
+    def analyze_timeline(self, filepath: str, progress_callback=None) -> Tuple[AnalysisTimeline, str]:
+        """
+        Returns the analysis timeline and the song key, served from the
+        analysis cache when this exact file was already analyzed with the same
+        parameters and memory-bank model (no audio is decoded on a hit).
+        """
+        timeline = self.analyze_progressive(filepath, AnalysisTimeline(self.fps), progress_callback)
+        return timeline, timeline.key
+
+    def analyze_progressive(self, filepath: str, timeline: AnalysisTimeline, progress_callback=None) -> AnalysisTimeline:
+        """
+        Streaming analysis: HPSS, features and engines run block by block and each
+        block is appended to 'timeline' as soon as it is ready, so playback can
+        start long before the whole track is done.
+
+        The key used while streaming is estimated from the first block, and tempo/pulse
+        are tracked causally. Once the whole track is in, the beat grid is computed
+        over the full onset curve and the engines are re-run over the kept features
+        with it and the full-track key (no audio work); the final timeline, with its
+        beat/downbeat times, is published in one swap.
+
+        The cache holds both layers: the timeline, and the TrackFeatures it was mapped
+        from. When only the mapping changed (MAPPING_VERSION, memory-bank model), a
+        timeline miss re-runs just the engines from the cached features.
+        """
+        # Load Neural Memory (part of the cache key: it shapes the mood baselines)
+        global_baselines = self.load_global_baselines()
+        
+        cache_key = None
+        self.from_cache = False
+        if self.cache is not None:
+            if progress_callback: progress_callback(0.0, "Checking analysis cache...")
+            cache_key = self.cache_key(filepath, global_baselines)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.from_cache = True
+                timeline.publish(cached)
+                return timeline
+                
+        # Feature layer: from the cache when only the mapping changed, else from the audio
+        track = None
+        if self.cache is not None:
+            feature_key = self.feature_key(filepath)
+            track = self.cache.get(feature_key)
+            if track is not None and progress_callback:
+                progress_callback(0.9, "Re-mapping cached features...")
+        if track is None:
+            track, final_key = self._analyze_features(filepath, timeline, global_baselines, progress_callback)
+            if track is not None and self.cache is not None:
+                self._cache_put(feature_key, track)
+            
+        # Mapping layer: engines over the whole track with the beat grid and the full-track key
+        if track is not None:
+            mapper = FrameMapper(self.fps, global_baselines)
+            results = mapper.map(track.features, track.key, grid=track.grid, checkpoint_every=frames_for(self.CHECKPOINT_SEC, self.fps))
+            results.set_beats(track.grid.beat_times, track.grid.downbeat_times)
+            self.features, self.grid, self.mapper, self.key = track.features, track.grid, mapper, track.key
+        else:
+            results = timeline[:len(timeline)]
+            results.key = final_key
+        timeline.publish(results)
+        
+        if self.cache is not None:
+            self._cache_put(cache_key, results)
+        return timeline
+
+    def _analyze_features(self, filepath: str, timeline: AnalysisTimeline, global_baselines: dict, progress_callback=None):
+        """
+        Feature layer from the audio. Returns the TrackFeatures (None for a track
+        too short for one frame) and the full-track key.
+        """
+        # 1-3. Features and chroma: segments across worker processes, or block by block
+        total_samples = seekable_length(filepath, self.target_sr) if self.segment_workers > 1 else None
+        if total_samples:
+            total_frames = total_samples // int(self.target_sr / self.fps)
+            timeline.reserve(total_frames)
+            features, chroma_sum = analyze_segments(filepath, self.fps, self.target_sr, total_frames,
+                                                    self.segment_workers, progress_callback=progress_callback)
+            feature_blocks = [features] if len(features) else []
+        else:
+            feature_blocks, chroma_sum = self._analyze_blocks(filepath, timeline, global_baselines, progress_callback)
+            
+        # 4. Offline tempo stage (beat grid over the whole onset curve) and final (full-track) key
+        final_key = estimate_key(chroma_sum)
+        if not feature_blocks:
+            return None, final_key
+        if progress_callback: progress_callback(0.9, "Tracking beats...")
+        features = FrameFeatures.concatenate(feature_blocks)
+        grid = track_beats(features.onset, self.fps, accent=features.band_low)
+        return TrackFeatures(features, grid, final_key), final_key
+
+    def _cache_put(self, key: str, value):
+        try:
+            self.cache.put(key, value)
+        except Exception as e:
+            print(f"Failed to write analysis cache: {e}")
+
+    def _analyze_blocks(self, filepath: str, timeline: AnalysisTimeline, global_baselines: dict, progress_callback=None):
+        """
+        Progressive block loop of analyze_progressive(): features and engines per block,
+        each block appended to 'timeline'. Returns the feature blocks and the chroma sum.
+        """
+        # 1. Load Audio (whole, or as a stream of blocks)
+        if progress_callback: progress_callback(0.0, "Loading audio file...")
+        if self.streaming:
+            info, blocks = frames_from_file(filepath, target_sr=self.target_sr, frame_size=DECODE_BLOCK, memmap=False)
+            sr, n_samples = info.sample_rate, info.n_samples
+        else:
+            blocks, sr = librosa.load(filepath, sr=self.target_sr, mono=True)
+            n_samples = len(blocks)
+        audio = SampleWindow(blocks)
+        
+        frame_size = int(sr / self.fps)
+        total_frames = (n_samples or 0) // frame_size  # Until the end of the stream is seen
+        timeline.reserve(total_frames)
+        
+        # 2. Setup Engines
+        extractor = FrameFeatureExtractor(sr, self.fps)
+        mapper = FrameMapper(self.fps, global_baselines)
+        feature_blocks = []
+        chroma_sum = np.zeros(12)
+        song_key = None
+        
+        # 3. Block Loop
+        block_frames = max(1, int(self.FIRST_BLOCK_SEC * self.fps))
+        max_block_frames = max(1, int(self.max_block_sec * self.fps))
+        start_frame = 0
+        while True:
+            # Read far enough for the HPSS context, and to see whether only a short tail follows
+            end_frame = start_frame + block_frames
+            audio.fill((end_frame + block_frames // 2) * frame_size + HPSS_CONTEXT)
+            if audio.exhausted:
+                total_frames = audio.end // frame_size
+                end_frame = min(end_frame, total_frames)
+                # Fold a short tail into this block rather than analyzing a sliver
+                if total_frames - end_frame < block_frames // 2:
+                    end_frame = total_frames
+            if start_frame >= end_frame:
+                break
+            start, end = start_frame * frame_size, end_frame * frame_size
+            
+            if progress_callback:
+                total = max(total_frames, end_frame)
+                progress_callback(0.9 * start_frame / total, f"Analyzing {start_frame / self.fps:.0f}s / {total / self.fps:.0f}s...")
+            
+            # 3a. HPSS (Harmonic-Percussive Source Separation) for Advanced Separation,
+            # over the block plus HPSS_CONTEXT on each side
+            ctx_start = context_start(start)
+            y_ctx = audio.get(ctx_start, end + HPSS_CONTEXT)
+            y_block = y_ctx[start - ctx_start:end - ctx_start]
+            y_harmonic, y_percussive = hpss_segment(y_ctx, start - ctx_start, end - ctx_start)
+            
+            # 3b. Key Detection (Krumhansl-Schmuckler) on the chroma seen so far
+            chroma_sum += np.sum(librosa.feature.chroma_cqt(y=y_block, sr=sr), axis=1)
+            if song_key is None:
+                song_key = estimate_key(chroma_sum)
+                timeline.key = song_key
+            
+            # 3c. Batch Feature Stage + engines
+            features = extractor.process(y_block, y_harmonic, y_percussive)
+            feature_blocks.append(features)
+            timeline.extend(mapper.map(features, song_key))
+            
+            start_frame = end_frame
+            if self.streaming:
+                audio.release(context_start(end))
+            block_frames = min(block_frames * 2, max_block_frames)
+            
+        return feature_blocks, chroma_sum
+
+    def remap(self, from_sec: float, mapper: FrameMapper = None) -> AnalysisTimeline:
+        """
+        Re-runs the engines over the last analyzed track from the nearest checkpoint at
+        or before 'from_sec' (no audio work), e.g. after changing mapping parameters
+        from that point on. 'mapper' is a FrameMapper built with the new parameters
+        (default: same as the analysis). Returns the frames from the checkpoint on;
+        their time_sec says where they go in the full timeline.
+        """
+        if self.mapper is None:
+            raise ValueError("remap() needs a track analyzed by this TrackAnalyzer (not served from the cache)")
+        mapper = mapper or FrameMapper(self.fps, self.load_global_baselines())
+        mapper.checkpoints = self.mapper.checkpoints
+        start = mapper.resume(int(from_sec * self.fps))
+        return mapper.map(self.features[start:], self.key, grid=self.grid)
+
+    @staticmethod
+    def _log_name(filepath: str) -> str:
+        return os.path.basename(filepath).replace(" ", "_")
+
+    def _latest_log(self, filepath: str) -> str:
+        """Most recent diagnostic log of this file still in the history, or ""."""
+        import glob
+        logs = glob.glob(os.path.join(glob.escape(_history_dir()), f"log_*_{glob.escape(self._log_name(filepath))}.csv"))
+        return max(logs, key=os.path.getmtime) if logs else ""
+
+    def _write_diagnostic_log(self, filepath: str, timeline: AnalysisTimeline) -> str:
         # 5. Diagnostic Log Dump (20-song rolling memory)
         try:
             import csv
             import glob
             
             # Create logs directory
-            log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "..", "logs", "history")
+            log_dir = _history_dir()
             os.makedirs(log_dir, exist_ok=True)
             
             # Clean filename
-            safe_name = os.path.basename(filepath).replace(" ", "_")
+            safe_name = self._log_name(filepath)
             timestamp = int(time.time())
             log_filename = f"log_{timestamp}_{safe_name}.csv"
             log_path = os.path.join(log_dir, log_filename)
@@ -189,20 +501,21 @@ class TrackAnalyzer:
             with open(log_path, 'w', newline='') as f:
                 writer = csv.writer(f)
                 writer.writerow(['Time_sec', 'Hue_Hex', 'Arousal', 'Valence', 'RMS', 'Exert_L', 'Exert_M', 'Exert_H', 'Dominance', 'BPM'])
-                for r in results:
-                    hex_color = f"#{r.rgb[0]:02x}{r.rgb[1]:02x}{r.rgb[2]:02x}"
-                    db = r.debug_data if r.debug_data else {}
+                # Whole columns at once instead of one FrameAnalysis per row
+                cols = {name: arr.tolist() for name, arr in timeline.columns().items()}
+                hex_colors = [f"#{r:02x}{g:02x}{b:02x}" for r, g, b in cols["rgb"]]
+                for i in range(len(timeline)):
                     writer.writerow([
-                        f"{r.time_sec:.2f}", 
-                        hex_color,
-                        f"{r.arousal:.3f}", 
-                        f"{r.valence:.3f}", 
-                        f"{r.raw_rms:.4f}",
-                        f"{db.get('exert_low', 0):.3f}",
-                        f"{db.get('exert_mid', 0):.3f}",
-                        f"{db.get('exert_high', 0):.3f}",
-                        f"{db.get('dominance', 0):.3f}",
-                        f"{r.bpm:.0f}"
+                        f"{cols['time_sec'][i]:.2f}", 
+                        hex_colors[i],
+                        f"{cols['arousal'][i]:.3f}", 
+                        f"{cols['valence'][i]:.3f}", 
+                        f"{cols['raw_rms'][i]:.4f}",
+                        f"{cols['exert_low'][i]:.3f}",
+                        f"{cols['exert_mid'][i]:.3f}",
+                        f"{cols['exert_high'][i]:.3f}",
+                        f"{cols['dominance'][i]:.3f}",
+                        f"{cols['bpm'][i]:.0f}"
                     ])
                     
             # Auto-Delete oldest logs if over 20
@@ -224,5 +537,4 @@ class TrackAnalyzer:
             print(f"Failed to write log: {e}")
             log_path = ""
             
-        if progress_callback: progress_callback(1.0, "Analysis complete!")
-        return results, log_path
+        return log_path
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from math import gcd
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import firwin
+
+
+class StreamingResampler:
+    """
+    Incremental polyphase resampler (rational ratio up/down).
+
+    The anti-aliasing FIR is the same Kaiser design scipy's resample_poly uses,
+    split into 'up' phases. Input history and the output position are carried
+    across process() calls, so feeding a track block by block gives the same
+    samples as resampling it in one go, with memory bounded by the block size.
+    """
+    def __init__(self, sr_in: int, sr_out: int, half_len_per_rate: int = 10):
+        g = gcd(int(sr_in), int(sr_out))
+        self.sr_in = int(sr_in)
+        self.sr_out = int(sr_out)
+        self.up = self.sr_out // g
+        self.down = self.sr_in // g
+
+        max_rate = max(self.up, self.down)
+        half_len = half_len_per_rate * max_rate
+        h = firwin(2 * half_len + 1, 1.0 / max_rate, window=("kaiser", 5.0)) * self.up
+
+        # Polyphase split: phase p holds taps h[p], h[p + up], ... (zero padded)
+        self.taps = -(-len(h) // self.up)
+        h = np.pad(h, (0, self.taps * self.up - len(h)))
+        # Reversed so a row dots directly with an input window in time order
+        self._phases = h.reshape(self.taps, self.up).T[:, ::-1].astype(np.float32)
+        self._delay = half_len  # Group delay in upsampled samples
+
+        # Input history (absolute index of _buf[0] is _buf_start)
+        self._buf = np.zeros(self.taps - 1, dtype=np.float32)
+        self._buf_start = -(self.taps - 1)
+        self._n_in = 0
+        self._n_out = 0
+
+    @property
+    def is_passthrough(self) -> bool:
+        return self.up == self.down
+
+    def process(self, x: np.ndarray) -> np.ndarray:
+        """Resamples the next block of a mono stream. May return fewer samples until enough input has arrived."""
+        x = np.asarray(x, dtype=np.float32)
+        if self.is_passthrough:
+            return x
+        self._buf = np.concatenate([self._buf, x])
+        self._n_in += len(x)
+        return self._emit(self._n_in)
+
+    def flush(self) -> np.ndarray:
+        """Emits the remaining output (end of stream), padding the filter tail with zeros."""
+        if self.is_passthrough:
+            return np.zeros(0, dtype=np.float32)
+        total_out = -(-self._n_in * self.up // self.down)
+        self._buf = np.concatenate([self._buf, np.zeros(self.taps, dtype=np.float32)])
+        out = self._emit(self._n_in + self.taps, limit=total_out)
+        return out
+
+    def _emit(self, available: int, limit: int = None) -> np.ndarray:
+        # Output n needs input up to index (n * down + delay) // up
+        n_end = (available * self.up - self._delay - 1) // self.down + 1
+        if limit is not None:
+            n_end = min(n_end, limit)
+        n = np.arange(self._n_out, max(self._n_out, n_end), dtype=np.int64)
+
+        t = n * self.down + self._delay
+        phase = t % self.up
+        newest = t // self.up
+        # Window over x[newest - taps + 1 .. newest], relative to the buffer
+        windows = sliding_window_view(self._buf, self.taps)
+        out = np.einsum("nk,nk->n", self._phases[phase], windows[newest - self._buf_start - self.taps + 1])
+
+        self._n_out += len(n)
+        # Keep only the history the next output still needs
+        next_oldest = (self._n_out * self.down + self._delay) // self.up - self.taps + 1
+        drop = max(0, min(next_oldest - self._buf_start, len(self._buf)))
+        self._buf = self._buf[drop:]
+        self._buf_start += drop
+        return out.astype(np.float32)
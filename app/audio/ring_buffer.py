@@ -0,0 +1,92 @@
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    Preallocated float32 circular buffer for audio history.
+
+    The storage is mirrored (every sample is written twice, 'capacity' apart),
+    so "the last N samples" and any reader's pending samples are always one
+    contiguous slice: reads return views, never copies. Writing does not
+    allocate, which keeps it safe for the audio driver's callback thread.
+
+    Single writer, any number of readers (see reader()).
+    """
+    def __init__(self, capacity: int):
+        self.capacity = int(capacity)
+        self._buf = np.zeros(2 * self.capacity, dtype=np.float32)
+        self.total_written = 0   # Absolute sample count, only moved after the data is in place
+
+    def write(self, samples: np.ndarray):
+        n = len(samples)
+        # Only the newest 'capacity' samples can be kept
+        skip = max(0, n - self.capacity)
+        samples = samples[skip:]
+        n -= skip
+
+        pos = (self.total_written + skip) % self.capacity
+        first = min(n, self.capacity - pos)
+        self._put(pos, samples[:first])
+        if first < n:
+            self._put(0, samples[first:])
+        self.total_written += skip + n
+
+    def _put(self, pos: int, chunk: np.ndarray):
+        end = pos + len(chunk)
+        self._buf[pos:end] = chunk
+        self._buf[pos + self.capacity:end + self.capacity] = chunk
+
+    @property
+    def available(self) -> int:
+        return min(self.total_written, self.capacity)
+
+    def latest(self, n: int, end: int = None) -> np.ndarray:
+        """
+        Contiguous view of the n samples before absolute position 'end'
+        (default: the newest). Zeros before anything was written.
+        """
+        n = min(int(n), self.capacity)
+        if end is None:
+            end = self.total_written
+        stop = end % self.capacity + self.capacity
+        return self._buf[stop - n:stop]
+
+    def view(self, start: int, end: int) -> np.ndarray:
+        """Contiguous view of absolute samples [start, end), which must still be in the buffer."""
+        if end - start > self.capacity or start < self.total_written - self.capacity or end > self.total_written:
+            raise IndexError(f"samples [{start}, {end}) not in buffer (written: {self.total_written})")
+        offset = start % self.capacity
+        return self._buf[offset:offset + (end - start)]
+
+    def reader(self, from_start: bool = False) -> "RingReader":
+        """A reader with its own cursor, starting at the current write position (or the oldest kept sample)."""
+        cursor = self.total_written - self.available if from_start else self.total_written
+        return RingReader(self, cursor)
+
+
+class RingReader:
+    """Independent read cursor into an AudioRingBuffer."""
+    def __init__(self, ring: AudioRingBuffer, cursor: int):
+        self.ring = ring
+        self.cursor = cursor
+        self.overrun_samples = 0   # Samples the writer overwrote before this reader got to them
+
+    @property
+    def pending(self) -> int:
+        return self.ring.total_written - self.cursor
+
+    def skip(self, n: int):
+        """Advances the cursor without reading (e.g. to drop a backlog)."""
+        self.cursor = min(self.cursor + n, self.ring.total_written)
+
+    def read(self, max_samples: int = None) -> np.ndarray:
+        """View of the next unread samples (up to max_samples), advancing the cursor."""
+        written = self.ring.total_written
+        oldest = written - self.ring.capacity
+        if self.cursor < oldest:
+            self.overrun_samples += oldest - self.cursor
+            self.cursor = oldest
+        end = written if max_samples is None else min(written, self.cursor + max_samples)
+        chunk = self.ring.view(self.cursor, end)
+        self.cursor = end
+        return chunk
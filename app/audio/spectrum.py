@@ -0,0 +1,79 @@
+from functools import lru_cache
+
+import numpy as np
+
+
+class SpectrumPlan:
+    """
+    Everything about a spectrum that only depends on (frame length, sample rate):
+    the analysis window, bin frequencies and band index ranges. Shared via
+    spectrum_plan(), so it is built once per frame size instead of per frame.
+    """
+    def __init__(self, frame_size: int, sample_rate: int = None):
+        self.frame_size = frame_size
+        self.sample_rate = sample_rate
+        self.window = np.hanning(frame_size)
+        self.n_bins = frame_size // 2 + 1
+        self.freqs = np.fft.rfftfreq(frame_size, d=1.0 / sample_rate) if sample_rate else None
+        self._band_slices = {}
+
+    def band_slice(self, lo_hz: float, hi_hz: float) -> slice:
+        """Bin range with lo_hz <= freq < hi_hz (bin frequencies are sorted, so a mask is a slice)."""
+        key = (lo_hz, hi_hz)
+        if key not in self._band_slices:
+            start = int(np.searchsorted(self.freqs, lo_hz, side="left"))
+            stop = int(np.searchsorted(self.freqs, hi_hz, side="left"))
+            self._band_slices[key] = slice(start, stop)
+        return self._band_slices[key]
+
+
+@lru_cache(maxsize=32)
+def spectrum_plan(frame_size: int, sample_rate: int = None) -> SpectrumPlan:
+    return SpectrumPlan(frame_size, sample_rate)
+
+
+class FrameSpectrum:
+    """
+    Spectra of one audio frame, computed on first use and cached, so the noise
+    gate, band energies and any later stage share a single FFT per kind.
+
+    - magnitude:           |rfft(frame)| (band energies)
+    - windowed_magnitude:  |rfft(frame * hanning)| (noise gate spectral flux)
+    - harmonic_magnitude:  |rfft(frame_harmonic)|, or magnitude without HPSS
+    """
+    def __init__(self, frame: np.ndarray, sample_rate: int = None, frame_harmonic: np.ndarray = None):
+        if frame.ndim == 2:
+            frame = frame.mean(axis=1)
+        self.frame = frame
+        self.frame_harmonic = frame_harmonic
+        self.plan = spectrum_plan(len(frame), sample_rate)
+        self._magnitude = None
+        self._windowed = None
+        self._harmonic = None
+
+    @property
+    def magnitude(self) -> np.ndarray:
+        if self._magnitude is None:
+            self._magnitude = np.abs(np.fft.rfft(self.frame))
+        return self._magnitude
+
+    @property
+    def windowed_magnitude(self) -> np.ndarray:
+        if self._windowed is None:
+            self._windowed = np.abs(np.fft.rfft(self.frame * self.plan.window))
+        return self._windowed
+
+    @property
+    def harmonic_magnitude(self) -> np.ndarray:
+        if self.frame_harmonic is None:
+            return self.magnitude
+        if self._harmonic is None:
+            x_h = self.frame_harmonic
+            if x_h.ndim == 2:
+                x_h = x_h.mean(axis=1)
+            self._harmonic = np.abs(np.fft.rfft(x_h))
+        return self._harmonic
+
+    def band_energy(self, lo_hz: float, hi_hz: float, harmonic: bool = False) -> float:
+        spectrum = self.harmonic_magnitude if harmonic else self.magnitude
+        return spectrum[self.plan.band_slice(lo_hz, hi_hz)].sum()
@@ -1,6 +1,8 @@
 import numpy as np
 from dataclasses import dataclass
-from collections import deque
+
+from app.utils.smoothing import decay_factor, ema_alpha, time_constant
+from app.utils.snapshot import Snapshottable
 
 @dataclass
 class TempoState:
@@ -9,80 +11,118 @@ class TempoState:
     is_stable: bool
     density: float # 0.0 (Sparse) -> 1.0 (Dense/Busy)
 
-class ResonatorBPM:
+class ResonatorBPM(Snapshottable):
     """
     BPM Detection using a bank of Phase Resonators (Comb Filter) combined with IOI Density Check.
+    'bpm_step' sets the bank resolution (e.g. 0.25 for beat-matched chases); every
+    per-frame step is vectorized over the bank, so finer bins don't add Python work.
+    Resonance decay and bpm smoothing are time constants in seconds (defaults: 0.97
+    and alpha 0.05 per frame at 20 fps), so the tracker behaves the same at any fps.
     """
-    def __init__(self, fps: float, min_bpm=60, max_bpm=180):
+    IOI_HISTORY = 20 # Track last 20 intervals
+    STATE_FIELDS = ("phases", "energies", "last_onset_time", "current_time", "_ioi_ring", "_ioi_count",
+                    "best_bpm", "confidence", "_frames_since_estimate", "state")
+    DENSITY_TOLERANCE = 0.10 # 10% tolerance
+
+    def __init__(self, fps: float, min_bpm=60, max_bpm=180, bpm_step: float = 1.0,
+                 energy_tau_s: float = time_constant(0.03), bpm_tau_s: float = time_constant(0.05)):
         self.fps = fps
         self.min_bpm = min_bpm
         self.max_bpm = max_bpm
+        self.bpm_step = bpm_step
         
         # Create bank of BPMs
-        self.bpms = np.arange(min_bpm, max_bpm + 1, 1.0)
-        self.n_bins = len(self.bpms)
+        n_bins = int(round((max_bpm - min_bpm) / bpm_step)) + 1
+        self.bpms = min_bpm + bpm_step * np.arange(n_bins)
+        self.n_bins = n_bins
+        
+        # Per-frame phase advance and beat periods, fixed for the bank
+        self._phase_step = self.bpms / 60.0 / self.fps
+        self._periods = 60.0 / self.bpms
+        
+        # Half/double tempo candidate of every bin (-1 if outside the bank)
+        half_idx = np.floor((self.bpms / 2.0 - min_bpm) / bpm_step + 1e-9).astype(int)
+        double_idx = np.floor((self.bpms * 2.0 - min_bpm) / bpm_step + 1e-9).astype(int)
+        self._half_idx = np.where(self.bpms / 2.0 >= min_bpm, half_idx, -1)
+        self._double_idx = np.where(self.bpms * 2.0 <= max_bpm, double_idx, -1)
         
         # Phase Resonators
         self.phases = np.random.rand(self.n_bins)
         self.energies = np.zeros(self.n_bins)
         
-        # IOI Tracking for Octave Disambiguation
+        # IOI Tracking for Octave Disambiguation (NumPy ring of the last IOI_HISTORY intervals)
         self.last_onset_time = 0.0
         self.current_time = 0.0
-        self.ioi_buffer = deque(maxlen=20) # Track last 20 intervals
+        self._ioi_ring = np.zeros(self.IOI_HISTORY)
+        self._ioi_count = 0
+        self._density_scores = None # Per-bin density, recomputed only when a new IOI arrives
         self.min_ioi = 0.2 # Ignore super fast trills (< 200ms)
 
         # Parameters
-        self.energy_decay = 0.97   
+        self.energy_decay = decay_factor(energy_tau_s, fps)
         self.pulse_coupling = 0.4 
         
         # Smoothing
+        self.bpm_alpha = ema_alpha(bpm_tau_s, fps)
         self.best_bpm = 120.0
         self.confidence = 0.0
+        self._frames_since_estimate = 0
+        self.state = TempoState(bpm=self.best_bpm, confidence=0.0, is_stable=False, density=0.0)
+
+    def restore(self, snap: dict):
+        super().restore(snap)
+        self._density_scores = None  # Derived from the IOI ring
+
+    @property
+    def ioi_buffer(self) -> np.ndarray:
+        """Recent IOIs (order not preserved; only their distribution is used)."""
+        return self._ioi_ring[:min(self._ioi_count, self.IOI_HISTORY)]
+
+    def _push_ioi(self, ioi: float):
+        self._ioi_ring[self._ioi_count % self.IOI_HISTORY] = ioi
+        self._ioi_count += 1
+        self._density_scores = None
+
+    def _density(self, periods: np.ndarray) -> np.ndarray:
+        """
+        Scores (0.0 to 1.0) how many recent IOIs match each period, in one broadcast.
+        We check multiples too: 140 BPM might have IOIs of 0.428s (1 beat) or 0.856s (2 beats, weak match).
+        """
+        iois = self.ioi_buffer
+        if len(iois) < 4:
+            return np.full(len(periods), 0.5)
+        p = periods[:, None]
+        err = np.abs(iois - p) / p
+        err2 = np.abs(iois - 2.0 * p) / (2.0 * p)
+        matches = np.where(err < self.DENSITY_TOLERANCE, 1.0, np.where(err2 < self.DENSITY_TOLERANCE, 0.5, 0.0))
+        return matches.sum(axis=1) / (len(iois) + 0.0001)
+
+    @property
+    def density_scores(self) -> np.ndarray:
+        """IOI density score of every bin in the bank."""
+        if self._density_scores is None:
+            self._density_scores = self._density(self._periods)
+        return self._density_scores
 
     def check_density(self, target_bpm: float) -> float:
         """
         Returns a score (0.0 to 1.0) indicating how many recent IOIs match this BPM's period.
         """
-        if len(self.ioi_buffer) < 4:
-            return 0.5
-            
-        period_s = 60.0 / target_bpm
-        
-        # We check for multiples too! 140 BPM might have IOIs of 0.428s (1 beat) or 0.856s (2 beats)
-        # But mainly we want to see if the *fundamental* period exists.
-        
-        matches = 0
-        total_weight = 0.0
-        
-        # Simple histogram-like check
-        tolerance = 0.10 # 10% tolerance
-        
-        for ioi in self.ioi_buffer:
-            # Check 1x
-            err = abs(ioi - period_s) / period_s
-            weight = 1.0
-            
-            # Check 2x (missing beat)
-            err2 = abs(ioi - period_s * 2) / (period_s * 2)
-            
-            if err < tolerance:
-                matches += 1.0
-            elif err2 < tolerance:
-                matches += 0.5 # Weak match
-                
-            total_weight += 1.0
-            
-        return matches / (total_weight + 0.0001)
+        return float(self._density(np.array([60.0 / target_bpm]))[0])
 
-    def update(self, onset: float) -> TempoState:
+    def update(self, onset: float, estimate: bool = True) -> TempoState:
+        """
+        Advances the resonator bank by one frame. With estimate=False the tempo
+        readout (octave check, smoothing, confidence, density) is skipped and the
+        last TempoState is returned, for callers that only need it a few times a
+        second; the bpm smoothing catches up on the skipped frames.
+        """
         # Time keeping
         dt = 1.0 / self.fps
         self.current_time += dt
         
         # 1. Update phases
-        freqs = self.bpms / 60.0
-        self.phases += freqs / self.fps
+        self.phases += self._phase_step
         self.phases %= 1.0 
         
         # 2. Add Energy from Onset
@@ -98,68 +138,58 @@ class ResonatorBPM:
             # Let's simple check if onset > 0.5 and it's been a while?
             if onset > 0.5 and (self.current_time - self.last_onset_time) > self.min_ioi:
                 ioi = self.current_time - self.last_onset_time
-                self.ioi_buffer.append(ioi)
+                self._push_ioi(ioi)
                 self.last_onset_time = self.current_time
                 is_beat = True
             
         # 3. Decay Energy
         self.energies *= self.energy_decay
         
+        self._frames_since_estimate += 1
+        if not estimate:
+            return self.state
+        
         # 4. Find Best Candidate (Raw Resonance)
         peak_idx = np.argmax(self.energies)
         max_energy = self.energies[peak_idx]
         raw_bpm = self.bpms[peak_idx]
         
         # --- Advanced Octave Correction (Density Check) ---
-        
-        candidates = [raw_bpm]
-        
-        # Propose Half
-        half_bpm = raw_bpm / 2.0
-        if half_bpm >= self.min_bpm: 
-            candidates.append(half_bpm)
-            
-        # Propose Double
-        double_bpm = raw_bpm * 2.0
-        if double_bpm <= self.max_bpm:
-            candidates.append(double_bpm)
-            
-        # Score candidates by Density
-        best_candidate = raw_bpm
-        best_score = -1.0
-        
-        # Tune scores: we prefer the one with highest density match
-        # But we also respect the resonance energy.
+        # Half/Double candidates are the bank bins at half/double tempo.
+        # We prefer the one with highest density match, but we also respect the resonance energy.
         # Let's just break ties for Double/Half using Density.
-        
-        start_density = self.check_density(raw_bpm)
+        density_scores = self.density_scores
+        start_density = density_scores[peak_idx]
+        half_idx = self._half_idx[peak_idx]
+        double_idx = self._double_idx[peak_idx]
         
         # Check Half?
-        if half_bpm >= self.min_bpm:
-             half_idx = int(half_bpm - self.min_bpm)
+        if half_idx >= 0:
              half_energy = self.energies[half_idx]
-             half_density = self.check_density(half_bpm)
+             half_density = density_scores[half_idx]
              
              # If Half has decent energy (>50%) AND significantly better density (>1.2x)
              if (half_energy > max_energy * 0.5) and (half_density > start_density + 0.15):
                  # Switch to Half
-                 raw_bpm = half_bpm
+                 raw_bpm = self.bpms[half_idx]
                  max_energy = half_energy
                  start_density = half_density
 
         # Check Double?
-        if double_bpm <= self.max_bpm:
-             double_idx = int(double_bpm - self.min_bpm)
+        if double_idx >= 0:
              double_energy = self.energies[double_idx]
-             double_density = self.check_density(double_bpm)
+             double_density = density_scores[double_idx]
              
              # If Double has decent energy (>60%) AND better density
              if (double_energy > max_energy * 0.6) and (double_density > start_density + 0.15):
-                 raw_bpm = double_bpm
+                 raw_bpm = self.bpms[double_idx]
                  max_energy = double_energy
 
         # 5. Smoothing
-        alpha = 0.05 # Slower smoothing
+        alpha = self.bpm_alpha # Slower smoothing
+        if self._frames_since_estimate > 1:
+            alpha = 1.0 - (1.0 - alpha) ** self._frames_since_estimate # Catch up on the skipped frames
+        self._frames_since_estimate = 0
         self.best_bpm = (1-alpha) * self.best_bpm + alpha * raw_bpm
         
         # 6. Confidence
@@ -171,16 +201,48 @@ class ResonatorBPM:
         # 1.0 = Very Busy (16th notes @ 140bpm -> ~100ms)
         # 0.0 = Very Sparse (>1000ms)
         density = 0.0
-        if self.ioi_buffer:
-            avg_ioi = sum(self.ioi_buffer) / len(self.ioi_buffer)
+        if self._ioi_count:
+            avg_ioi = float(np.mean(self.ioi_buffer))
             # Clip between 1.0s and 0.1s
             # 1.0s -> 0.0 density | 0.1s -> 1.0 density
             density = 1.0 - (avg_ioi - 0.1) / 0.9
             density = max(0.0, min(1.0, density))
 
-        return TempoState(
+        self.state = TempoState(
             bpm=self.best_bpm,
             confidence=self.confidence,
             is_stable=(self.confidence > 0.5),
             density=density
         )
+        return self.state
+
+
+def ioi_density(onset: np.ndarray, fps: float, min_ioi: float = 0.2, history: int = ResonatorBPM.IOI_HISTORY) -> np.ndarray:
+    """
+    Offline version of ResonatorBPM's density output for a whole onset curve:
+    onsets above 0.5 (at least 'min_ioi' apart) give IOIs, and every frame gets the
+    density of the last 'history' IOIs seen so far.
+    """
+    n = len(onset)
+    times = np.cumsum(np.full(n, 1.0 / fps)) # Same clock accumulation as ResonatorBPM.update
+    
+    event_frames = []
+    last_time = 0.0
+    for i in np.flatnonzero(np.asarray(onset) > 0.5).tolist():
+        if times[i] - last_time > min_ioi:
+            event_frames.append(i)
+            last_time = times[i]
+    if not event_frames:
+        return np.zeros(n)
+    
+    event_times = times[event_frames]
+    iois = np.diff(event_times, prepend=0.0)
+    csum = np.concatenate(([0.0], np.cumsum(iois)))
+    
+    # IOIs seen by each frame, and the mean of the newest 'history' of them
+    count = np.searchsorted(event_frames, np.arange(n), side="right")
+    window = np.minimum(count, history)
+    avg_ioi = (csum[count] - csum[count - window]) / np.maximum(window, 1)
+    density = np.clip(1.0 - (avg_ioi - 0.1) / 0.9, 0.0, 1.0)
+    density[count == 0] = 0.0
+    return density
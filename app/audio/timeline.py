@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+
+
+@dataclass
+class FrameAnalysis:
+    time_sec: float
+    rgb: Tuple[int, int, int]
+    brightness: float
+    bpm: float
+    bpm_confidence: float
+    arousal: float
+    valence: float
+    raw_rms: float
+    onset: float
+    key: str
+    debug_data: dict
+
+
+# Scalar columns (besides rgb) and their storage types
+COLUMNS = {
+    "time_sec": np.float64,
+    "brightness": np.float32,
+    "bpm": np.float32,
+    "bpm_confidence": np.float32,
+    "arousal": np.float32,
+    "valence": np.float32,
+    "raw_rms": np.float32,
+    "onset": np.float32,
+    # MoodEngine debug_data (exertions)
+    "exert_low": np.float32,
+    "exert_mid": np.float32,
+    "exert_high": np.float32,
+    "dominance": np.float32,
+    "normalized_val": np.float32,
+}
+DEBUG_COLUMNS = ("exert_low", "exert_mid", "exert_high", "dominance", "normalized_val")
+
+
+class AnalysisTimeline:
+    """
+    Struct-of-arrays analysis timeline: one NumPy column per field, rgb as uint8 Nx3.
+
+    Indexing with an int returns a FrameAnalysis for the UI; slicing returns a
+    timeline view (no copy). It also works as a growing buffer for progressive
+    analysis: columns are preallocated for 'total_frames', extend() fills them
+    from a worker thread and len() is the "frames ready" watermark.
+    Complete offline analyses also carry the beat grid (beat_times /
+    downbeat_times, in seconds) for beat-synced effects during playback.
+    """
+    def __init__(self, fps: float, total_frames: int = 0, key: str = "Unknown"):
+        self.fps = fps
+        self.key = key
+        self.total_frames = total_frames
+        self.is_complete = False
+        self._length = 0
+        self.beat_times = np.zeros(0)
+        self.downbeat_times = np.zeros(0)
+        self.rgb = np.zeros((total_frames, 3), dtype=np.uint8)
+        for name, dtype in COLUMNS.items():
+            setattr(self, name, np.zeros(total_frames, dtype=dtype))
+
+    @classmethod
+    def from_columns(cls, fps: float, key: str, rgb, **columns) -> "AnalysisTimeline":
+        """Builds a complete timeline from per-column sequences (lists or arrays)."""
+        rgb = np.asarray(rgb, dtype=np.uint8).reshape(-1, 3)
+        tl = cls(fps, 0, key)
+        tl.rgb = rgb
+        for name, dtype in COLUMNS.items():
+            setattr(tl, name, np.asarray(columns[name], dtype=dtype))
+        tl.total_frames = tl._length = len(rgb)
+        tl.is_complete = True
+        return tl
+
+    # --- Access ---
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            start, stop, step = idx.indices(self._length)
+            view = AnalysisTimeline(self.fps, 0, self.key)
+            view.rgb = self.rgb[start:stop:step]
+            for name in COLUMNS:
+                setattr(view, name, getattr(self, name)[start:stop:step])
+            view.total_frames = view._length = len(view.rgb)
+            view.is_complete = True
+            view.beat_times, view.downbeat_times = self.beat_times, self.downbeat_times
+            return view
+
+        if idx < 0:
+            idx += self._length
+        if not 0 <= idx < self._length:
+            raise IndexError(f"frame {idx} out of range ({self._length} ready)")
+        r, g, b = self.rgb[idx].tolist()
+        return FrameAnalysis(
+            time_sec=float(self.time_sec[idx]),
+            rgb=(r, g, b),
+            brightness=float(self.brightness[idx]),
+            bpm=float(self.bpm[idx]),
+            bpm_confidence=float(self.bpm_confidence[idx]),
+            arousal=float(self.arousal[idx]),
+            valence=float(self.valence[idx]),
+            raw_rms=float(self.raw_rms[idx]),
+            onset=float(self.onset[idx]),
+            key=self.key,
+            debug_data={name: float(getattr(self, name)[idx]) for name in DEBUG_COLUMNS},
+        )
+
+    def __iter__(self):
+        for i in range(self._length):
+            yield self[i]
+
+    def index_at(self, time_sec: float) -> int:
+        """Frame index for a playback time, clamped to the ready range."""
+        idx = int(time_sec * self.fps)
+        return max(0, min(idx, self._length - 1))
+
+    def beats_between(self, t0: float, t1: float, downbeats: bool = False) -> np.ndarray:
+        """Beat (or downbeat) times in (t0, t1], e.g. the beats crossed since the last UI tick."""
+        times = self.downbeat_times if downbeats else self.beat_times
+        return times[np.searchsorted(times, t0, side="right"):np.searchsorted(times, t1, side="right")]
+
+    def set_beats(self, beat_times: np.ndarray, downbeat_times: np.ndarray):
+        self.beat_times = np.asarray(beat_times, dtype=np.float64)
+        self.downbeat_times = np.asarray(downbeat_times, dtype=np.float64)
+
+    def columns(self) -> dict:
+        """All columns (ready range only), for writers that consume whole arrays."""
+        cols = {name: getattr(self, name)[:self._length] for name in COLUMNS}
+        cols["rgb"] = self.rgb[:self._length]
+        return cols
+
+    @property
+    def nbytes(self) -> int:
+        return sum(arr.nbytes for arr in self.columns().values())
+
+    # --- Progressive Fill ---
+
+    @property
+    def ready_sec(self) -> float:
+        return self._length / self.fps
+
+    @property
+    def duration_sec(self) -> float:
+        return self.total_frames / self.fps
+
+    def is_ready_at(self, time_sec: float, margin_sec: float = 0.0) -> bool:
+        """True once analysis is at least 'margin_sec' ahead of 'time_sec' (or done)."""
+        if self.is_complete:
+            return True
+        return self.total_frames > 0 and self.ready_sec >= min(time_sec + margin_sec, self.duration_sec)
+
+    def reserve(self, total_frames: int):
+        """Preallocates the columns for a track of 'total_frames'."""
+        self.total_frames = total_frames
+        self._grow(total_frames)
+
+    def extend(self, block: "AnalysisTimeline"):
+        """Appends a block. Data is written before the watermark moves, so readers never see unfilled frames."""
+        n = len(block)
+        start, end = self._length, self._length + n
+        self._grow(end)
+        self.rgb[start:end] = block.rgb[:n]
+        for name in COLUMNS:
+            getattr(self, name)[start:end] = getattr(block, name)[:n]
+        self._length = end
+
+    def publish(self, final: "AnalysisTimeline"):
+        """Swaps in the final timeline (column references only, safe for readers)."""
+        self.rgb = final.rgb
+        for name in COLUMNS:
+            setattr(self, name, getattr(final, name))
+        self.key = final.key
+        self.beat_times, self.downbeat_times = final.beat_times, final.downbeat_times
+        self.total_frames = len(final)
+        self._length = len(final)
+        self.is_complete = True
+
+    def _grow(self, capacity: int):
+        if capacity <= len(self.rgb):
+            return
+        capacity = max(capacity, 2 * len(self.rgb))
+        rgb = np.zeros((capacity, 3), dtype=np.uint8)
+        rgb[:self._length] = self.rgb[:self._length]
+        for name, dtype in COLUMNS.items():
+            col = np.zeros(capacity, dtype=dtype)
+            col[:self._length] = getattr(self, name)[:self._length]
+            setattr(self, name, col)
+        self.rgb = rgb
+
+    # --- Pickling (cache) ---
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.update(self.columns())
+        return state
@@ -2,6 +2,9 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
+from app.utils.smoothing import frames_for
+from app.utils.snapshot import Snapshottable
+
 
 @dataclass
 class DynamicsState:
@@ -26,8 +29,13 @@ class DynamicsParams:
     # Drop boost duration
     drop_boost_frames: int = 10  # ~ (drop_boost_frames / fps) seconds
 
+    @classmethod
+    def for_fps(cls, fps: float, enter_hold_s: float = 3.0, drop_boost_s: float = 0.5, **kwargs) -> "DynamicsParams":
+        """Params with the hold/boost durations given in seconds, converted to frames at 'fps'."""
+        return cls(enter_hold_frames=frames_for(enter_hold_s, fps), drop_boost_frames=frames_for(drop_boost_s, fps), **kwargs)
+
 
-class DynamicsController:
+class DynamicsController(Snapshottable):
     """
     Manages:
     - Minimal Mode (trend-based)
@@ -36,6 +44,7 @@ class DynamicsController:
     - instant_brightness (fast)
     - short_brightness (smoothed)
     """
+    STATE_FIELDS = ("state", "_low_counter")
 
     def __init__(self, params: DynamicsParams):
         self.p = params
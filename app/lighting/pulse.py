@@ -2,14 +2,22 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
+import math
+
+from app.utils.snapshot import Snapshottable
+
 
 @dataclass
 class PulseState:
     pulse: float = 0.0          # 0..1 current pulse value
     beat_interval: float = 0.0  # seconds (smoothed), optional info
+    beat_phase: float = 0.0     # 0..1 position inside the predicted beat (0 = on the beat)
+    next_beat_in: float = 0.0   # seconds from this frame to the predicted next beat (0 if no prediction)
+    beat_period: float = 0.0    # seconds per beat of the phase-locked clock
+    phase_confidence: float = 0.0  # 0..1 how reliably detected beats land on the predicted grid
 
 
-class PulseTracker:
+class PulseTracker(Snapshottable):
     """
     Real-time beat/pulse tracker from an onset signal (0..1).
 
@@ -17,7 +25,11 @@ class PulseTracker:
     - Uses a refractory period to avoid double-triggers.
     - Estimates beat interval via EMA of inter-beat time.
     - Generates a short pulse that decays smoothly each frame.
+    - Phase-locks a beat clock to the detected beats (period from the caller's
+      tempo estimate, or the EMA interval) to predict the next beat.
     """
+    STATE_FIELDS = ("state", "_refractory_left", "_frames_since_last_beat", "_last_onset",
+                    "_phase", "_period", "_hit_this_beat", "_last_beat_hit")
 
     def __init__(
         self,
@@ -26,6 +38,10 @@ class PulseTracker:
         refractory_s: float = 0.12,
         decay_s: float = 0.18,
         interval_ema_alpha: float = 0.25,
+        phase_gain: float = 0.3,
+        period_gain: float = 0.1,
+        period_follow_s: float = 2.0,
+        hit_window: float = 0.2,
     ):
         self.fps = fps
         self.onset_peak_th = onset_peak_th
@@ -38,7 +54,27 @@ class PulseTracker:
         self._frames_since_last_beat = 10**9  # large initial
         self._last_onset = 0.0
 
-    def update(self, onset: float) -> PulseState:
+        # Beat clock (phase in beats, 0 = on the beat)
+        self.phase_gain = phase_gain    # Share of the phase error corrected per hit
+        self.period_gain = period_gain  # Period trim per hit (relative, per beat of phase error)
+        self.period_follow = 1.0 / max(1.0, period_follow_s * fps)  # Per-frame pull towards the given period
+        self.hit_window = hit_window    # Max |phase error| (in beats) for a detected beat to count as a hit
+        self._phase = 0.0
+        self._period = 0.0
+        self._hit_this_beat = False
+        self._last_beat_hit = False
+
+    def update(self, onset: float, period_s: float = 0.0, frames: int = 1, events=None) -> PulseState:
+        """
+        'period_s' is the beat period from a tempo tracker (e.g. 60 / ResonatorBPM bpm);
+        without it the EMA beat interval is used. 'frames' > 1 when this update stands
+        for several frames (coalesced/dropped live frames), so the beat clock keeps time.
+
+        'events' are sub-frame onsets as (offset_s, strength), offset_s <= 0 from the end
+        of this frame (see SpectralFluxOnsetDetector). When given, beats are the events
+        at or above the peak threshold, and the beat clock is corrected at their exact
+        time; the clock then refers to the frame end.
+        """
         onset = max(0.0, min(1.0, onset))
 
         # decay pulse every frame
@@ -51,12 +87,18 @@ class PulseTracker:
         if self._refractory_left > 0:
             self._refractory_left -= 1
 
-        # simple peak detection: rising edge + threshold
-        is_peak = (
-            (self._refractory_left == 0)
-            and (onset >= self.onset_peak_th)
-            and (onset > self._last_onset)
-        )
+        peak_offset = 0.0
+        if events is None:
+            # simple peak detection: rising edge + threshold
+            is_peak = (
+                (self._refractory_left == 0)
+                and (onset >= self.onset_peak_th)
+                and (onset > self._last_onset)
+            )
+        else:
+            # onset events are already peaks: take the strongest one in this frame
+            peak_offset, peak_strength = max(events, key=lambda e: e[1], default=(0.0, 0.0))
+            is_peak = (self._refractory_left == 0) and (peak_strength >= self.onset_peak_th)
 
         if is_peak:
             # beat detected
@@ -78,5 +120,45 @@ class PulseTracker:
             self._frames_since_last_beat += 1
 
         self._last_onset = onset
+        self._update_phase(is_peak, period_s or self.state.beat_interval, frames, peak_offset)
         return self.state
 
+    def _update_phase(self, is_peak: bool, period_s: float, frames: int, peak_offset: float = 0.0):
+        st = self.state
+        if period_s <= 0.0:
+            st.beat_phase = st.next_beat_in = st.beat_period = 0.0
+            return
+
+        # The clock keeps its own period: seeded by (and slowly pulled towards) the given
+        # one, trimmed by the phase errors of hits. A jump (tempo/octave change) reseeds it.
+        if abs(period_s - self._period) > 0.2 * self._period:
+            self._period = period_s
+        else:
+            self._period += min(1.0, frames * self.period_follow) * (period_s - self._period)
+
+        prev = self._phase
+        self._phase += frames / (self.fps * self._period)
+        # Halfway through a beat its hit window has closed: score it
+        if math.floor(self._phase - 0.5) > math.floor(prev - 0.5):
+            a = self.interval_ema_alpha
+            st.phase_confidence = (1 - a) * st.phase_confidence + a * (1.0 if self._hit_this_beat else 0.0)
+            self._last_beat_hit = self._hit_this_beat
+            self._hit_this_beat = False
+        self._phase %= 1.0
+
+        if is_peak:
+            beat_phase = (self._phase + peak_offset / self._period) % 1.0  # Clock phase when the beat happened
+            err = beat_phase if beat_phase < 0.5 else beat_phase - 1.0  # Signed distance to the nearest beat
+            if abs(err) <= self.hit_window:
+                # Beat after the clock (err > 0): the clock runs fast, lengthen its period
+                self._phase = (self._phase - self.phase_gain * err) % 1.0
+                self._period *= 1.0 + self.period_gain * err
+                self._hit_this_beat = True
+            elif not self._last_beat_hit and not self._hit_this_beat:
+                # A whole beat passed without a hit: re-anchor the clock on this beat
+                self._phase = (-peak_offset / self._period) % 1.0
+                self._hit_this_beat = True
+
+        st.beat_phase = self._phase
+        st.beat_period = self._period
+        st.next_beat_in = (1.0 - self._phase) * self._period
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class BeatPrediction:
+    time: float        # predicted next beat, time.perf_counter() seconds
+    period: float      # seconds per beat
+    phase: float       # 0..1 beat phase at the analyzed frame
+    confidence: float  # 0..1 phase-lock confidence
+
+
+class StrobeScheduler:
+    """
+    Fires strobes ahead of predicted beats, so a flash lands on the beat
+    instead of one analysis frame (plus capture latency) behind it.
+
+    - predict() takes the newest BeatPrediction every analysis frame; the
+      pending beat is refined in place, and each beat fires only once.
+    - poll() is called from the output loop and returns the strobe strength
+      when a beat is due at 'time - output_latency_s' (render/display/DMX delay).
+    - Predictions below 'min_confidence' clear the schedule, so callers can
+      fall back to reactive (onset) strobes.
+    - A beat that could not fire within 'max_late_s' of its due time is skipped
+      rather than flashed late.
+    """
+
+    def __init__(self, output_latency_s: float = 0.0, min_confidence: float = 0.5, max_late_s: float = 0.05):
+        self.output_latency_s = output_latency_s
+        self.min_confidence = min_confidence
+        self.max_late_s = max_late_s
+
+        self._pending_time: Optional[float] = None
+        self._pending_strength = 0.0
+        self._period = 0.0
+        self._last_fired: Optional[float] = None
+        self.fired = 0
+        self.skipped = 0
+
+    @property
+    def is_locked(self) -> bool:
+        return self._pending_time is not None
+
+    @property
+    def next_fire_time(self) -> Optional[float]:
+        """perf_counter time of the next scheduled strobe (None if nothing is scheduled)."""
+        if self._pending_time is None:
+            return None
+        return self._pending_time - self.output_latency_s
+
+    def predict(self, beat: Optional[BeatPrediction], strength: float):
+        if beat is None or beat.confidence < self.min_confidence or beat.period <= 0.0:
+            self._pending_time = None
+            return
+
+        beat_time = beat.time
+        # The beat we already fired is still ahead of us (by up to the output latency): aim at the one after
+        if self._last_fired is not None and beat_time - self._last_fired < 0.5 * beat.period:
+            beat_time += beat.period
+
+        self._pending_time = beat_time
+        self._pending_strength = strength
+        self._period = beat.period
+
+    def poll(self, now: float, tick_s: float = 0.0) -> float:
+        """
+        Strobe strength to show at 'now' (0.0 if none is due). 'tick_s' is the caller's
+        polling period: a strobe fires on the tick nearest to its due time.
+        """
+        if self._pending_time is None:
+            return 0.0
+        due = self._pending_time - self.output_latency_s
+        if now + 0.5 * tick_s < due:
+            return 0.0
+
+        beat_time, self._pending_time = self._pending_time, None
+        self._last_fired = beat_time
+        if now - due > self.max_late_s:
+            self.skipped += 1
+            return 0.0
+        self.fired += 1
+        return self._pending_strength
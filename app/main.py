@@ -1,6 +1,9 @@
 import sys
 
+import numpy as np
+
 from app.utils.time_window import TimeWindow
+from app.utils.smoothing import frames_for
 from app.lighting.dynamics import DynamicsController, DynamicsParams
 from app.lighting.pulse import PulseTracker
 from app.lighting.output import render_console
@@ -8,12 +11,14 @@ from app.lighting.output import render_console
 from app.audio.onset import onset_strength, normalize_onset
 from app.audio.loudness import rms_loudness, AdaptiveNormalizer
 from app.audio.pitch_register import spectral_energy_bands
+from app.audio.spectrum import FrameSpectrum
 from app.audio.file_source import frames_from_file
 
 from app.mapping.emotion import MoodEngine
 from app.mapping.color import ColorEngine
 
 from app.audio.tempo import ResonatorBPM
+from app.utils.profiling import StageProfiler
 
 # UI Imports
 from app.lighting.ui import DebugVisualizer, UIState
@@ -23,14 +28,15 @@ def clamp01(x: float) -> float:
     return max(0.0, min(1.0, x))
 
 
-def run_pipeline(frames, fps: float, sample_rate: int, enable_gui: bool = False):
+def run_pipeline(frames, fps: float, sample_rate: int, enable_gui: bool = False, profiler: StageProfiler = None):
+    # Stage timings are a no-op unless a profiler is passed in
+    if profiler is None:
+        profiler = StageProfiler(fps, enabled=False)
+        
     instant_b = TimeWindow(1)
-    short_b = TimeWindow(10)  # ~0.5s at fps=20 (tune if fps changes)
+    short_b = TimeWindow(frames_for(0.5, fps))  # ~0.5s short brightness window
 
-    params = DynamicsParams(
-        enter_hold_frames=int(3 * fps),
-        drop_boost_frames=int(0.5 * fps),
-    )
+    params = DynamicsParams.for_fps(fps)
     dyn = DynamicsController(params)
 
     pulse = PulseTracker(
@@ -41,9 +47,9 @@ def run_pipeline(frames, fps: float, sample_rate: int, enable_gui: bool = False)
     )
     
     # Initialize Engines
-    mood_engine = MoodEngine()
+    mood_engine = MoodEngine(fps=fps)
     color_engine = ColorEngine(fps=fps)
-    normalizer = AdaptiveNormalizer()
+    normalizer = AdaptiveNormalizer(fps=fps)
     tempo_est = ResonatorBPM(fps=fps)
     
     # UI
@@ -55,7 +61,8 @@ def run_pipeline(frames, fps: float, sample_rate: int, enable_gui: bool = False)
     # Calibration Buffer
     calibration_frames = []
     is_calibrating = True
-    calibration_duration = 40 # 2 seconds @ 20fps
+    calibration_duration = frames_for(2.0, fps) # 2 seconds
+    startup_mute_frames = frames_for(2.5, fps)
 
     for i, frame in enumerate(frames):
         # --- DC OFFSET REMOVAL ---
@@ -76,40 +83,47 @@ def run_pipeline(frames, fps: float, sample_rate: int, enable_gui: bool = False)
                 if (i % 10) == 0: print(f"Calibrating... {i}/{calibration_duration}")
                 continue
 
-        # loudness -> brightness
-        rms = rms_loudness(frame)
-        b = normalizer.normalize(rms, frame=frame)
+        frame_start = profiler.start_frame()
+        with profiler.stage("features"):
+            # loudness -> brightness
+            # One shared spectrum per frame (FFTs computed once, on first use)
+            spectrum = FrameSpectrum(frame, sample_rate)
+        
+            rms = rms_loudness(frame)
+            b = normalizer.normalize(rms, spectrum=spectrum)
 
-        instant_b.push(b)
-        short_b.push(b)
+            instant_b.push(b)
+            short_b.push(b)
 
-        ib = instant_b.latest()
-        sb = short_b.average()
+            ib = instant_b.latest()
+            sb = short_b.average()
 
-        # onset
-        o = normalize_onset(onset_strength(frame))
+            # onset
+            o = normalize_onset(onset_strength(frame))
         
-        # spectral bands for valence
-        bands = spectral_energy_bands(frame, sample_rate)
+            # spectral bands for valence
+            bands = spectral_energy_bands(frame, sample_rate, spectrum=spectrum)
 
         # dynamics + pulse
-        st = dyn.update(instant_brightness=ib, short_brightness=sb, onset=o)
+        with profiler.stage("dynamics"):
+            st = dyn.update(instant_brightness=ib, short_brightness=sb, onset=o)
 
-        if st.minimal_mode:
-            final = 0.90 * sb + 0.10 * ib
-        else:
-            final = 0.70 * sb + 0.30 * ib
+            if st.minimal_mode:
+                final = 0.90 * sb + 0.10 * ib
+            else:
+                final = 0.70 * sb + 0.30 * ib
 
-        if st.drop_boost_frames_left > 0:
-            final = max(final, ib)
+            if st.drop_boost_frames_left > 0:
+                final = max(final, ib)
             
-        final = clamp01(final)
+            final = clamp01(final)
 
-        # Update Pulse and Tempo
-        pstate = pulse.update(o)
+            # Update Pulse and Tempo
+            pstate = pulse.update(o)
         
         # ResonatorBPM takes raw onset, doesn't need interval
-        tempo_state = tempo_est.update(o)
+        with profiler.stage("tempo"):
+            tempo_state = tempo_est.update(o)
         
         # --- TRANSIENT CONTRAST & PUNCH ---
         # User wants "extra brightness on kicks" but "less brightness" elsewhere.
@@ -124,52 +138,56 @@ def run_pipeline(frames, fps: float, sample_rate: int, enable_gui: bool = False)
         
         final_pulsed = clamp01(base_level + punch + rhythm)
         
-        # Startup Mute: Kill lights for first 50 frames (~2.5s) to let filters settle
-        if i < 50:
+        # Startup Mute: Kill lights for the first 2.5s to let filters settle
+        if i < startup_mute_frames:
             final_pulsed = 0.0
         
 
         # --- Mood & Color Update ---
-        mood = mood_engine.update(
-            loudness=b,
-            onset=o,
-            pulse=pstate.pulse,
-            density=tempo_state.density,
-            band_energy=bands
-        )
+        with profiler.stage("mood_color"):
+            mood = mood_engine.update(
+                loudness=b,
+                onset=o,
+                pulse=pstate.pulse,
+                density=tempo_state.density,
+                band_energy=bands
+            )
         
-        # Pass tempo confidence to Color Engine
-        rgb = color_engine.map_mood_to_color(mood, bpm_stability=tempo_state.confidence)
+            # Pass tempo confidence to Color Engine
+            rgb = color_engine.map_mood_to_color(mood, bpm_stability=tempo_state.confidence)
 
-        print(
-            f"{i:05d} | b={b:.2f} | BPM={tempo_state.bpm:.1f} (Conf={tempo_state.confidence:.2f}) | "
-            f"V={mood.valence:.2f} | RGB={rgb}"
-        )
-        render_console(rgb, final_pulsed)
+        with profiler.stage("output"):
+            print(
+                f"{i:05d} | b={b:.2f} | BPM={tempo_state.bpm:.1f} (Conf={tempo_state.confidence:.2f}) | "
+                f"V={mood.valence:.2f} | RGB={rgb}"
+            )
+            render_console(rgb, final_pulsed)
         
-        if ui:
-            if not ui.is_running:
-                print("UI Closed. Stopping.")
-                break
+            if ui:
+                if not ui.is_running:
+                    print("UI Closed. Stopping.")
+                    break
             
-            state = UIState(
-                loop_index=i,
-                fps=fps,
-                brightness=b,
-                onset=o,
-                pulse=pstate.pulse,
-                minimal_mode=st.minimal_mode,
-                drop_frames=st.drop_boost_frames_left,
-                arousal=mood.arousal,
-                valence=mood.valence,
-                bpm=tempo_state.bpm,
-                bpm_stability=tempo_state.confidence,
-                raw_rms=rms
-            )
-            try:
-                ui.update(rgb, final_pulsed, state)
-            except Exception:
-                break
+                state = UIState(
+                    loop_index=i,
+                    fps=fps,
+                    brightness=b,
+                    onset=o,
+                    pulse=pstate.pulse,
+                    minimal_mode=st.minimal_mode,
+                    drop_frames=st.drop_boost_frames_left,
+                    arousal=mood.arousal,
+                    valence=mood.valence,
+                    bpm=tempo_state.bpm,
+                    bpm_stability=tempo_state.confidence,
+                    raw_rms=rms
+                )
+                try:
+                    ui.update(rgb, final_pulsed, state)
+                except Exception:
+                    break
+                    
+        profiler.end_frame(frame_start)
 
 
 def main():
@@ -180,6 +198,7 @@ def main():
     parser.add_argument("--gui", action="store_true", help="Show debug visualization window")
     parser.add_argument("--list-devices", action="store_true", help="List audio input devices")
     parser.add_argument("--device", type=int, help="Input device ID for live mode (e.g. Stereo Mix)")
+    parser.add_argument("--profile", metavar="PATH", help="Time each pipeline stage and dump the stats (JSON) to PATH")
     
     args = parser.parse_args()
 
@@ -191,6 +210,7 @@ def main():
 
     fps = 20.0
     target_sr = 44100
+    profiler = StageProfiler(fps, enabled=args.profile is not None)
     
     if args.live:
         from app.audio.stream_source import stream_mic
@@ -201,16 +221,21 @@ def main():
             sample_rate=target_sr,
             device_index=args.device
         )
-        run_pipeline(frames, fps=fps, sample_rate=target_sr, enable_gui=args.gui)
+        run_pipeline(frames, fps=fps, sample_rate=target_sr, enable_gui=args.gui, profiler=profiler)
         
     elif args.file:
         print(f"Loading File: {args.file}")
         info, frames = frames_from_file(args.file, fps=fps, target_sr=target_sr)
         print(f"File Info: sr={info.sample_rate} | ch={info.channels}")
-        run_pipeline(frames, fps=fps, sample_rate=info.sample_rate, enable_gui=args.gui)
+        run_pipeline(frames, fps=fps, sample_rate=info.sample_rate, enable_gui=args.gui, profiler=profiler)
         
     else:
         parser.print_help()
+        
+    if args.profile:
+        print(profiler.report())
+        profiler.dump(args.profile)
+        print(f"Profile written to {args.profile}")
 
 
 
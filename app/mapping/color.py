@@ -1,12 +1,15 @@
 import colorsys
 from app.mapping.emotion import MoodState
-from app.utils.smoothing import ExponentialMovingAverage
+from app.utils.smoothing import ExponentialMovingAverage, REFERENCE_FPS, ema_alpha, frames_for, time_constant
+from app.utils.snapshot import Snapshottable
 
-class CircularExponentialMovingAverage:
+class CircularExponentialMovingAverage(Snapshottable):
     """
     Smoothing for Hues (Angles 0.0-1.0) so it doesn't drag across the color wheel.
     E.g. Averaging 0.9 (Magenta) and 0.1 (Orange) should yield 0.0 (Red), not 0.5 (Cyan).
     """
+    STATE_FIELDS = ("current",)
+
     def __init__(self, alpha=0.1, initial_val=0.0):
         self.alpha = alpha
         self.current = initial_val
@@ -31,60 +34,76 @@ class CircularExponentialMovingAverage:
         return self.current
 
 
-class MoodStabilizer:
+class MoodStabilizer(Snapshottable):
     """
     Simulates 'Vibe Inertia'.
     Latches onto a 'Palette Center' (Long-term average).
     Detects 'Song Change' (Drift) to fast-track adaptation.
+    Time constants are in seconds (defaults: alpha 0.05 / 0.005 per frame at 20 fps).
     """
-    def __init__(self, initial_val=0.5):
+    STATE_FIELDS = ("center", "drift_counter", "is_adapting")
+
+    def __init__(
+        self,
+        initial_val=0.5,
+        fps: float = REFERENCE_FPS,
+        adapt_tau_s: float = time_constant(0.05),
+        stable_tau_s: float = time_constant(0.005),
+        drift_s: float = 2.0,
+    ):
         self.center = initial_val  # The "Key/Vibe" of the song
         self.drift_counter = 0
         self.is_adapting = True    # Start in adapting mode to find first song fast
+        self.adapt_alpha = ema_alpha(adapt_tau_s, fps)
+        self.stable_alpha = ema_alpha(stable_tau_s, fps)
+        self.drift_frames = frames_for(drift_s, fps)
         
     def update(self, current_val: float) -> float:
         # Distance from current "Center"
         dist = abs(current_val - self.center)
         
         # 1. Drift Detection (Song Change?)
-        # If the input stays different from our center for ~2 seconds, we assume song changed.
+        # If the input stays different from our center for 'drift_s', we assume song changed.
         if dist > 0.20: 
             self.drift_counter += 1
         else:
             self.drift_counter = max(0, self.drift_counter - 1)
             
-        # Threshold: 2.0s @ 20fps = 40 frames
-        if self.drift_counter > 40:
+        if self.drift_counter > self.drift_frames:
             self.is_adapting = True
             
         # 2. Alpha Selection (Inertia vs Adaptation)
         if self.is_adapting:
             # FAST ADAPTATION (Finding the new vibe)
-            alpha = 0.05 
+            alpha = self.adapt_alpha
             # If we get close enough, lock it in
             if dist < 0.05 and self.drift_counter == 0:
                 self.is_adapting = False
         else:
             # STABLE PALETTE (Inertia)
             # Very slow tracking to ignore random snare hits/drum fills
-            alpha = 0.005 
+            alpha = self.stable_alpha
             
         # 3. Update Center
         self.center += (current_val - self.center) * alpha
         
         return self.center
 
-class ColorEngine:
+class ColorEngine(Snapshottable):
+    STATE_FIELDS = ("valence_stab", "arousal_stab", "hue_smoother", "sat_smoother")
+
     def __init__(self, fps: float):
         # We replace simple EMA with MoodStabilizer for Palette Logic
         # Valence (Hue) needs strong stabilization for palette consistency
-        self.valence_stab = MoodStabilizer(initial_val=0.5)
-        self.arousal_stab = MoodStabilizer(initial_val=0.5)
+        self.valence_stab = MoodStabilizer(initial_val=0.5, fps=fps)
+        self.arousal_stab = MoodStabilizer(initial_val=0.5, fps=fps)
         
         # We MUST use Circular Smoothing for Hue, otherwise it drags straight across the wheel
         # generating hideous muddy Gray/Cyan logic when bouncing from Yellow to Red.
-        self.hue_smoother = CircularExponentialMovingAverage(alpha=0.1)
-        self.sat_smoother = ExponentialMovingAverage(alpha=0.1)
+        # ~0.5 s glide (alpha 0.1 per frame at 20 fps)
+        glide = ema_alpha(time_constant(0.1), fps)
+        self.hue_smoother = CircularExponentialMovingAverage(alpha=glide)
+        self.sat_smoother = ExponentialMovingAverage(alpha=glide)
 
     def map_mood_to_color(self, mood: MoodState, song_key: str = "C Maj", bpm_stability: float = 0.5) -> tuple[int, int, int]:
         """
@@ -1,5 +1,7 @@
 from dataclasses import dataclass
 from app.audio.pitch_register import PitchRegister
+from app.utils.smoothing import REFERENCE_FPS, ema_alpha, rescale_alpha, time_constant
+from app.utils.snapshot import Snapshottable
 
 @dataclass
 class MoodState:
@@ -8,8 +10,14 @@ class MoodState:
     debug_data: dict = None
 
 
-class MoodEngine:
-    def __init__(self, global_baselines: dict = None):
+class MoodEngine(Snapshottable):
+    """
+    'fps' converts the engine's time constants to per-frame rates; the glide speeds
+    below are tuned per frame at REFERENCE_FPS and rescaled on the fly.
+    """
+    STATE_FIELDS = ("last_valence", "last_arousal", "avg_low", "avg_mid", "avg_high")
+    def __init__(self, global_baselines: dict = None, fps: float = REFERENCE_FPS, learning_tau_s: float = time_constant(0.005)):
+        self.fps = fps
         self.last_valence = 0.5
         self.last_arousal = 0.0
         
@@ -29,7 +37,10 @@ class MoodEngine:
             self.dominance_anchor = 0.66
             self.valence_spread = 1.5
             
-        self.learning_rate = 0.005 # Slow adaptation (Inertia)
+        self.learning_rate = ema_alpha(learning_tau_s, fps) # Slow adaptation (Inertia, ~10 s)
+        # Silence drift of valence/arousal (per frame at REFERENCE_FPS: 0.01, 0.05)
+        self.silence_valence_rate = rescale_alpha(0.01, fps)
+        self.silence_arousal_rate = rescale_alpha(0.05, fps)
 
     def update(
         self,
@@ -112,6 +123,7 @@ class MoodEngine:
             dynamic_glide_speed = base_glide + energy_boost
             # Clamp smoothing speed so it always glides a little, but can snap when needed
             dynamic_glide_speed = max(0.02, min(0.6, dynamic_glide_speed))
+            dynamic_glide_speed = rescale_alpha(dynamic_glide_speed, self.fps)
                  
             target_valence = max(0.0, min(1.0, normalized_valence))
             self.last_valence += (target_valence - self.last_valence) * dynamic_glide_speed
@@ -122,9 +134,9 @@ class MoodEngine:
             # Silence decay
             # Slowly drift valence to 0.5 (Neutral) to prevent "waking up" with a weird color
             # But do it VERY slowly so short pauses don't reset the vibe.
-            self.last_valence += (0.5 - self.last_valence) * 0.01
+            self.last_valence += (0.5 - self.last_valence) * self.silence_valence_rate
             # Decay arousal to 0.0 (Calm)
-            self.last_arousal += (0.0 - self.last_arousal) * 0.05
+            self.last_arousal += (0.0 - self.last_arousal) * self.silence_arousal_rate
 
         debug = {
             "exert_low": exert_low if loudness > 0.01 else 0.0,
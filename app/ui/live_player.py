@@ -1,13 +1,18 @@
+import sys
 import tkinter as tk
 import customtkinter as ctk
 import time
 from app.audio.live_analyzer import LiveAnalyzer
+from app.lighting.strobe import StrobeScheduler
 
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
 class LivePlayer(ctk.CTk):
-    def __init__(self):
+    UI_TICK_MS = 16
+    
+    def __init__(self, profile_path: str = None, output_latency_s: float = 0.0):
+        """'profile_path': time every analysis stage and the repaint, dumped there (JSON) on stop."""
         super().__init__()
         self.title("Neon: Live Hardware Audio Sync")
         self.geometry("800x600")
@@ -15,10 +20,13 @@ class LivePlayer(ctk.CTk):
         
         # Max out FPS for real-time smoothness
         self.fps = 40.0 
-        self.analyzer_engine = LiveAnalyzer(fps=self.fps)
+        self.profile_path = profile_path
+        self.analyzer_engine = LiveAnalyzer(fps=self.fps, profile=profile_path is not None)
         self.is_tracking = False
         
         self.last_strobe_time = 0.0
+        # Beat-synced strobes: fired ahead of the predicted beat by the output (display) latency
+        self.strobe = StrobeScheduler(output_latency_s=output_latency_s)
         
         self.setup_ui()
         self.ui_tick()
@@ -76,6 +84,8 @@ class LivePlayer(ctk.CTk):
     def toggle_sync(self):
         if self.is_tracking:
             self.analyzer_engine.stop()
+            if self.profile_path:
+                self.analyzer_engine.dump_profile(self.profile_path)
             self.is_tracking = False
             self.btn_toggle.configure(text="🟢 Start Live Sync",fg_color=["#3a7ebf", "#1f538d"])
             self.lbl_status.configure(text="Idle", text_color="gray")
@@ -92,10 +102,13 @@ class LivePlayer(ctk.CTk):
         if self.is_tracking:
             frame = self.analyzer_engine.get_latest_frame()
             if frame:
-                self._update_visual(frame)
+                with self.analyzer_engine.profiler.stage("ui_paint"):
+                    self._update_visual(frame)
+                # The canvas colour is the light output: capture-to-output ends here
+                self.analyzer_engine.mark_presented(frame)
                 
         # 60fps UI paint loop (~16ms)
-        self.after(16, self.ui_tick)
+        self.after(self.UI_TICK_MS, self.ui_tick)
 
     def _update_visual(self, frame):
         r, g, b = frame.rgb
@@ -107,7 +120,13 @@ class LivePlayer(ctk.CTk):
         current_ms = time.time() * 1000.0
         cooldown_ms = 120.0  
         
-        if raw_flash > 0.15: # Major transient
+        # Phase-locked beat clock: flash on the predicted beat instead of after the onset was analyzed
+        self.strobe.predict(self.analyzer_engine.get_beat_prediction(), strength=0.5 * energy_gate)
+        beat_flash = self.strobe.poll(time.perf_counter(), tick_s=self.UI_TICK_MS / 1000.0)
+        
+        if beat_flash > 0.0 or self.strobe.is_locked:
+            flash = beat_flash if beat_flash > 0.15 else 0.0
+        elif raw_flash > 0.15: # Major transient (no confident beat prediction)
             if (current_ms - self.last_strobe_time) > cooldown_ms:
                 flash = raw_flash
                 self.last_strobe_time = current_ms
@@ -144,5 +163,9 @@ class LivePlayer(ctk.CTk):
         self.val_color.configure(text=hex_color.upper())
 
 if __name__ == "__main__":
-    app = LivePlayer()
+    # --profile PATH: time every analysis stage and the Tk repaint, dumped to PATH (JSON) on stop
+    # --output-latency MS: display/fixture delay to fire beat strobes ahead of
+    output_latency_ms = float(sys.argv[sys.argv.index("--output-latency") + 1]) if "--output-latency" in sys.argv else 0.0
+    profile_path = sys.argv[sys.argv.index("--profile") + 1] if "--profile" in sys.argv else None
+    app = LivePlayer(profile_path=profile_path, output_latency_s=output_latency_ms / 1000.0)
     app.mainloop()
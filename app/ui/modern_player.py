@@ -5,11 +5,16 @@ from tkinter import filedialog
 import customtkinter as ctk
 import pygame
 import mutagen
-from app.audio.player_backend import TrackAnalyzer, FrameAnalysis
+from app.audio.player_backend import TrackAnalyzer
+from app.audio.timeline import AnalysisTimeline
+from app.audio.analysis_cache import AnalysisCache
 
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
+# Playback is allowed once analysis is this far ahead of the playhead
+PLAYBACK_READY_MARGIN_S = 2.0
+
 class ModernPlayer(ctk.CTk):
     def __init__(self):
         super().__init__()
@@ -21,8 +26,13 @@ class ModernPlayer(ctk.CTk):
         # Default pygame buffer is huge and causes up to 500ms of lag!
         pygame.mixer.pre_init(frequency=44100, size=-16, channels=2, buffer=512)
         pygame.mixer.init()
-        self.analyzer = TrackAnalyzer(fps=20.0)
+        # Re-opening a track is served from the on-disk analysis cache. Streaming decodes
+        # block by block, so the first lights don't wait for the whole file to load
+        self.analyzer = TrackAnalyzer(fps=20.0, cache=AnalysisCache(AnalysisCache.default_dir()), streaming=True)
         self.frames = []
+        self.timeline = None
+        self.current_filepath = None
+        self.is_playable = False
         self.is_playing = False
         
         # Audio Sync State
@@ -31,6 +41,7 @@ class ModernPlayer(ctk.CTk):
         
         # Physics State
         self.last_strobe_time = 0.0
+        self.last_visual_time = 0.0
         
         self.setup_ui()
         self.update_loop() 
@@ -157,23 +168,37 @@ class ModernPlayer(ctk.CTk):
         self.btn_play.configure(state="disabled", text="▶ Play")
         self.slider_progress.configure(state="disabled")
         
-        self.frames = []
-        threading.Thread(target=self._analyze_worker, args=(filepath,), daemon=True).start()
+        # Progressive analysis: the timeline fills in from the worker thread and
+        # update_loop() unlocks playback once it is safely ahead of the playhead.
+        self.timeline = AnalysisTimeline(self.analyzer.fps)
+        self.frames = self.timeline
+        self.current_filepath = filepath
+        self.current_log_path = ""
+        self.is_playable = False
+        threading.Thread(target=self._analyze_worker, args=(filepath, self.timeline), daemon=True).start()
 
-    def _analyze_worker(self, filepath: str):
+    def _analyze_worker(self, filepath: str, timeline: AnalysisTimeline):
         def progress(perc: float, status: str):
             self.after(0, lambda: self.lbl_loading.configure(text=f"{status} ({int(perc*100)}%)"))
             
         self.after(0, lambda: self.lbl_loading.place(relx=0.5, rely=0.5, anchor="center"))
         
         try:
-            self.frames, self.current_log_path = self.analyzer.analyze_file(filepath, progress_callback=progress)
-            self.after(0, lambda: self._on_analysis_complete(filepath))
+            _, log_path = self.analyzer.analyze_file(filepath, progress_callback=progress, timeline=timeline)
+            self.after(0, lambda: self._on_analysis_complete(timeline, log_path))
         except Exception as e:
             self.after(0, lambda: self.lbl_loading.configure(text=f"Error: {e}"))
             
-    def _on_analysis_complete(self, filepath: str):
+    def _on_analysis_complete(self, timeline: AnalysisTimeline, log_path: str):
+        if timeline is not self.timeline:
+            return  # Another track was loaded meanwhile
+        self.current_log_path = log_path
         self.lbl_loading.place_forget()
+        if not self.is_playable:
+            self._on_playable(self.current_filepath)
+
+    def _on_playable(self, filepath: str):
+        self.is_playable = True
         
         # Extract original sample rate and re-init pygame mixer to prevent latency
         try:
@@ -189,7 +214,7 @@ class ModernPlayer(ctk.CTk):
             
         pygame.mixer.music.load(filepath)
         
-        self.duration = len(self.frames) / self.analyzer.fps
+        self.duration = self.timeline.duration_sec
         self.slider_progress.configure(state="normal", to=self.duration)
         self.progress_var.set(0.0)
         self.seek_offset = 0.0
@@ -214,6 +239,10 @@ class ModernPlayer(ctk.CTk):
     def on_slider_change(self, value):
         if not self.frames: return
         t = float(value)
+        # Can't seek past what has been analyzed yet
+        if not self.timeline.is_complete and t > self.timeline.ready_sec:
+            t = self.timeline.ready_sec
+            self.progress_var.set(t)
         self.seek_offset = t
         if self.is_playing:
             pygame.mixer.music.play(start=t)
@@ -224,6 +253,9 @@ class ModernPlayer(ctk.CTk):
         return f"{s//60}:{s%60:02d}"
 
     def update_loop(self):
+        if self.timeline is not None and not self.is_playable and self.timeline.is_ready_at(0.0, PLAYBACK_READY_MARGIN_S):
+            self._on_playable(self.current_filepath)
+            
         if self.is_playing and self.frames:
             pos_ms = pygame.mixer.music.get_pos()
             
@@ -250,11 +282,7 @@ class ModernPlayer(ctk.CTk):
     def _update_visual(self, time_sec: float):
         if not self.frames: return
         
-        idx = int(time_sec * self.analyzer.fps)
-        if idx >= len(self.frames):
-            idx = len(self.frames) - 1
-            
-        frame = self.frames[idx]
+        frame = self.frames[self.frames.index_at(time_sec)]
         
         r, g, b = frame.rgb
         brightness = frame.brightness
@@ -276,8 +304,19 @@ class ModernPlayer(ctk.CTk):
         # to ensure they map to Kicks/Snares and ignore fast Trap hats (16th notes are ~70-90ms at 140BPM).
         current_ms = time_sec * 1000.0
         cooldown_ms = 120.0  # 1/8 note at 250BPM. Fast enough for double kicks, slow enough to crush 16th-note trap hats.
-        
-        if raw_flash > 0.15:
+        prev_time, self.last_visual_time = self.last_visual_time, time_sec
+        
+        if len(self.frames.beat_times) and 0.0 < time_sec - prev_time < 0.25:
+            # Beat grid (complete offline analysis): strobes land exactly on the beats
+            # crossed since the last tick. Downbeats always bloom, scaled by energy.
+            flash = 0.0
+            if len(self.frames.beats_between(prev_time, time_sec)):
+                if len(self.frames.beats_between(prev_time, time_sec, downbeats=True)):
+                    raw_flash = max(raw_flash, 0.5 * energy_gate)
+                if raw_flash > 0.15:
+                    flash = raw_flash
+                    self.last_strobe_time = current_ms
+        elif raw_flash > 0.15:
             # This is a major structural hit
             if (current_ms - self.last_strobe_time) > cooldown_ms:
                 flash = raw_flash
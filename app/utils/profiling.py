@@ -0,0 +1,172 @@
+import json
+import threading
+import time
+
+import numpy as np
+
+
+class LatencyHistogram:
+    """
+    Fixed-size, log-spaced latency histogram (1 us .. 10 s).
+    Recording is O(1) with no allocation, so it can run every frame forever;
+    percentiles are read from the bin edges (~2% resolution). Recording and
+    summary() may run on different threads.
+    """
+    MIN_SEC = 1e-6
+    MAX_SEC = 10.0
+    BINS = 512
+
+    def __init__(self):
+        self.counts = np.zeros(self.BINS + 1, dtype=np.int64)   # Last bin: >= MAX_SEC
+        self.edges = np.geomspace(self.MIN_SEC, self.MAX_SEC, self.BINS + 1)
+        self._log_min = np.log(self.MIN_SEC)
+        self._log_step = (np.log(self.MAX_SEC) - self._log_min) / self.BINS
+        self.total = 0
+        self.max_sec = 0.0
+        self.sum_sec = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        if seconds <= self.MIN_SEC:
+            idx = 0
+        else:
+            idx = min(int((np.log(seconds) - self._log_min) / self._log_step), self.BINS)
+        with self._lock:
+            self.counts[idx] += 1
+            self.total += 1
+            self.sum_sec += seconds
+            if seconds > self.max_sec:
+                self.max_sec = seconds
+
+    def percentile(self, p: float) -> float:
+        """Upper edge of the bin holding the p-th percentile (0 if empty)."""
+        if self.total == 0:
+            return 0.0
+        rank = int(np.ceil(p / 100.0 * self.total))
+        idx = int(np.searchsorted(np.cumsum(self.counts), max(rank, 1)))
+        return float(self.edges[min(idx + 1, self.BINS)])
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "count": self.total,
+                "mean_ms": 1e3 * self.sum_sec / self.total if self.total else 0.0,
+                "p50_ms": 1e3 * self.percentile(50),
+                "p95_ms": 1e3 * self.percentile(95),
+                "p99_ms": 1e3 * self.percentile(99),
+                "max_ms": 1e3 * self.max_sec,
+            }
+
+
+class _StageTimer:
+    """Reusable context manager for one stage (no allocation per use)."""
+    __slots__ = ("hist", "_t0")
+
+    def __init__(self, hist: LatencyHistogram):
+        self.hist = hist
+        self._t0 = 0.0
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.record(time.perf_counter() - self._t0)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class StageProfiler:
+    """
+    Per-stage timing for a frame pipeline.
+
+        with profiler.stage("hpss"): ...
+        profiler.end_frame(frame_start)          # counts frames over the 1/fps budget
+        profiler.record_latency(seconds)         # capture-to-output latency
+
+    All timings use the monotonic perf_counter clock. When disabled every call
+    returns immediately (stage() hands back a shared no-op context), so the
+    instrumentation can stay in the hot path.
+
+    Several threads may record into one profiler (e.g. the analysis worker and
+    the UI thread) while another reads snapshot(); each stage name is timed
+    from one thread at a time.
+    """
+    def __init__(self, fps: float, enabled: bool = True):
+        self.enabled = enabled
+        self.budget_sec = 1.0 / fps
+        self.stages = {}
+        self._timers = {}
+        self.frames = LatencyHistogram()
+        self.latency = LatencyHistogram()
+        self.overruns = 0
+        self._lock = threading.Lock()  # Guards 'stages' (new names) and 'overruns'
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return _NULL_TIMER
+        timer = self._timers.get(name)
+        if timer is None:
+            with self._lock:
+                hist = self.stages[name] = LatencyHistogram()
+                timer = self._timers[name] = _StageTimer(hist)
+        return timer
+
+    def start_frame(self) -> float:
+        return time.perf_counter() if self.enabled else 0.0
+
+    def end_frame(self, frame_start: float):
+        if not self.enabled:
+            return
+        elapsed = time.perf_counter() - frame_start
+        self.frames.record(elapsed)
+        if elapsed > self.budget_sec:
+            with self._lock:
+                self.overruns += 1
+
+    def record_latency(self, seconds: float):
+        if self.enabled:
+            self.latency.record(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stages = list(self.stages.items())
+            overruns = self.overruns
+        return {
+            "budget_ms": 1e3 * self.budget_sec,
+            "frames": self.frames.summary(),
+            "overruns": overruns,
+            "capture_to_output": self.latency.summary(),
+            "stages": {name: hist.summary() for name, hist in stages},
+        }
+
+    def report(self) -> str:
+        snap = self.snapshot()
+        lines = [
+            f"Frames: {snap['frames']['count']} | Over budget ({snap['budget_ms']:.1f} ms): {snap['overruns']}",
+        ]
+        rows = [("frame total", snap["frames"])] + list(snap["stages"].items())
+        if snap["capture_to_output"]["count"]:
+            rows.append(("capture->output", snap["capture_to_output"]))
+        for name, s in rows:
+            lines.append(
+                f"  {name:16s} p50={s['p50_ms']:7.2f}ms p95={s['p95_ms']:7.2f}ms "
+                f"p99={s['p99_ms']:7.2f}ms max={s['max_ms']:7.2f}ms"
+            )
+        return "\n".join(lines)
+
+    def dump(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=4)
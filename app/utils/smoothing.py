@@ -1,4 +1,43 @@
-class ExponentialMovingAverage:
+import math
+
+from app.utils.snapshot import Snapshottable
+
+# Frame rate the engines' per-frame constants were originally tuned at (app.main / TrackAnalyzer).
+# Engines take their time constants in seconds and convert them with the helpers below,
+# so the same settings give the same look at any fps.
+REFERENCE_FPS = 20.0
+
+
+def time_constant(alpha: float, fps: float = REFERENCE_FPS) -> float:
+    """Time constant (seconds) of a per-frame EMA coefficient 'alpha' at 'fps'."""
+    return -1.0 / (fps * math.log(1.0 - alpha))
+
+
+def ema_alpha(time_constant_s: float, fps: float) -> float:
+    """Per-frame EMA coefficient for a time constant in seconds."""
+    return 1.0 - math.exp(-1.0 / (time_constant_s * fps))
+
+
+def decay_factor(time_constant_s: float, fps: float) -> float:
+    """Per-frame multiplier of an exponential decay with the given time constant."""
+    return math.exp(-1.0 / (time_constant_s * fps))
+
+
+def rescale_alpha(alpha: float, fps: float, ref_fps: float = REFERENCE_FPS) -> float:
+    """A per-frame coefficient tuned at 'ref_fps', converted to 'fps' (for coefficients computed on the fly)."""
+    if fps == ref_fps:
+        return alpha
+    return 1.0 - (1.0 - alpha) ** (ref_fps / fps)
+
+
+def frames_for(seconds: float, fps: float) -> int:
+    """Whole number of frames (at least one) spanning 'seconds'."""
+    return max(1, int(round(seconds * fps)))
+
+
+class ExponentialMovingAverage(Snapshottable):
+    STATE_FIELDS = ("value", "initialized")
+
     def __init__(self, alpha: float, initial_value: float = 0.0):
         self.alpha = alpha
         self.value = initial_value
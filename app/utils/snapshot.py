@@ -0,0 +1,54 @@
+import dataclasses
+import pickle
+from collections import deque
+
+import numpy as np
+
+
+class Snapshottable:
+    """
+    Snapshot/restore of an engine's mutable state.
+
+    Engines list the attributes that change while they run in STATE_FIELDS;
+    configuration (fps, rates, thresholds fixed at construction) is left out, so a
+    snapshot is small and restores into an engine built with the same arguments.
+    Nested engines are captured recursively, arrays and deques are copied and
+    state dataclasses are replaced, so a snapshot never aliases the live engine.
+    """
+    STATE_FIELDS: tuple = ()
+
+    def snapshot(self) -> dict:
+        return {name: _capture(getattr(self, name)) for name in self.STATE_FIELDS}
+
+    def restore(self, snap: dict):
+        for name in self.STATE_FIELDS:
+            current = getattr(self, name)
+            value = snap[name]
+            if isinstance(current, Snapshottable):
+                current.restore(value)
+            elif isinstance(current, deque):
+                current.clear()
+                current.extend(value)
+            else:
+                setattr(self, name, _capture(value))
+
+
+def _capture(value):
+    if isinstance(value, Snapshottable):
+        return value.snapshot()
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    if isinstance(value, deque):
+        return list(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.replace(value)
+    return value
+
+
+def snapshot_bytes(engine: Snapshottable) -> bytes:
+    """Serialized engine snapshot (checkpoints, hand-off between processes)."""
+    return pickle.dumps(engine.snapshot(), protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def restore_bytes(engine: Snapshottable, data: bytes):
+    engine.restore(pickle.loads(data))
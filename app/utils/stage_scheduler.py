@@ -0,0 +1,54 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class _Stage:
+    every: int        # Runs once every this many frames
+    next_frame: int   # Frame index of the next run
+    result: object = None
+    due: bool = False
+
+
+class StageScheduler:
+    """
+    Multi-rate frame pipeline: every stage declares how often it runs (Hz) and
+    is skipped in between, its last result held. Stages sharing a rate are
+    staggered onto different frames, so slow work doesn't pile up on one frame.
+
+    Per frame: tick(frames) once, then due(name) / run(name, fn, ...) per stage.
+    Stages added without a rate (or faster than the frame rate) run every frame.
+    """
+    def __init__(self, fps: float):
+        self.fps = fps
+        self.frame = -1
+        self._stages = {}
+
+    def add(self, name: str, rate_hz: float = None) -> int:
+        """Registers a stage; returns its period in frames (engines use fps / period)."""
+        every = 1 if not rate_hz else max(1, int(round(self.fps / rate_hz)))
+        offset = sum(1 for s in self._stages.values() if s.every == every) % every
+        self._stages[name] = _Stage(every=every, next_frame=offset)
+        return every
+
+    def rate(self, name: str) -> float:
+        """Effective update rate of a stage (Hz)."""
+        return self.fps / self._stages[name].every
+
+    def tick(self, frames: int = 1):
+        """Starts the next frame ('frames' > 1 when several were coalesced or dropped)."""
+        self.frame += frames
+        for stage in self._stages.values():
+            stage.due = self.frame >= stage.next_frame
+            if stage.due:
+                missed = (self.frame - stage.next_frame) // stage.every
+                stage.next_frame += (missed + 1) * stage.every
+
+    def due(self, name: str) -> bool:
+        return self._stages[name].due
+
+    def run(self, name: str, fn, *args, **kwargs):
+        """Calls fn when the stage is due this frame; otherwise returns its held result."""
+        stage = self._stages[name]
+        if stage.due:
+            stage.result = fn(*args, **kwargs)
+        return stage.result
@@ -1,8 +1,12 @@
 from collections import deque
 from statistics import mean
 
+from app.utils.snapshot import Snapshottable
+
+
+class TimeWindow(Snapshottable):
+    STATE_FIELDS = ("values",)
 
-class TimeWindow:
     def __init__(self, max_length: int):
         self.values = deque(maxlen=max_length)
 
@@ -0,0 +1,54 @@
+import os
+import time
+from app.audio.analysis_cache import AnalysisCache
+
+def _write(path, data: bytes):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def test_key_is_content_addressed(tmp_path):
+    """Same bytes under another name hit; different params miss."""
+    cache = AnalysisCache(str(tmp_path / "cache"))
+    a, b = tmp_path / "a.wav", tmp_path / "b.wav"
+    _write(a, b"same audio")
+    _write(b, b"same audio")
+
+    params = {"version": 1, "fps": 20.0}
+    assert cache.make_key(str(a), params) == cache.make_key(str(b), params)
+    assert cache.make_key(str(a), params) != cache.make_key(str(a), {"version": 1, "fps": 40.0})
+
+def test_roundtrip_and_lru_eviction(tmp_path):
+    """Least recently used entries are evicted once the size cap is exceeded."""
+    cache = AnalysisCache(str(tmp_path), max_bytes=10**9)
+    cache.put("old", list(range(1000)))
+    cache.put("new", list(range(1000)))
+    assert cache.get("old") == list(range(1000))
+
+    # Make 'new' the least recently used, then shrink the cap to fit a single entry
+    past = time.time() - 100
+    os.utime(os.path.join(str(tmp_path), "new" + AnalysisCache.ENTRY_EXT), (past, past))
+    cache.max_bytes = os.path.getsize(os.path.join(str(tmp_path), "old" + AnalysisCache.ENTRY_EXT))
+    cache._evict()
+
+    assert cache.contains("old")
+    assert not cache.contains("new")
+    assert cache.get("new") is None
+
+def test_stale_temp_files_are_removed_on_open(tmp_path):
+    """Temp files of killed writers go when the cache is opened; a write in progress is left alone."""
+    stale = tmp_path / ("abc" + AnalysisCache.ENTRY_EXT + ".4242" + AnalysisCache.TEMP_EXT)
+    stale_index = tmp_path / (AnalysisCache.INDEX_NAME + ".4242" + AnalysisCache.TEMP_EXT)
+    fresh = tmp_path / ("def" + AnalysisCache.ENTRY_EXT + ".4343" + AnalysisCache.TEMP_EXT)
+    for path in (stale, stale_index, fresh):
+        _write(path, b"partial")
+    past = time.time() - 2 * AnalysisCache.STALE_TEMP_SEC
+    for path in (stale, stale_index):
+        os.utime(path, (past, past))
+
+    cache = AnalysisCache(str(tmp_path))
+    assert not stale.exists() and not stale_index.exists()
+    assert fresh.exists()
+
+    # A known-dead writer's files go right away, whatever their age
+    assert cache.remove_temp_files(pid=4343) == 1
+    assert not fresh.exists()
@@ -0,0 +1,77 @@
+import time
+import numpy as np
+from app.audio.analysis_worker import LiveAnalysisWorker, OverloadPolicy
+from app.audio.ring_buffer import AudioRingBuffer
+
+def _backlogged_worker(policy, frames_waiting=5, chunk=4):
+    ring = AudioRingBuffer(64)
+    calls = []
+    worker = LiveAnalysisWorker(
+        ring, chunk, fps=20.0, policy=policy, max_backlog_frames=2,
+        analyze=lambda frame, end, light, n, skipped: calls.append((frame.copy(), end, light, n, skipped)),
+    )
+    ring.write(np.arange(frames_waiting * chunk, dtype=np.float32))
+    worker.process_pending()
+    return worker, calls
+
+def test_drop_oldest_keeps_newest_frame():
+    """Under overload only the newest frame is analyzed; the rest are counted as dropped."""
+    worker, calls = _backlogged_worker(OverloadPolicy.DROP_OLDEST)
+    assert len(calls) == 1
+    frame, end, light, n, skipped = calls[0]
+    assert np.array_equal(frame, np.arange(16, 20)) and end == 20 and n == 1
+    assert skipped == 16  # The analyzer is told about the gap
+    assert worker.stats.frames_dropped == 4
+    assert worker.stats.max_backlog == 5
+
+def test_coalesce_and_skip_heavy():
+    """Coalesce merges the backlog into one step; skip-heavy analyzes every frame lightly."""
+    worker, calls = _backlogged_worker(OverloadPolicy.COALESCE)
+    assert len(calls) == 1 and calls[0][3] == 5 and len(calls[0][0]) == 20 and calls[0][4] == 0
+    assert worker.stats.frames_coalesced == 4
+
+    worker, calls = _backlogged_worker(OverloadPolicy.SKIP_HEAVY)
+    assert [c[2] for c in calls] == [True, True, True, False, False]
+    assert worker.stats.frames_light == 3 and worker.stats.frames_dropped == 0
+
+def test_worker_thread_processes_notified_frames():
+    """The background thread picks up frames after notify()."""
+    ring = AudioRingBuffer(64)
+    seen = []
+    worker = LiveAnalysisWorker(ring, 4, fps=20.0, analyze=lambda f, e, l, n, s: seen.append(e))
+    worker.start()
+    try:
+        ring.write(np.ones(8, dtype=np.float32))
+        worker.notify()
+        for _ in range(100):
+            if len(seen) == 2:
+                break
+            time.sleep(0.01)
+    finally:
+        worker.stop()
+    assert seen == [4, 8]
+
+def test_ring_overrun_is_reported_as_a_gap():
+    """Samples the writer overwrote before they were read count as dropped and as skipped before the next frame."""
+    ring = AudioRingBuffer(16)
+    calls = []
+    worker = LiveAnalysisWorker(ring, 4, fps=20.0, policy=OverloadPolicy.SKIP_HEAVY, max_backlog_frames=8,
+                                analyze=lambda f, e, l, n, skipped: calls.append((e, skipped)))
+    ring.write(np.arange(24, dtype=np.float32))
+    worker.process_pending()
+    assert calls == [(12, 8), (16, 0), (20, 0), (24, 0)]
+    assert worker.stats.frames_dropped == 2
+
+def test_failing_frame_is_counted_and_skipped():
+    """A frame whose analysis raises is counted as an error; the frames after it are still analyzed."""
+    ring = AudioRingBuffer(64)
+    seen = []
+    def analyze(frame, end, light, n, skipped):
+        if end == 4:
+            raise ValueError("bad frame")
+        seen.append(end)
+    worker = LiveAnalysisWorker(ring, 4, fps=20.0, analyze=analyze, max_backlog_frames=8)
+    ring.write(np.zeros(12, dtype=np.float32))
+    worker.process_pending()
+    assert seen == [8, 12]
+    assert worker.stats.errors == 1 and worker.stats.frames_analyzed == 2
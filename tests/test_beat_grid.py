@@ -0,0 +1,51 @@
+import numpy as np
+
+from app.audio.beat_grid import track_beats
+from app.audio.timeline import AnalysisTimeline
+
+
+def _click_track(bpm, seconds, fps, first_beat=1.0, accent_every=4):
+    """Onset curve with one-frame clicks on every beat; every 'accent_every'-th beat is louder in 'accent'."""
+    n = int(seconds * fps)
+    onset = np.zeros(n)
+    accent = np.zeros(n)
+    beat_times = np.arange(first_beat, seconds - 0.5, 60.0 / bpm)
+    frames = (beat_times * fps).astype(int)
+    onset[frames] = 0.9
+    accent[frames] = 0.3
+    accent[frames[::accent_every]] = 1.0
+    return onset, accent, beat_times
+
+def test_grid_follows_fractional_period_click_track():
+    """128 BPM at 20 fps (a 9.375 frame period): tempo, beats, downbeats and pulse come out of the grid."""
+    fps = 20.0
+    onset, accent, true_beats = _click_track(128, 60, fps)
+    grid = track_beats(onset, fps, accent=accent)
+
+    assert abs(grid.bpm - 128) < 0.5
+    assert len(grid) == len(onset)
+    assert abs(len(grid.beat_times) - len(true_beats)) <= 1
+    # Every tracked beat sits within one frame of a true beat
+    nearest = np.abs(grid.beat_times[:, None] - true_beats[None, :]).min(axis=1)
+    assert nearest.max() <= 1.0 / fps
+    # Downbeats are the accented beats (every 4th from the first)
+    bar = 4 * 60.0 / 128
+    phase = np.mod(grid.downbeat_times - true_beats[0] + bar / 2, bar) - bar / 2
+    assert np.abs(phase).max() <= 1.0 / fps
+    # Per-frame tracks: steady tempo, full pulse on beat frames
+    inside = (np.arange(len(onset)) / fps > grid.beat_times[0]) & (np.arange(len(onset)) / fps < grid.beat_times[-1])
+    assert np.abs(grid.frame_bpm[inside] - 128).max() < 3
+    assert np.all(grid.frame_pulse[onset > 0] == 1.0)
+    assert grid.frame_confidence[inside].mean() > 0.5
+
+def test_timeline_beats_between():
+    """The grid travels with the timeline (views and publish) and answers beat-crossing queries."""
+    tl = AnalysisTimeline(20.0)
+    tl.set_beats([0.5, 1.0, 1.5, 2.0], [0.5, 2.0])
+    assert list(tl.beats_between(0.5, 1.5)) == [1.0, 1.5]
+    assert list(tl.beats_between(1.9, 2.1, downbeats=True)) == [2.0]
+    assert len(tl.beats_between(1.1, 1.4)) == 0
+
+    target = AnalysisTimeline(20.0)
+    target.publish(tl[0:0])
+    assert list(target.beat_times) == [0.5, 1.0, 1.5, 2.0]
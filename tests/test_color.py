@@ -44,3 +44,13 @@ def test_mood_stabilizer_drift_detection():
         
     # Should have triggered adaptation due to prolonged distance > 0.20
     assert stab.is_adapting == True
+
+def test_mood_stabilizer_same_response_at_any_fps():
+    """Time constants are in seconds: one second of input moves the center equally at 20 and 80 fps."""
+    centers = []
+    for fps in (20.0, 80.0):
+        stab = MoodStabilizer(initial_val=0.5, fps=fps)
+        for _ in range(int(fps)):
+            res = stab.update(0.9)
+        centers.append(res)
+    assert pytest.approx(centers[0], abs=1e-9) == centers[1]
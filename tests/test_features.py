@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+from app.audio.features import extract_frame_features, frame_view
+from app.audio.loudness import NoiseFilter, rms_loudness
+from app.audio.onset import onset_strength, normalize_onset
+from app.audio.pitch_register import PitchRegister, spectral_energy_bands
+from app.audio.spectrum import FrameSpectrum, spectrum_plan
+
+def test_frame_view_is_a_view():
+    """The 2-D frame view must not copy the signal."""
+    x = np.arange(10, dtype=np.float32)
+    frames = frame_view(x, 3)
+    assert frames.shape == (3, 3)
+    assert np.shares_memory(frames, x)
+    assert frames[2, 0] == 6.0
+
+def test_batch_features_match_per_frame_pipeline():
+    """Batch features should reproduce the per-frame feature functions."""
+    sr, fps = 8000, 20.0
+    rng = np.random.default_rng(1)
+    y = (0.1 * rng.standard_normal(sr) + 0.05).astype(np.float32)
+    y_h = (0.5 * y).astype(np.float32)
+    y_p = (0.5 * y).astype(np.float32)
+
+    feats = extract_frame_features(y, y_h, y_p, sr, fps, block_frames=3)
+    noise = NoiseFilter()
+    frame_size = int(sr / fps)
+
+    for i in range(len(feats)):
+        s = slice(i * frame_size, (i + 1) * frame_size)
+        frame = y[s] - np.mean(y[s])
+        assert pytest.approx(feats.rms[i], rel=1e-5) == rms_loudness(frame)
+        assert pytest.approx(feats.onset[i], abs=1e-5) == normalize_onset(onset_strength(y_p[s]))
+
+        bands = spectral_energy_bands(frame, sr, y_h[s])
+        assert pytest.approx(feats.band_low[i], rel=1e-5) == bands[PitchRegister.LOW]
+        assert pytest.approx(feats.band_mid[i], rel=1e-5) == bands[PitchRegister.MID]
+
+        # Flux carried across block boundaries must match the stateful filter
+        prev = noise.prev_spectrum
+        noise.update(0.0, frame)
+        if prev is not None:
+            expected = np.abs(noise.prev_spectrum[:len(prev) // 2] - prev[:len(prev) // 2]).sum() / (frame_size / 512.0)
+            assert pytest.approx(feats.flux[i], rel=1e-5) == expected
+
+def test_frame_spectrum_matches_per_stage_ffts():
+    """A shared FrameSpectrum gives the same gate and band results as separate FFTs."""
+    sr = 8000
+    rng = np.random.default_rng(2)
+    frames = [(0.1 * rng.standard_normal(400)).astype(np.float32) for _ in range(3)]
+
+    plain, shared = NoiseFilter(), NoiseFilter()
+    plain.min_music_rms = shared.min_music_rms = 0.0
+    for frame in frames:
+        spec = FrameSpectrum(frame, sr)
+        assert plain.update(0.05, frame=frame) == shared.update(0.05, spectrum=spec)
+        assert np.array_equal(plain.prev_spectrum, shared.prev_spectrum)
+
+        bands = spectral_energy_bands(frame, sr, spectrum=spec)
+        freqs = np.fft.rfftfreq(len(frame), d=1.0 / sr)
+        low = np.abs(np.fft.rfft(frame))[(freqs >= 20) & (freqs < 250)].sum()
+        assert bands[PitchRegister.LOW] * (sum(
+            spec.band_energy(*edges, harmonic=False) for edges in ((20, 250), (250, 2000), (2000, 8000))
+        ) + 1e-12) == pytest.approx(low)
+    assert spectrum_plan(400, sr) is spec.plan
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+import soundfile as sf
+from app.audio.file_source import frames_from_file, _pcm_wav_layout
+
+@pytest.mark.parametrize("fmt", ["WAV", "RF64"])
+def test_memmap_frames_match_soundfile(tmp_path, fmt):
+    """The memory-mapped PCM path must down-mix exactly like soundfile, into one reused buffer."""
+    rng = np.random.default_rng(0)
+    stereo = (0.3 * rng.standard_normal((8000 + 123, 2))).clip(-1, 1)
+    path = str(tmp_path / "pcm16.wav")
+    sf.write(path, stereo, 8000, subtype="PCM_16", format=fmt)
+    assert _pcm_wav_layout(path) is not None
+
+    info, frames = frames_from_file(path, fps=20.0, target_sr=None)
+    got, buffers = [], set()
+    for frame in frames:
+        buffers.add(frame.__array_interface__["data"][0])
+        got.append(frame.copy())
+
+    ref = sf.read(path, dtype="float32", always_2d=True)[0].mean(axis=1)
+    assert info.sample_rate == 8000
+    assert np.array_equal(np.concatenate(got), ref)
+    assert len(buffers) == 1
+
+def test_mono_float_wav_is_zero_copy(tmp_path):
+    """Mono float32 frames are views of the mapped file."""
+    path = str(tmp_path / "mono.wav")
+    sf.write(path, np.linspace(-1, 1, 4000, dtype=np.float32), 8000, subtype="FLOAT")
+
+    _, frames = frames_from_file(path, fps=20.0, target_sr=8000)
+    first = next(frames)
+    assert len(first) == 400
+    assert isinstance(first.base, np.ndarray) and not first.flags.writeable
@@ -0,0 +1,40 @@
+import numpy as np
+
+from app.audio.key_detection import MAJOR_PROFILE, MINOR_PROFILE, PITCH_NAMES, StreamingKeyEstimator, estimate_key
+
+
+def test_estimate_key_matches_the_correlation_loop():
+    """The 24-key matrix product picks the same key as correlating each rotated profile in turn."""
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        chroma = rng.random(12) ** 3
+        best, expected = -1, "Unknown"
+        for i in range(12):
+            for mode, profile in (("Maj", MAJOR_PROFILE), ("Min", MINOR_PROFILE)):
+                corr = np.corrcoef(chroma, np.roll(profile, i))[0, 1]
+                if corr > best:
+                    best, expected = corr, f"{PITCH_NAMES[i]} {mode}"
+        assert estimate_key(chroma) == expected
+    assert estimate_key(np.zeros(12)) == "Unknown"
+
+
+def test_streaming_key_follows_a_chord_progression():
+    """STFT columns of a G major progression (G C G D G) move the key off its "C Maj" default to
+    G Maj, and the switch margin holds it there through the D chord."""
+    sr, n_fft, hop = 22050, 2048, 512
+    g, c, d = (196.0, 246.9, 293.7), (261.6, 329.6, 392.0), (293.7, 370.0, 440.0)
+    chords = [g, c, g, d, g]
+    t = np.arange(2 * sr) / sr
+    y = np.concatenate([sum(np.sin(2 * np.pi * f * t) for f in chord) for chord in chords])
+
+    frames = np.lib.stride_tricks.sliding_window_view(y, n_fft)[::hop]
+    columns = np.abs(np.fft.rfft(frames * np.hanning(n_fft), axis=1))
+
+    est = StreamingKeyEstimator(sr, n_fft=n_fft, hop=hop)
+    assert est.key == "C Maj"
+    keys = []
+    for start in range(0, len(columns), 4):
+        est.update(columns[start:start + 4])
+        keys.append(est.estimate())
+    assert keys[-1] == "G Maj"
+    assert "D Maj" not in keys
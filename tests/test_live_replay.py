@@ -0,0 +1,75 @@
+import time
+import numpy as np
+import soundfile as sf
+from app.audio.capture import FileReplaySource
+from app.audio.analysis_worker import OverloadPolicy
+from app.audio.live_analyzer import LiveAnalyzer
+
+def test_file_replay_drives_live_path(tmp_path):
+    """A fast file replay goes through the live callback and worker without dropping frames."""
+    sr = 8000
+    t = np.arange(3 * sr) / sr
+    y = 0.3 * np.sin(2 * np.pi * 220 * t) * (1 + np.sign(np.sin(2 * np.pi * 2 * t)))
+    path = str(tmp_path / "replay.wav")
+    sf.write(path, np.stack([y, y], axis=1), sr)
+
+    source = FileReplaySource(path, realtime=False)
+    analyzer = LiveAnalyzer(fps=20.0, source=source, profile=True)
+    frames = []
+    def present(frame):
+        frames.append(frame)
+        analyzer.mark_presented(frame)
+        analyzer.mark_presented(frame)  # Repainting the same frame counts once
+    analyzer.on_frame = present
+
+    analyzer.start()
+    assert source.wait(timeout=30)
+    assert analyzer.worker.wait_idle()
+    analyzer.stop()
+
+    assert len(frames) == 60
+    assert analyzer.worker.stats.frames_dropped == 0
+    assert max(f.raw_rms for f in frames) > 0.1
+    assert analyzer.get_profile()["capture_to_output"]["count"] == 60
+
+def test_dropped_audio_keeps_the_frame_clock():
+    """Frames dropped before a step (whole or partial) advance the frame clock and the scheduler."""
+    analyzer = LiveAnalyzer(fps=20.0)
+    chunk = analyzer._prepare(8000)
+    analyzer.worker.stop()
+    frame = np.zeros(chunk, dtype=np.float32)
+
+    analyzer._analyze_chunk(frame, chunk)
+    analyzer._analyze_chunk(frame, 5 * chunk + chunk // 2, skipped=3 * chunk + chunk // 2)
+    assert analyzer.frame_count == 5
+    analyzer._analyze_chunk(frame, 7 * chunk, skipped=chunk // 2)
+    assert analyzer.frame_count == 7
+    assert analyzer.latest_analysis.time_sec == 7 / 20.0
+
+def test_coalesced_backlog_runs_through_the_live_analyzer(tmp_path):
+    """A backlog coalesced under COALESCE is analyzed at the standard frame size and advances the frame clock."""
+    sr = 8000
+    t = np.arange(2 * sr) / sr
+    y = 0.3 * np.sin(2 * np.pi * 220 * t) * (1 + np.sign(np.sin(2 * np.pi * 2 * t)))
+    path = str(tmp_path / "replay.wav")
+    sf.write(path, y, sr)
+
+    source = FileReplaySource(path, realtime=True)
+    analyzer = LiveAnalyzer(fps=20.0, source=source, overload_policy=OverloadPolicy.COALESCE)
+    frames = []
+    def slow_start(frame):
+        # The first frames stall the worker, so several frames pile up behind them
+        if len(frames) < 3:
+            time.sleep(0.25)
+        frames.append(frame)
+    analyzer.on_frame = slow_start
+
+    analyzer.start()
+    assert source.wait(timeout=30)
+    assert analyzer.worker.wait_idle()
+    analyzer.stop()
+
+    stats = analyzer.worker.stats
+    assert stats.frames_coalesced > 0 and stats.errors == 0
+    assert len(frames) < source.chunks_delivered
+    assert analyzer.frame_count == source.chunks_delivered
@@ -0,0 +1,59 @@
+import numpy as np
+
+from app.audio.onset_detector import SpectralFluxOnsetDetector
+from app.lighting.pulse import PulseTracker
+
+
+def _kicks(sr, times, duration):
+    """Decaying 60 Hz bursts with a click, starting at 'times' (seconds)."""
+    y = 0.01 * np.random.default_rng(0).standard_normal(int(duration * sr))
+    t = np.arange(int(0.15 * sr)) / sr
+    kick = np.sin(2 * np.pi * 60 * t) * np.exp(-t / 0.04)
+    kick[:32] += np.linspace(1.0, 0.0, 32)
+    for start in times:
+        i = int(round(start * sr))
+        y[i:i + len(kick)] += 0.8 * kick[:len(y) - i]
+    return y.astype(np.float32)
+
+
+def test_onsets_are_placed_below_the_frame_period():
+    """Kicks are found at their sample position within a few ms, though fed in 25 ms frames."""
+    sr = 44100
+    times = np.arange(1.0, 10.0, 60.0 / 128) + 0.0037
+    y = _kicks(sr, times, 10.5)
+    detector = SpectralFluxOnsetDetector(sr)
+
+    chunk = sr // 40
+    onsets = []
+    for end in range(chunk, len(y) + 1, chunk):
+        onsets += detector.process_audio(y[end - chunk:end], end)
+
+    found = np.array([e.position for e in onsets]) / sr
+    assert len(found) == len(times)
+    assert np.max(np.abs(found - times)) < 0.004
+    assert min(e.bands[0] for e in onsets) > 0.3  # Identical kicks; only the hop alignment varies
+
+
+def test_steady_noise_gives_no_onsets():
+    """Stationary noise stays under the adaptive threshold and the band floors."""
+    sr = 22050
+    y = 0.05 * np.random.default_rng(1).standard_normal(5 * sr).astype(np.float32)
+    detector = SpectralFluxOnsetDetector(sr)
+    assert detector.process_audio(y, len(y)) == []
+
+
+def test_pulse_tracker_locks_to_event_times():
+    """Sub-frame onset events put the beat clock on the true beat, not on frame boundaries."""
+    fps = 40.0
+    period = 60.0 / 128
+    beats = np.arange(0.0113, 31, period)
+    tracker = PulseTracker(fps, onset_peak_th=0.6, refractory_s=0.10)
+    errors = []
+    for i in range(int(30 * fps)):
+        end = (i + 1) / fps
+        events = [(t - end, 0.9) for t in beats if end - 1.0 / fps < t <= end]
+        state = tracker.update(0.0, period_s=period, events=events)
+        if i > 10 * fps:
+            errors.append(np.min(np.abs(beats - (end + state.next_beat_in))))
+    assert state.phase_confidence > 0.9
+    assert np.max(errors) < 0.003
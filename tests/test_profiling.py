@@ -0,0 +1,53 @@
+import json
+import threading
+from app.utils.profiling import LatencyHistogram, StageProfiler
+
+def test_histogram_percentiles():
+    """Percentiles come from fixed log bins, accurate to a few percent."""
+    hist = LatencyHistogram()
+    for ms in range(1, 101):
+        hist.record(ms / 1000.0)
+    assert hist.total == 100
+    assert abs(hist.percentile(50) - 0.050) < 0.003
+    assert abs(hist.percentile(99) - 0.099) < 0.005
+    assert hist.max_sec == 0.1
+
+def test_profiler_stages_overruns_and_dump(tmp_path):
+    """Stages are recorded when enabled, frames over 1/fps are counted, and the snapshot dumps to JSON."""
+    prof = StageProfiler(fps=20.0)
+    with prof.stage("hpss"):
+        pass
+    prof.end_frame(prof.start_frame() - 0.2)   # Pretend the frame took 200 ms
+    prof.record_latency(0.03)
+
+    path = tmp_path / "profile.json"
+    prof.dump(str(path))
+    snap = json.loads(path.read_text())
+    assert snap["overruns"] == 1
+    assert snap["stages"]["hpss"]["count"] == 1
+    assert snap["capture_to_output"]["count"] == 1
+
+    off = StageProfiler(fps=20.0, enabled=False)
+    with off.stage("hpss"):
+        pass
+    off.end_frame(off.start_frame())
+    assert off.stages == {} and off.frames.total == 0
+
+def test_profiler_records_from_several_threads():
+    """The worker and the UI thread record at once while stats are read: nothing is lost."""
+    prof = StageProfiler(fps=20.0)
+    def record(name):
+        for _ in range(5000):
+            with prof.stage(name):
+                pass
+            prof.record_latency(0.01)
+    threads = [threading.Thread(target=record, args=(name,)) for name in ("analysis", "ui_paint")]
+    for t in threads:
+        t.start()
+    while any(t.is_alive() for t in threads):
+        prof.snapshot()
+    for t in threads:
+        t.join()
+    snap = prof.snapshot()
+    assert snap["capture_to_output"]["count"] == prof.latency.counts.sum() == 10000
+    assert snap["stages"]["analysis"]["count"] == snap["stages"]["ui_paint"]["count"] == 5000
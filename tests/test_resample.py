@@ -0,0 +1,41 @@
+import numpy as np
+import soundfile as sf
+from scipy.signal import resample_poly
+from app.audio.file_source import frames_from_file
+from app.audio.resample import StreamingResampler
+
+def test_streaming_resampler_matches_one_shot():
+    """Random block sizes must give the same output as scipy's one-shot resample_poly."""
+    rng = np.random.default_rng(0)
+    x = rng.standard_normal(48000).astype(np.float32)
+    r = StreamingResampler(48000, 44100)
+
+    parts, i = [], 0
+    while i < len(x):
+        n = int(rng.integers(1, 4000))
+        parts.append(r.process(x[i:i + n]))
+        i += n
+    parts.append(r.flush())
+    y = np.concatenate(parts)
+
+    ref = resample_poly(x, 147, 160)
+    assert len(y) == len(ref)
+    assert np.allclose(y, ref, atol=1e-5)
+
+def test_frames_from_file_resamples_48k(tmp_path):
+    """A 48 kHz stereo file is streamed as 44.1 kHz mono frames."""
+    sr = 48000
+    t = np.arange(2 * sr) / sr
+    stereo = np.stack([np.sin(2 * np.pi * 440 * t), np.sin(2 * np.pi * 440 * t)], axis=1) * 0.5
+    path = tmp_path / "master.wav"
+    sf.write(path, stereo, sr, subtype="FLOAT")
+
+    info, frames = frames_from_file(str(path), fps=20.0, target_sr=44100)
+    frames = list(frames)
+    assert info.sample_rate == 44100
+    assert all(len(f) == 2205 for f in frames)
+    assert len(frames) == 40
+
+    y = np.concatenate(frames)
+    ref = resample_poly(stereo.mean(axis=1), 147, 160)
+    assert np.allclose(y, ref, atol=1e-5)
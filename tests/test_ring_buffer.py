@@ -0,0 +1,32 @@
+import numpy as np
+from app.audio.ring_buffer import AudioRingBuffer
+
+def test_latest_is_contiguous_across_wrap():
+    """The newest samples come back in order as a view, even after wrapping."""
+    ring = AudioRingBuffer(10)
+    ring.write(np.arange(7, dtype=np.float32))
+    ring.write(np.arange(7, 14, dtype=np.float32))
+
+    last = ring.latest(8)
+    assert np.array_equal(last, np.arange(6, 14))
+    assert np.shares_memory(last, ring._buf)
+
+    # Oversized writes keep only the newest 'capacity' samples
+    ring.write(np.arange(100, 125, dtype=np.float32))
+    assert np.array_equal(ring.latest(10), np.arange(115, 125))
+    assert ring.total_written == 39
+
+def test_independent_readers_and_overrun():
+    """Each reader has its own cursor; a lagging reader skips ahead and counts the loss."""
+    ring = AudioRingBuffer(8)
+    fast = ring.reader()
+    slow = ring.reader()
+
+    ring.write(np.arange(5, dtype=np.float32))
+    assert np.array_equal(fast.read(), np.arange(5))
+    ring.write(np.arange(5, 10, dtype=np.float32))
+    assert np.array_equal(fast.read(3), np.arange(5, 8))
+    assert fast.pending == 2
+
+    assert np.array_equal(slow.read(), np.arange(2, 10))
+    assert slow.overrun_samples == 2
@@ -0,0 +1,52 @@
+import numpy as np
+
+from app.audio.features import FrameFeatures
+from app.audio.player_backend import FrameMapper
+from app.utils.snapshot import restore_bytes, snapshot_bytes
+
+
+def _features(n, seed=0):
+    rng = np.random.default_rng(seed)
+    bands = rng.dirichlet([2.0, 2.0, 1.0], size=n)
+    beat = (np.arange(n) % 10 == 0).astype(float)
+    return FrameFeatures(
+        rms=0.05 + 0.1 * rng.random(n),
+        flux=5.0 * rng.random(n),
+        onset=np.clip(0.9 * beat + 0.2 * rng.random(n), 0.0, 1.0),
+        band_low=bands[:, 0],
+        band_mid=bands[:, 1],
+        band_high=bands[:, 2],
+    )
+
+
+def test_restored_engines_replay_exactly():
+    """Restoring a snapshot (via bytes) into a fresh mapper replays the same frames, causal tempo/pulse included."""
+    features = _features(600)
+    mapper = FrameMapper(fps=20.0)
+    mapper.map(features[:250], "A Min")
+    data = snapshot_bytes(mapper)
+    expected = mapper.map(features[250:], "A Min").columns()
+
+    fresh = FrameMapper(fps=20.0)
+    restore_bytes(fresh, data)
+    assert fresh.frame_index == 250
+    replay = fresh.map(features[250:], "A Min").columns()
+    for name, col in expected.items():
+        assert np.array_equal(replay[name], col), name
+    assert len(data) < 8192
+
+
+def test_mapping_resumes_from_the_nearest_checkpoint():
+    """A mapper resumed at frame 430 restarts from the frame-400 checkpoint and matches the full pass."""
+    features = _features(900, seed=1)
+    full_mapper = FrameMapper(fps=20.0)
+    full = full_mapper.map(features, "D Maj", checkpoint_every=200).columns()
+    assert sorted(full_mapper.checkpoints) == [0, 200, 400, 600, 800]
+
+    mapper = FrameMapper(fps=20.0)
+    mapper.checkpoints = full_mapper.checkpoints
+    start = mapper.resume(430)
+    assert start == 400
+    tail = mapper.map(features[start:], "D Maj").columns()
+    for name, col in full.items():
+        assert np.array_equal(tail[name], col[start:]), name
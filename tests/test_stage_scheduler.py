@@ -0,0 +1,46 @@
+from app.utils.stage_scheduler import StageScheduler
+
+
+def test_stages_run_at_their_rate_staggered_and_hold_results():
+    """Half-rate stages alternate frames, a 2 Hz stage runs every 20th frame, results are held."""
+    sched = StageScheduler(fps=40.0)
+    assert sched.add("bands", rate_hz=20.0) == 2
+    assert sched.add("mood", rate_hz=20.0) == 2
+    assert sched.add("key", rate_hz=2.0) == 20
+    sched.add("rms")
+
+    runs = {"bands": [], "mood": [], "key": [], "rms": []}
+    held = []
+    for frame in range(40):
+        sched.tick()
+        for name in runs:
+            if sched.due(name):
+                runs[name].append(frame)
+        held.append(sched.run("bands", lambda f=frame: f))
+
+    assert runs["rms"] == list(range(40))
+    assert runs["bands"] == list(range(0, 40, 2))
+    assert runs["mood"] == list(range(1, 40, 2))  # Staggered against "bands"
+    assert runs["key"] == [0, 20]
+    assert held[:4] == [0, 0, 2, 2]
+
+
+def test_coalesced_frames_keep_the_schedule():
+    """A tick standing for several frames runs each due stage once and stays on its grid."""
+    sched = StageScheduler(fps=40.0)
+    sched.add("key", rate_hz=2.0)
+    due = []
+    for frames in [1, 5, 30, 1, 3, 1]:
+        sched.tick(frames)
+        due.append(sched.due("key"))
+    # Frames 0, 5, 35, 36, 39, 40: due at 0, then at 35 (covers 20), then at 40
+    assert due == [True, False, True, False, False, True]
+
+
+def test_live_mood_runs_at_half_the_frame_rate():
+    """The live mood/color stage runs every other frame whatever the fps, and its engines get that rate."""
+    from app.audio.live_analyzer import LiveAnalyzer
+    for fps in (20.0, 30.0, 40.0, 60.0):
+        analyzer = LiveAnalyzer(fps=fps)
+        assert analyzer.scheduler.rate("mood_color") == fps / 2
+        assert analyzer.mood_engine.fps == fps / 2
@@ -0,0 +1,51 @@
+import numpy as np
+
+from app.lighting.pulse import PulseTracker
+from app.lighting.strobe import BeatPrediction, StrobeScheduler
+
+
+def test_pulse_tracker_predicts_next_beat():
+    """The beat clock locks to a 140 BPM kick/hat train even when the given period is 4% off."""
+    fps = 40.0
+    period = 60.0 / 140
+    n = int(30 * fps)
+    beats = np.arange(0.013, 31, period)
+    onset = np.zeros(n)
+    onset[(beats[beats < 30] * fps).astype(int)] = 0.9
+    hats = beats[beats < 29.5] + period / 2
+    onset[(hats * fps).astype(int)] = 0.7  # Off-beat peaks must not pull the clock
+
+    tracker = PulseTracker(fps, onset_peak_th=0.6, refractory_s=0.10)
+    errors = []
+    for i, o in enumerate(onset):
+        state = tracker.update(o, period_s=period * 1.04)
+        if i > 10 * fps:
+            predicted = i / fps + state.next_beat_in
+            errors.append(np.min(np.abs(beats - predicted)))
+    assert state.phase_confidence > 0.9
+    assert abs(state.beat_period - period) < 0.01
+    # Within one frame of the true beat (frame-start timing)
+    assert np.max(errors) <= 1.0 / fps
+
+def test_scheduler_fires_each_beat_once_ahead_of_latency():
+    """A strobe fires at beat time minus output latency, once per beat, and never late."""
+    sched = StrobeScheduler(output_latency_s=0.030, max_late_s=0.020)
+    beat = BeatPrediction(time=10.0, period=0.5, phase=0.8, confidence=0.9)
+
+    sched.predict(beat, strength=0.7)
+    assert sched.next_fire_time == 10.0 - 0.030
+    assert sched.poll(9.90) == 0.0
+    assert sched.poll(9.97) == 0.7
+
+    # The same beat is predicted again until it passes: it schedules the next one instead
+    sched.predict(beat, strength=0.7)
+    assert sched.poll(9.99) == 0.0
+    assert sched.next_fire_time == 10.5 - 0.030
+
+    # Polled too late: skipped, not flashed
+    assert sched.poll(10.5) == 0.0
+    assert sched.fired == 1 and sched.skipped == 1
+
+    # Low confidence clears the schedule (callers fall back to reactive strobes)
+    sched.predict(BeatPrediction(time=11.0, period=0.5, phase=0.0, confidence=0.2), strength=0.7)
+    assert not sched.is_locked
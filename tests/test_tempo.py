@@ -0,0 +1,38 @@
+import numpy as np
+from app.audio.tempo import ResonatorBPM
+
+def _reference_density(iois, bpm, tolerance=0.10):
+    period = 60.0 / bpm
+    matches = 0.0
+    for ioi in iois:
+        if abs(ioi - period) / period < tolerance:
+            matches += 1.0
+        elif abs(ioi - 2 * period) / (2 * period) < tolerance:
+            matches += 0.5
+    return matches / (len(iois) + 0.0001)
+
+def test_broadcast_density_matches_loop():
+    """All-bin density scores equal the per-IOI loop, at a quarter-BPM resolution."""
+    tempo = ResonatorBPM(fps=20.0, bpm_step=0.25)
+    assert tempo.n_bins == 481 and tempo.bpms[-1] == 180.0
+    for ioi in [0.5, 0.47, 1.0, 0.25, 0.52, 0.9]:
+        tempo._push_ioi(ioi)
+
+    scores = tempo.density_scores
+    for idx in (0, 100, 240, 480):
+        assert np.isclose(scores[idx], _reference_density(tempo.ioi_buffer, tempo.bpms[idx]))
+    # Half/double candidates follow the bin size
+    idx_128 = int((128 - 60) / 0.25)
+    assert tempo.bpms[tempo._half_idx[idx_128]] == 64.0
+    assert tempo._double_idx[idx_128] == -1
+
+def test_fine_bank_locks_to_tempo():
+    """A steady 128 BPM onset train is tracked with a 0.25 BPM bank."""
+    np.random.seed(0)
+    fps = 20.0
+    tempo = ResonatorBPM(fps=fps, bpm_step=0.25)
+    t = np.arange(int(60 * fps)) / fps
+    onsets = 0.9 * (np.mod(t, 60 / 128) < 1 / fps)
+    for o in onsets:
+        state = tempo.update(o)
+    assert abs(state.bpm - 128) < 3
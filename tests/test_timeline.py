@@ -0,0 +1,37 @@
+import pickle
+import numpy as np
+from app.audio.timeline import AnalysisTimeline, COLUMNS
+
+def _block(n, fps=20.0, offset=0):
+    cols = {name: np.arange(offset, offset + n, dtype=np.float64) for name in COLUMNS}
+    rgb = np.full((n, 3), 7, dtype=np.uint8)
+    return AnalysisTimeline.from_columns(fps, "C Maj", rgb, **cols)
+
+def test_index_and_slice_view():
+    """Int indexing gives a FrameAnalysis, slicing shares memory with the columns."""
+    tl = _block(10)
+    frame = tl[3]
+    assert frame.rgb == (7, 7, 7)
+    assert frame.brightness == 3.0
+    assert frame.key == "C Maj"
+    assert frame.debug_data["exert_low"] == 3.0
+    assert tl.index_at(99.0) == 9
+
+    view = tl[2:5]
+    assert len(view) == 3
+    assert np.shares_memory(view.brightness, tl.brightness)
+
+def test_progressive_extend_and_publish():
+    """Extend moves the ready watermark; pickling keeps only the ready range."""
+    tl = AnalysisTimeline(20.0)
+    tl.reserve(20)
+    tl.extend(_block(5))
+    assert len(tl) == 5 and not tl.is_complete
+    assert tl.is_ready_at(0.0, margin_sec=0.2)
+    assert not tl.is_ready_at(0.0, margin_sec=1.0)
+
+    restored = pickle.loads(pickle.dumps(tl))
+    assert len(restored.brightness) == 5
+
+    tl.publish(_block(20))
+    assert len(tl) == 20 and tl.is_complete
@@ -0,0 +1,182 @@
+import librosa
+import numpy as np
+import soundfile as sf
+
+from app.audio import file_source, parallel_analysis, player_backend
+from app.audio.analysis_cache import AnalysisCache
+from app.audio.features import extract_frame_features
+from app.audio.file_source import SampleWindow
+from app.audio.key_detection import estimate_key
+from app.audio.parallel_analysis import analyze_segment, seam_matches
+from app.audio.player_backend import TrackAnalyzer
+from app.audio.timeline import AnalysisTimeline
+
+
+def test_sample_window_releases_what_was_read():
+    """Blocks are read on demand, ranges can span blocks, released samples are gone."""
+    window = SampleWindow(np.arange(i * 10, i * 10 + 10, dtype=np.float32) for i in range(5))
+    window.fill(15)
+    assert window.end == 20 and not window.exhausted
+    assert np.array_equal(window.get(8, 13), [8, 9, 10, 11, 12])
+    window.release(12)
+    assert window.start == 12
+    window.fill(100)
+    assert window.exhausted and window.end == 50
+    assert np.array_equal(window.get(45, 60), [45, 46, 47, 48, 49])
+
+
+def _write_set(path, seconds, sr=22050):
+    rng = np.random.default_rng(0)
+    t = np.arange(seconds * sr) / sr
+    mix = 0.3 * np.sin(2 * np.pi * 220 * t) * (1 + np.sin(2 * np.pi * 0.25 * t)) + 0.02 * rng.standard_normal(len(t))
+    mix[::sr // 2] += 0.9  # Clicks
+    sf.write(path, np.stack([mix, 0.5 * mix], axis=1).clip(-1, 1), sr, subtype="PCM_16")
+    return path
+
+
+def test_block_features_and_key_match_the_whole_file_waveform_path(tmp_path, monkeypatch):
+    """Per-frame features of the block loop equal one whole-file HPSS + waveform feature pass, and the key its chroma_cqt key."""
+    monkeypatch.setattr(TrackAnalyzer, "load_global_baselines", staticmethod(lambda: None))
+    sr, fps = 22050, 20.0
+    rng = np.random.default_rng(1)
+    t = np.arange(10 * sr) / sr
+    y = sum(0.15 * np.sin(2 * np.pi * f * t) for f in (220.0, 261.6, 329.6))  # A minor triad
+    y = y + 0.01 * rng.standard_normal(len(t))
+    y[::sr // 2] += 0.8  # Clicks
+    path = str(tmp_path / "triad.wav")
+    sf.write(path, y.clip(-1, 1), sr, subtype="FLOAT")
+
+    analyzer = TrackAnalyzer(target_sr=sr)
+    timeline = analyzer.analyze_progressive(path, AnalysisTimeline(fps))
+
+    y, _ = librosa.load(path, sr=sr)
+    y_harmonic, y_percussive = librosa.effects.hpss(y)
+    expected = extract_frame_features(y, y_harmonic, y_percussive, sr, fps)
+    assert len(analyzer.features) == len(expected) == 200
+    for name in ("rms", "flux", "onset", "band_low", "band_mid", "band_high"):
+        assert np.allclose(getattr(analyzer.features, name), getattr(expected, name), rtol=1e-4, atol=1e-6), name
+    assert timeline.key == estimate_key(np.sum(librosa.feature.chroma_cqt(y=y, sr=sr), axis=1)) == "A Min"
+
+
+def test_streaming_analysis_publishes_frames_before_the_file_is_decoded(tmp_path, monkeypatch):
+    """In streaming mode the first block reaches the timeline after only its own audio (plus look-ahead) was decoded."""
+    monkeypatch.setattr(TrackAnalyzer, "load_global_baselines", staticmethod(lambda: None))
+    sr = 22050
+    path = _write_set(str(tmp_path / "set.wav"), 30, sr)
+
+    decoded = []
+    def counting_frames_from_file(*args, **kwargs):
+        info, blocks = file_source.frames_from_file(*args, **kwargs)
+        return info, (decoded.append(len(b)) or b for b in blocks)
+    monkeypatch.setattr(player_backend, "frames_from_file", counting_frames_from_file)
+
+    class Timeline(AnalysisTimeline):
+        decoded_at_first_extend = None
+        def extend(self, block):
+            if self.decoded_at_first_extend is None:
+                self.decoded_at_first_extend = sum(decoded)
+            super().extend(block)
+
+    timeline = Timeline(20.0)
+    TrackAnalyzer(target_sr=sr, streaming=True).analyze_progressive(path, timeline)
+    assert sum(decoded) == 30 * sr
+    assert timeline.decoded_at_first_extend < 10 * sr
+
+
+def test_streaming_analysis_matches_whole_file(tmp_path, monkeypatch):
+    """Block-streamed decoding with small blocks gives the whole-file timeline."""
+    monkeypatch.setattr(TrackAnalyzer, "load_global_baselines", staticmethod(lambda: None))
+    sr = 22050
+    path = _write_set(str(tmp_path / "set.wav"), 14, sr)
+
+    whole = TrackAnalyzer(target_sr=sr).analyze_progressive(path, AnalysisTimeline(20.0))
+    streamed = TrackAnalyzer(target_sr=sr, streaming=True, max_block_sec=4.0).analyze_progressive(path, AnalysisTimeline(20.0))
+
+    assert len(streamed) == len(whole) == 280
+    assert streamed.key == whole.key
+    for name, col in whole.columns().items():
+        assert np.allclose(streamed.columns()[name], col, atol=1e-4), name
+
+
+def test_segmented_analysis_stitches_to_the_streaming_timeline(tmp_path, monkeypatch):
+    """Two segments analyzed in worker processes stitch into the streaming timeline, and their seam checks out."""
+    monkeypatch.setattr(TrackAnalyzer, "load_global_baselines", staticmethod(lambda: None))
+    sr = 22050
+    path = _write_set(str(tmp_path / "set.wav"), 24, sr)
+
+    streamed = TrackAnalyzer(target_sr=sr, streaming=True).analyze_progressive(path, AnalysisTimeline(20.0))
+    segmented = TrackAnalyzer(target_sr=sr, segment_workers=2).analyze_progressive(path, AnalysisTimeline(20.0))
+    assert len(segmented) == len(streamed) == 480
+    assert segmented.key == streamed.key
+    for name, col in streamed.columns().items():
+        assert np.allclose(segmented.columns()[name], col, atol=1e-4), name
+
+    first = analyze_segment(path, 20.0, sr, 0, 240)
+    second = analyze_segment(path, 20.0, sr, 240, 480)
+    assert seam_matches(first, second)
+    second.lead.rms[:] = first.features.rms[-len(second.lead) - 1:-1]  # One frame late, like an inexact seek
+    assert not seam_matches(first, second)
+
+
+def test_mapping_change_remaps_from_cached_features(tmp_path, monkeypatch):
+    """After a MAPPING_VERSION bump the timeline misses, and is rebuilt from the cached feature layer without audio work."""
+    monkeypatch.setattr(TrackAnalyzer, "load_global_baselines", staticmethod(lambda: None))
+    sr = 22050
+    path = _write_set(str(tmp_path / "set.wav"), 6, sr)
+    cache = AnalysisCache(str(tmp_path / "cache"))
+
+    analyzer = TrackAnalyzer(target_sr=sr, cache=cache)
+    first, _ = analyzer.analyze_timeline(path)
+    assert analyzer.has_cached_features(path)
+
+    def no_audio(*args, **kwargs):
+        raise AssertionError("features should come from the cache")
+
+    monkeypatch.setattr(player_backend, "MAPPING_VERSION", player_backend.MAPPING_VERSION + 1)
+    monkeypatch.setattr(TrackAnalyzer, "_analyze_features", no_audio)
+    analyzer = TrackAnalyzer(target_sr=sr, cache=cache)
+    assert not analyzer.is_cached(path)
+    remapped, key = analyzer.analyze_timeline(path)
+    assert key == first.key and analyzer.is_cached(path)
+    for name, col in first.columns().items():
+        assert np.array_equal(remapped.columns()[name], col), name
+
+
+def test_cache_hits_survive_memory_bank_digests_and_write_no_log(tmp_path, monkeypatch):
+    """A digested song (counter bump, tiny baseline nudge) keeps the timeline cached; a hit logs nothing new."""
+    from app.audio.memory_bank import SongMemoryBank
+
+    history = tmp_path / "history"
+    model = SongMemoryBank(str(history)).model
+    monkeypatch.setattr(TrackAnalyzer, "load_global_baselines", staticmethod(lambda: dict(model)))
+    monkeypatch.setattr(player_backend, "_history_dir", lambda: str(history))
+    sr = 22050
+    path = _write_set(str(tmp_path / "set.wav"), 4, sr)
+
+    analyzer = TrackAnalyzer(target_sr=sr, cache=AnalysisCache(str(tmp_path / "cache")))
+    _, first_log = analyzer.analyze_file(path)
+    assert first_log and not analyzer.from_cache
+
+    model["total_songs_digested"] += 1
+    model["typical_valence"] += 0.001
+    assert analyzer.is_cached(path)
+    _, log = analyzer.analyze_file(path)
+    assert analyzer.from_cache and log == first_log
+    assert len(list(history.glob("*.csv"))) == 1
+
+    model["global_dominance_anchor"] += 0.05  # A drift the mapping would show
+    assert not analyzer.is_cached(path)
+
+
+def test_seam_mismatches_are_reported_through_the_progress_callback(tmp_path, monkeypatch, capsys):
+    """A seam that fails its check is re-read and reported to the caller, not printed by the library."""
+    sr = 22050
+    path = _write_set(str(tmp_path / "set.wav"), 24, sr)
+    monkeypatch.setattr(parallel_analysis, "seam_matches", lambda before, after: False)
+
+    messages = []
+    features, _ = parallel_analysis.analyze_segments(path, 20.0, sr, 480, 2, progress_callback=lambda p, msg: messages.append(msg))
+    assert len(features) == 480
+    seam = [msg for msg in messages if "seam at 12.0s" in msg]
+    assert len(seam) == 2 and "re-reading" in seam[0] and seam[1].startswith("Warning")
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,83 @@
+import sys
+import os
+import argparse
+import time
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.audio.analysis_cache import AnalysisCache
+from app.audio.library_analysis import LibraryAnalyzer, find_audio_files
+from app.audio.player_backend import TrackAnalyzer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-analyze a music library into the analysis cache")
+    parser.add_argument("folder", help="Music folder (searched recursively), or one file with --split")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Per-file timeout in seconds")
+    parser.add_argument("--fps", type=float, default=20.0, help="Analysis frame rate (must match the player)")
+    parser.add_argument("--cache-dir", default=AnalysisCache.default_dir(), help="Analysis cache directory")
+    parser.add_argument("--cache-size-gb", type=float, default=4.0, help="Cache size cap in GB")
+    parser.add_argument("--streaming", action="store_true", help="Decode in blocks so memory stays bounded (long DJ sets)")
+    parser.add_argument("--split", action="store_true", help="Analyze one long file in segments across the workers")
+    args = parser.parse_args()
+
+    if args.split:
+        split_file(args)
+        return
+
+    files = find_audio_files(args.folder)
+    if not files:
+        print(f"No audio files found in {args.folder}")
+        return
+
+    library = LibraryAnalyzer(
+        cache_dir=args.cache_dir,
+        fps=args.fps,
+        workers=args.workers,
+        timeout_s=args.timeout,
+        cache_max_bytes=int(args.cache_size_gb * 1024 ** 3),
+        streaming=args.streaming,
+    )
+    print(f"Pre-analyzing {len(files)} tracks with {library.workers} workers "
+          f"(already cached tracks are skipped, so an interrupted run can simply be restarted)")
+
+    def on_result(res, done, total):
+        line = f"[{done}/{total}] {res.status.upper():8s} {os.path.basename(res.path)} ({res.wall_sec:.1f}s)"
+        if res.error:
+            line += f" -> {res.error}"
+        print(line)
+
+    try:
+        summary = library.run(files, on_result=on_result)
+    except KeyboardInterrupt:
+        print("\nInterrupted. Finished tracks are cached; re-run the same command to resume.")
+        return
+
+    print("-" * 60)
+    print(summary.report())
+
+
+def split_file(args):
+    """One long recording (e.g. a DJ set): its segments are spread over the workers instead of whole files."""
+    if not os.path.isfile(args.folder):
+        print(f"--split needs a single audio file, got {args.folder}")
+        return
+    workers = args.workers or os.cpu_count() or 1
+    cache = AnalysisCache(args.cache_dir, max_bytes=int(args.cache_size_gb * 1024 ** 3))
+    analyzer = TrackAnalyzer(fps=args.fps, cache=cache, segment_workers=workers)
+    if analyzer.is_cached(args.folder):
+        print(f"Already cached: {os.path.basename(args.folder)}")
+        return
+
+    print(f"Analyzing {os.path.basename(args.folder)} in segments with {workers} workers")
+    t0 = time.perf_counter()
+    timeline, key = analyzer.analyze_timeline(args.folder, lambda p, msg: print(f"  {msg}"))
+    wall = time.perf_counter() - t0
+    audio_sec = len(timeline) / args.fps
+    print(f"Done: {audio_sec:.0f}s of audio in {wall:.1f}s ({audio_sec / max(wall, 1e-9):.1f}x real time), key {key}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import sys
+import os
+import time
+import argparse
+import numpy as np
+
+# Add project root to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.audio.analysis_worker import OverloadPolicy
+from app.audio.capture import FileReplaySource
+from app.audio.live_analyzer import LiveAnalyzer
+
+
+def replay(path: str, fps: float, realtime: bool, policy: OverloadPolicy, profile: bool):
+    """Feeds 'path' through LiveAnalyzer's capture callback and worker; returns (frames, analyzer, wall_sec)."""
+    source = FileReplaySource(path, realtime=realtime)
+    analyzer = LiveAnalyzer(fps=fps, overload_policy=policy, profile=profile, source=source)
+    frames = []
+    def output(frame):
+        # Collecting the frame is this tool's output
+        frames.append(frame)
+        analyzer.mark_presented(frame)
+    analyzer.on_frame = output
+
+    t0 = time.perf_counter()
+    analyzer.start()
+    source.wait()
+    analyzer.worker.wait_idle()
+    wall = time.perf_counter() - t0
+    analyzer.stop()
+    return frames, analyzer, wall
+
+
+def compare(live_frames, timeline) -> dict:
+    """Per-field agreement between the live frames and the offline timeline (matched by frame index)."""
+    n = min(len(live_frames), len(timeline))
+    stats = {"frames": n}
+    for field in ("brightness", "arousal", "valence"):
+        live = np.array([getattr(f, field) for f in live_frames[:n]])
+        offline = np.asarray(getattr(timeline, field)[:n], dtype=np.float64)
+        corr = np.corrcoef(live, offline)[0, 1] if live.std() > 1e-9 and offline.std() > 1e-9 else float("nan")
+        stats[field] = {"mae": float(np.mean(np.abs(live - offline))), "corr": float(corr)}
+    live_rgb = np.array([f.rgb for f in live_frames[:n]], dtype=np.float64)
+    stats["rgb_mean_distance"] = float(np.mean(np.linalg.norm(live_rgb - timeline.rgb[:n], axis=1)))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay an audio file through the live analysis path")
+    parser.add_argument("file", help="Audio file (WAV/FLAC/OGG)")
+    parser.add_argument("--fps", type=float, default=20.0, help="Live analysis frame rate")
+    parser.add_argument("--realtime", action="store_true", help="Pace at real time (latency test) instead of as fast as possible")
+    parser.add_argument("--policy", choices=[p.value for p in OverloadPolicy], default=OverloadPolicy.DROP_OLDEST.value)
+    parser.add_argument("--profile", metavar="PATH", help="Dump per-stage timings (JSON) to PATH")
+    parser.add_argument("--compare", action="store_true", help="Also run TrackAnalyzer on the file and compare")
+    parser.add_argument("--min-corr", type=float, default=0.8, help="Brightness correlation needed to call it a match")
+    args = parser.parse_args()
+
+    frames, analyzer, wall = replay(args.file, args.fps, args.realtime, OverloadPolicy(args.policy), args.profile is not None)
+    audio_sec = analyzer.worker.reader.cursor / analyzer.sample_rate
+
+    print(f"Replayed {audio_sec:.1f}s of audio in {wall:.2f}s ({'real time' if args.realtime else 'as fast as possible'})")
+    print(f"Frames: {len(frames)} | {len(frames) / max(wall, 1e-9):.1f} frames/sec | {audio_sec / max(wall, 1e-9):.1f}x real time")
+    print(f"Worker: {analyzer.worker.stats.report()}")
+    if args.profile:
+        analyzer.dump_profile(args.profile)
+        print(f"Profile written to {args.profile}")
+
+    if args.compare:
+        from app.audio.player_backend import TrackAnalyzer
+        timeline, _ = TrackAnalyzer(fps=args.fps).analyze_timeline(args.file)
+        stats = compare(frames, timeline)
+        print("-" * 60)
+        print(f"Live vs TrackAnalyzer over {stats['frames']} frames:")
+        for field in ("brightness", "arousal", "valence"):
+            print(f"  {field:10s} MAE={stats[field]['mae']:.3f} corr={stats[field]['corr']:.3f}")
+        print(f"  rgb        mean distance={stats['rgb_mean_distance']:.1f}")
+        # The live path is causal (streaming HPSS, no full-track key), so exact equality is not expected
+        match = stats["brightness"]["corr"] >= args.min_corr
+        print(f"Result: {'MATCH' if match else 'MISMATCH'} (brightness corr >= {args.min_corr})")
+        sys.exit(0 if match else 1)
+
+
+if __name__ == "__main__":
+    main()